@@ -2,7 +2,19 @@ import unittest
 import os
 import tensorflow as tf
 import itertools
-from .utils import init_default_tokeniser, to_feature_map
+import tempfile
+import shutil
+import tensorflow_hub as hub
+from .utils import (
+    init_default_tokeniser,
+    to_feature,
+    to_feature_map,
+    read_saved_model_tokeniser_config,
+    read_tokeniser_manifest,
+    write_tokeniser_manifest,
+    BERT_LAYER_PATH,
+)
+from .features import get_default_feature_builder
 
 C9_CRITERIA_PATH = 'bert/saved_models/c9'
 C10_CRITERIA_PATH = 'bert/saved_models/c10'
@@ -227,5 +239,65 @@ class TestBert(unittest.TestCase):
 
         self.assertTrue(accuracy > TEST_ACCURACY_THRESHOLD)
 
+class TestFeatureBuilder(unittest.TestCase):
+    def setUp(self):
+        init_default_tokeniser()
+
+    def test_build_features(self):
+        """
+        The vectorized features must be byte-identical to the features of to_feature
+        """
+        sentences = [
+            "We collect your email address.",
+            "",
+            "Café résumé naïve, ÜBER-long words: supercalifragilisticexpialidocious!",
+            "中文 and emojis 🙂 are tokenized too.",
+            "a" * 300,
+            "This sentence is repeated until it is truncated. " * 40,
+        ]
+        builder = get_default_feature_builder()
+        for max_seq_length in [250, 16]:
+            features = builder.build_features(sentences, max_seq_length=max_seq_length)
+            expected = [
+                to_feature(tf.constant(sentence), tf.constant(0), max_seq_length=max_seq_length)
+                for sentence in sentences
+            ]
+            for i, key in enumerate(["input_word_ids", "input_mask", "input_type_ids"]):
+                self.assertEqual(features[key].dtype, "int32")
+                self.assertEqual(features[key].shape, (len(sentences), max_seq_length))
+                self.assertEqual(
+                    features[key].tobytes(),
+                    tf.constant([feature[i] for feature in expected], dtype=tf.int32).numpy().tobytes(),
+                )
+
+class TestTokeniserConfig(unittest.TestCase):
+    def test_read_saved_model_tokeniser_config(self):
+        """
+        The vocabulary and casing read from the SavedModel files must be those of the loaded BERT layer
+        """
+        vocab_file, do_lower_case = read_saved_model_tokeniser_config(BERT_LAYER_PATH)
+        bert_layer = hub.KerasLayer(BERT_LAYER_PATH, trainable=False)
+        self.assertEqual(
+            os.path.realpath(vocab_file),
+            os.path.realpath(os.fsdecode(bert_layer.resolved_object.vocab_file.asset_path.numpy())),
+        )
+        self.assertEqual(do_lower_case, bool(bert_layer.resolved_object.do_lower_case.numpy()))
+
+    def test_tokeniser_manifest(self):
+        layer_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(layer_dir, 'assets'))
+            vocab_file = os.path.join(layer_dir, 'assets', 'vocab.txt')
+            self.assertIsNone(read_tokeniser_manifest(layer_dir))
+            with open(vocab_file, 'w') as f:
+                f.write('[UNK]\n')
+            write_tokeniser_manifest(vocab_file, True, layer_dir)
+            self.assertEqual(read_tokeniser_manifest(layer_dir), (vocab_file, True))
+            # the manifest is ignored once its vocabulary is gone
+            os.remove(vocab_file)
+            self.assertIsNone(read_tokeniser_manifest(layer_dir))
+        finally:
+            shutil.rmtree(layer_dir, ignore_errors=True)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import pandas as pd
 import tensorflow_hub as hub
 import numpy as np
@@ -14,21 +15,79 @@ from official.nlp import optimization
 CURRENT_DIR = os.path.dirname(__file__)
 FILE_PATH = os.path.join(CURRENT_DIR, "data/C9sentence.csv") # change dataset suitable for your criteria
 
-# Load dataset
-df = pd.read_csv(FILE_PATH)
+# Set MULTI_HEAD to True to train one BERT encoder shared by all criteria, with one sigmoid head per criteria,
+# on the combined datasets below, instead of one model for the dataset of FILE_PATH
+MULTI_HEAD = False
+MULTI_HEAD_FILE_PATHS = {
+    'c9': os.path.join(CURRENT_DIR, "data/C9sentence.csv"),
+    'c10': os.path.join(CURRENT_DIR, "data/C10sentence.csv"),
+    'c11': os.path.join(CURRENT_DIR, "data/C11sentence.csv"),
+    'c12': os.path.join(CURRENT_DIR, "data/C12sentence.csv"),
+    'c24': os.path.join(CURRENT_DIR, "data/C24sentence.csv"),
+    'c49': os.path.join(CURRENT_DIR, "data/C49sentence.csv"),
+}
+MULTI_HEAD_MODEL_PATH = 'saved_models/multi_head'
+# the criteria of the heads, in the order of the output columns, read by the multi-head pipeline
+HEADS_FILE = 'heads.json'
+# the label of a sentence for the criteria whose dataset does not contain it, which is left out of the loss
+MISSING_LABEL = -1
 
-# Create train and valid dataframe
-train_df, remaining = train_test_split(
-    df, random_state=42, train_size=0.75, stratify=df.target.values)
-valid_df, test_df = train_test_split(
-    remaining, random_state=42, train_size=0.9, stratify=remaining.target.values)
+def load_multi_head_dataset(file_paths=MULTI_HEAD_FILE_PATHS):
+    """Combine the datasets of the criteria, each sentence having a label for every criteria
+
+    Args:
+        file_paths (dict): the csv file of every criteria, by criteria name
+
+    Returns:
+        (pandas.DataFrame): the 'question_text' of every sentence and its label for every criteria in the
+            columns named after the criteria, MISSING_LABEL if the dataset of a criteria does not contain it
+    """
+    df = pd.concat(
+        [pd.read_csv(path).assign(criteria=name) for name, path in file_paths.items()], ignore_index=True)
+    labels = df.pivot_table(index='question_text', columns='criteria', values='target', aggfunc='max')
+    return labels.reindex(columns=list(file_paths)).fillna(MISSING_LABEL).astype('float32').reset_index()
+
+def get_multi_head_strata(df, heads):
+    """Get the stratum of every sentence of the combined datasets, i.e. its first criteria with a label and that label,
+    so that the splits keep the proportion of positive sentences of every criteria dataset
+
+    Args:
+        df (pandas.DataFrame): the combined datasets, see `load_multi_head_dataset`
+        heads (list(str)): the criteria, in the order of the output columns
+
+    Returns:
+        (numpy.ndarray): the stratum of every sentence, e.g. 'c9:1.0'
+    """
+    labels = df[heads].values
+    first_labelled = (labels != MISSING_LABEL).argmax(axis=1)
+    return np.array(['{}:{}'.format(heads[column], labels[row, column]) for row, column in enumerate(first_labelled)])
+
+if MULTI_HEAD:
+    df = load_multi_head_dataset()
+    heads = list(MULTI_HEAD_FILE_PATHS)
+    # the sentences have several labels, so the split is stratified on the first label of each sentence
+    train_df, remaining = train_test_split(
+        df, random_state=42, train_size=0.75, stratify=get_multi_head_strata(df, heads))
+    valid_df, test_df = train_test_split(
+        remaining, random_state=42, train_size=0.9, stratify=get_multi_head_strata(remaining, heads))
+    labels = lambda df: df[heads].values
+else:
+    # Load dataset
+    df = pd.read_csv(FILE_PATH)
+
+    # Create train and valid dataframe
+    train_df, remaining = train_test_split(
+        df, random_state=42, train_size=0.75, stratify=df.target.values)
+    valid_df, test_df = train_test_split(
+        remaining, random_state=42, train_size=0.9, stratify=remaining.target.values)
+    labels = lambda df: df['target'].values
 
 train_data = tf.data.Dataset.from_tensor_slices(
-    (train_df['question_text'].values, train_df['target'].values))
+    (train_df['question_text'].values, labels(train_df)))
 valid_data = tf.data.Dataset.from_tensor_slices(
-    (valid_df['question_text'].values, valid_df['target'].values))
+    (valid_df['question_text'].values, labels(valid_df)))
 test_data = tf.data.Dataset.from_tensor_slices(
-    (test_df['question_text'].values, test_df['target'].values))
+    (test_df['question_text'].values, labels(test_df)))
 
 # Download BERT layer
 # Hyperparameters
@@ -80,16 +139,23 @@ def to_feature_map(text, label):
 
     return (X, label_id)
 
+# The features of a sentence of the combined datasets, with its labels for every criteria
+def to_multi_head_feature_map(text, labels):
+    X, _ = to_feature_map(text, tf.constant(0, dtype=tf.int64))
+    return (X, labels)
+
+feature_map = to_multi_head_feature_map if MULTI_HEAD else to_feature_map
+
 # Create input pipeline
 # train
-train_data = (train_data.map(to_feature_map,
+train_data = (train_data.map(feature_map,
                              num_parallel_calls=tf.data.experimental.AUTOTUNE)  # num_parallel_calls: how much do we want to run parallel preprocessing
               .shuffle(1000)
               .batch(32, drop_remainder=True)
               .prefetch(tf.data.experimental.AUTOTUNE))
 
 # valid
-valid_data = (valid_data.map(to_feature_map,
+valid_data = (valid_data.map(feature_map,
                              num_parallel_calls=tf.data.experimental.AUTOTUNE)  # num_parallel_calls: how much do we want to run parallel preprocessing
               .batch(32, drop_remainder=True)
               .prefetch(tf.data.experimental.AUTOTUNE))
@@ -122,11 +188,60 @@ def create_model():
 
     return model
 
+# Building the multi-head model: the encoder runs once per sentence, and each criteria reads its own head
+def create_multi_head_model(heads):
+    input_word_ids = tf.keras.layers.Input(shape=(max_seq_length,), dtype=tf.int32,
+                                           name="input_word_ids")
+    input_mask = tf.keras.layers.Input(shape=(max_seq_length,), dtype=tf.int32,
+                                       name="input_mask")
+    input_type_ids = tf.keras.layers.Input(shape=(max_seq_length,), dtype=tf.int32,
+                                           name="input_type_ids")
+
+    pooled_output, sequence_output = bert_layer(
+        [input_word_ids, input_mask, input_type_ids])
+
+    drop = tf.keras.layers.Dropout(0.4)(pooled_output)
+    # 1 sigmoid unit per criteria, concatenated in the order of the heads
+    outputs = [tf.keras.layers.Dense(1, activation='sigmoid', name=name)(drop) for name in heads]
+    output = tf.keras.layers.Concatenate(name='output')(outputs)
+
+    model = tf.keras.Model(
+        inputs={
+            'input_word_ids': input_word_ids,
+            'input_mask': input_mask,
+            'input_type_ids': input_type_ids
+        },
+        outputs=output
+    )
+
+    return model
+
+# The loss and accuracy of the multi-head model leave out the criteria whose dataset does not contain the sentence
+def get_label_mask(y_true, y_pred):
+    return tf.cast(tf.not_equal(y_true, MISSING_LABEL), y_pred.dtype)
+
+def masked_binary_crossentropy(y_true, y_pred):
+    mask = get_label_mask(y_true, y_pred)
+    y_true = tf.cast(tf.maximum(y_true, 0), y_pred.dtype)
+    losses = tf.keras.backend.binary_crossentropy(y_true, y_pred) * mask
+    return tf.reduce_sum(losses, axis=-1) / tf.maximum(tf.reduce_sum(mask, axis=-1), 1.0)
+
+def masked_binary_accuracy(y_true, y_pred):
+    mask = get_label_mask(y_true, y_pred)
+    correct = tf.cast(tf.equal(tf.cast(y_true, y_pred.dtype), tf.round(y_pred)), y_pred.dtype) * mask
+    return tf.reduce_sum(correct, axis=-1) / tf.maximum(tf.reduce_sum(mask, axis=-1), 1.0)
+
 # Compile model
-model = create_model()
-model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=2e-5),
-              loss=tf.keras.losses.BinaryCrossentropy(),
-              metrics=[tf.keras.metrics.binary_accuracy])
+if MULTI_HEAD:
+    model = create_multi_head_model(heads)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=2e-5),
+                  loss=masked_binary_crossentropy,
+                  metrics=[masked_binary_accuracy])
+else:
+    model = create_model()
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=2e-5),
+                  loss=tf.keras.losses.BinaryCrossentropy(),
+                  metrics=[tf.keras.metrics.binary_accuracy])
 
 # Train model
 epochs = 1  # no. training iterations - keep it as 1 to save time for now.
@@ -137,4 +252,9 @@ model.fit(train_data,
           # callbacks=[checkpoint_callback])  # pass callback to training
 
 # Save model
-model.save('saved_models/c9') # Change c9 to your criteria
+if MULTI_HEAD:
+    model.save(MULTI_HEAD_MODEL_PATH)
+    with open(os.path.join(MULTI_HEAD_MODEL_PATH, HEADS_FILE), 'w') as heads_file:
+        json.dump(heads, heads_file)
+else:
+    model.save('saved_models/c9') # Change c9 to your criteria
@@ -1,31 +1,123 @@
 import os
+import json
 import tensorflow as tf
 import tensorflow_hub as hub
 from official.nlp.data import classifier_data_lib
 from official.nlp.bert import tokenization
+from ...parameters import MAX_INPUT_SEQUENCES, NUM_SPECIAL_TOKENS
 
 LABEL_LIST = [0, 1]
-MAX_INPUT_SEQUENCES = 250
 PRETRAINED_LAYER_PATH = 'saved_models/bert_raw'
 CURRENT_DIR = os.path.dirname(__file__)
 BERT_LAYER_PATH = os.path.join(CURRENT_DIR, PRETRAINED_LAYER_PATH)
+# The vocabulary and casing of the tokeniser, cached next to the pre-trained BERT layer
+TOKENISER_MANIFEST = 'tokeniser.json'
+VOCAB_ASSET = os.path.join('assets', 'vocab.txt')
+VARIABLES_PATH = os.path.join('variables', 'variables')
+DO_LOWER_CASE_VARIABLE = 'do_lower_case'
 
 default_tokeniser = None
 
+def read_tokeniser_manifest(bert_layer_path=BERT_LAYER_PATH):
+    """Read the vocabulary file and casing of the tokeniser from the manifest cached by `write_tokeniser_manifest`
+
+    Args:
+        bert_layer_path (str): the path of the pre-trained BERT layer
+
+    Returns:
+        (tuple(str, bool)): the path of the vocabulary file and whether the text is lowercased, or None if there is
+            no manifest or its vocabulary file is missing
+    """
+    try:
+        with open(os.path.join(bert_layer_path, TOKENISER_MANIFEST), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        vocab_file = os.path.join(bert_layer_path, manifest['vocab_file'])
+        do_lower_case = bool(manifest['do_lower_case'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return (vocab_file, do_lower_case) if os.path.exists(vocab_file) else None
+
+def write_tokeniser_manifest(vocab_file, do_lower_case, bert_layer_path=BERT_LAYER_PATH):
+    """Cache the vocabulary file and casing of the tokeniser next to the pre-trained BERT layer.
+    The layer folder may be read-only, e.g. in a container, in which case nothing is cached.
+
+    Args:
+        vocab_file (str): the path of the vocabulary file
+        do_lower_case (bool): whether the text is lowercased
+        bert_layer_path (str): the path of the pre-trained BERT layer
+    """
+    manifest = {
+        'vocab_file': os.path.relpath(vocab_file, bert_layer_path),
+        'do_lower_case': bool(do_lower_case),
+    }
+    try:
+        with open(os.path.join(bert_layer_path, TOKENISER_MANIFEST), 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file)
+    except OSError:
+        pass
+
+def read_saved_model_tokeniser_config(bert_layer_path=BERT_LAYER_PATH):
+    """Read the vocabulary file and casing of the tokeniser from the files of the pre-trained BERT layer,
+    without loading the layer: the vocabulary is an asset of the SavedModel, and the casing is a variable of its
+    checkpoint, which is read alone.
+
+    Args:
+        bert_layer_path (str): the path of the pre-trained BERT layer
+
+    Returns:
+        (tuple(str, bool)): the path of the vocabulary file and whether the text is lowercased, or None if they
+            cannot be found in the SavedModel
+    """
+    vocab_file = os.path.join(bert_layer_path, VOCAB_ASSET)
+    if not os.path.exists(vocab_file):
+        return None
+    try:
+        reader = tf.train.load_checkpoint(os.path.join(bert_layer_path, VARIABLES_PATH))
+    except (tf.errors.OpError, ValueError):
+        return None
+    # the variables saved as attributes of the layer are named e.g. 'do_lower_case/.ATTRIBUTES/VARIABLE_VALUE'
+    keys = [key for key in reader.get_variable_to_shape_map() if key.split('/')[0] == DO_LOWER_CASE_VARIABLE]
+    if len(keys) != 1:
+        return None
+    return vocab_file, bool(reader.get_tensor(keys[0]))
+
+def load_tokeniser_config(bert_layer_path=BERT_LAYER_PATH):
+    """Get the vocabulary file and casing of the tokeniser of the pre-trained BERT layer.
+
+    They are read from the cached manifest, or else from the SavedModel files, or else from the loaded layer.
+    Only the last one loads the BERT graph and weights, which are released once the casing is read.
+
+    Args:
+        bert_layer_path (str): the path of the pre-trained BERT layer
+
+    Returns:
+        (tuple(str, bool)): the path of the vocabulary file and whether the text is lowercased
+    """
+    config = read_tokeniser_manifest(bert_layer_path)
+    if config is not None:
+        return config
+
+    config = read_saved_model_tokeniser_config(bert_layer_path)
+    if config is None:
+        bert_layer = hub.KerasLayer(bert_layer_path, trainable=False)
+        config = (
+            os.fsdecode(bert_layer.resolved_object.vocab_file.asset_path.numpy()),
+            bool(bert_layer.resolved_object.do_lower_case.numpy()),
+        )
+    write_tokeniser_manifest(*config, bert_layer_path=bert_layer_path)
+    return config
+
 # This method is needed to ensure that the bert model is not loaded in the initial main process before the 
 # criteria processes are created, otherwise tensorflow does not work: https://github.com/keras-team/keras/issues/9964,
 # https://stackoverflow.com/questions/56055769/load-multiple-keras-models-in-different-processes
 def init_default_tokeniser():
     """
     Initialise the global 'default_tokeniser' variable of this module to ensure 1 time loading of 
-    the pre-trained BERT layer.
+    the tokeniser of the pre-trained BERT layer. The layer itself is not loaded, see `load_tokeniser_config`.
     """
     global default_tokeniser
     if default_tokeniser is None:
-        # Get pre-trained BERT layer
-        BERT_LAYER = hub.KerasLayer(BERT_LAYER_PATH, trainable=True)
-        VOCAB_FILE = BERT_LAYER.resolved_object.vocab_file.asset_path.numpy()
-        DO_LOWER_CASE = BERT_LAYER.resolved_object.do_lower_case.numpy()
+        VOCAB_FILE, DO_LOWER_CASE = load_tokeniser_config()
         default_tokeniser = tokenization.FullTokenizer(VOCAB_FILE, DO_LOWER_CASE)
 
 def to_feature(text, label, label_list=LABEL_LIST, max_seq_length=MAX_INPUT_SEQUENCES, tokenizer=None):
@@ -40,13 +132,30 @@ def to_feature(text, label, label_list=LABEL_LIST, max_seq_length=MAX_INPUT_SEQU
 
     return (feature.input_ids, feature.input_mask, feature.segment_ids, feature.label_id)
 
-def to_feature_map(text, label):
+def count_tokens(text, max_seq_length=MAX_INPUT_SEQUENCES, tokenizer=None):
+    """Count the tokens of a text in the BERT input, with the [CLS] and [SEP] tokens and the same truncation as `to_feature`
+
+    Args:
+        text (str): the text
+        max_seq_length (int): the maximum number of tokens of the BERT input
+        tokenizer (FullTokenizer): the WordPiece tokenizer, the default tokeniser if None
+
+    Returns:
+        (int): the number of tokens
+    """
+    if tokenizer is None:
+        tokenizer = default_tokeniser
+    return min(len(tokenizer.tokenize(text)) + NUM_SPECIAL_TOKENS, max_seq_length)
+
+def to_feature_map(text, label, max_seq_length=MAX_INPUT_SEQUENCES):
     input_ids, input_mask, segment_ids, label_id = tf.py_function(
-        to_feature, inp=[text, label], Tout=[tf.int32, tf.int32, tf.int32, tf.int32])
+        lambda text, label: to_feature(text, label, max_seq_length=max_seq_length),
+        inp=[text, label],
+        Tout=[tf.int32, tf.int32, tf.int32, tf.int32])
 
-    input_ids.set_shape([MAX_INPUT_SEQUENCES])
-    input_mask.set_shape([MAX_INPUT_SEQUENCES])
-    segment_ids.set_shape([MAX_INPUT_SEQUENCES])
+    input_ids.set_shape([max_seq_length])
+    input_mask.set_shape([max_seq_length])
+    segment_ids.set_shape([max_seq_length])
     label_id.set_shape([])
 
     X = {
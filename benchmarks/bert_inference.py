@@ -0,0 +1,136 @@
+"""Measure the BERT inference throughput of a criteria model for several batch sizes and length buckets on the test fixtures.
+
+The predictions of each configuration are compared with the predictions of one sentence at a time,
+and the vectorized features of `models/bert/features.py` with the features of `to_feature`.
+It needs the trained model of the criteria in `models/bert/saved_models`, and the pre-trained BERT layer.
+Run it from the parent folder of this package, e.g. `python3 -m <package>.benchmarks.bert_inference`
+where `<package>` is the folder of this repository
+"""
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from ..preprocessors.paragraphs_extractor import ParagraphsExtractor
+from ..preprocessors.utils.json_helper import from_json_file
+from ..models.bert.utils import init_default_tokeniser, to_feature, MAX_INPUT_SEQUENCES
+from ..models.bert.features import FeatureBuilder, get_default_feature_builder
+from ..parameters import NUM_TOKENS_LOWER_LIMIT, INFERENCE_BATCH_SIZE
+
+CURRENT_DIR = os.path.dirname(__file__)
+PARENT_PATH = os.path.dirname(CURRENT_DIR)
+FIXTURES_DIR = os.path.join(PARENT_PATH, "preprocessors", "test")
+FIXTURES = ["calm.json", "fitbit.json"]
+MODELS_DIR = os.path.join(PARENT_PATH, "models", "bert", "saved_models")
+CRITERIA = "c9"
+NUM_SENTENCES = 256
+# (batch size, number of parallel calls, prefetch buffer size), the first one being the reference
+CONFIGURATIONS = [(1, 1, 0), (1, -1, -1), (8, -1, -1), (16, -1, -1), (32, -1, -1), (64, -1, -1)]
+# the length buckets compared with padding every sentence, with the default batching
+LENGTH_BUCKETS = [[32, 64, 128, 250], [16, 32, 48, 64, 96, 128, 250]]
+
+
+def get_sentences(extractor, num_sentences=NUM_SENTENCES):
+    """Get the sentences of the test fixtures which are valid for BERT input
+
+    Args:
+        extractor (ParagraphsExtractor): the paragraphs extractor
+        num_sentences (int): the maximum number of sentences
+
+    Returns:
+        (list(str)): the sentences
+    """
+    sentences = []
+    for name in FIXTURES:
+        paragraphs = extractor.get_paragraphs(from_json_file(os.path.join(FIXTURES_DIR, name))["privacyPolicyText"])
+        for stat in extractor.get_paragraphs_statistics(paragraphs, []):
+            sentences.extend(
+                sentence
+                for sentence, num_tokens in zip(stat["sentences"], stat["sentence_token_counts"])
+                if num_tokens >= NUM_TOKENS_LOWER_LIMIT
+            )
+    return sentences[:num_sentences]
+
+
+def print_result(name, num_sentences, seconds, predictions, reference):
+    print(
+        f"    {name}: {num_sentences / seconds:.1f} sentences/s, "
+        f"max raw label difference {np.max(np.abs(predictions - reference)):.2e}, "
+        f"same rounded labels {np.array_equal(np.round(predictions), np.round(reference))}"
+    )
+
+
+def compare_features(sentences, max_seq_length=MAX_INPUT_SEQUENCES):
+    """Compare the vectorized features of the sentences with the features of `to_feature`, one sentence at a time"""
+    start = time.perf_counter()
+    expected = [
+        to_feature(tf.constant(sentence), tf.constant(0), max_seq_length=max_seq_length)[:3] for sentence in sentences
+    ]
+    reference_seconds = time.perf_counter() - start
+    # a new builder, so the words are not cached yet
+    builder = FeatureBuilder(get_default_feature_builder().tokenizer)
+    start = time.perf_counter()
+    features = builder.build_features(sentences, max_seq_length=max_seq_length)
+    seconds = time.perf_counter() - start
+    identical = all(
+        features[key].tobytes() == np.array([feature[i] for feature in expected], dtype=np.int32).tobytes()
+        for i, key in enumerate(["input_word_ids", "input_mask", "input_type_ids"])
+    )
+    print(
+        f"    features: to_feature {len(sentences) / reference_seconds:.1f} sentences/s, "
+        f"vectorized {len(sentences) / seconds:.1f} sentences/s, identical {identical}"
+    )
+
+
+def run_benchmark(
+    criteria=CRITERIA, configurations=CONFIGURATIONS, length_buckets=LENGTH_BUCKETS, num_sentences=NUM_SENTENCES
+):
+    extractor = ParagraphsExtractor()
+    sentences = get_sentences(extractor, num_sentences)
+    init_default_tokeniser()
+    model = tf.keras.models.load_model(os.path.join(MODELS_DIR, criteria))
+    print(f"{criteria} ({len(sentences)} sentences)")
+
+    reference = None
+    for batch_size, num_parallel_calls, prefetch_buffer_size in configurations:
+        # the first call also traces the model for the batch size
+        model.predict(extractor.process_inputs_for_bert(sentences[:batch_size], batch_size), verbose=0)
+        # the dataset is lazy, so the conversion of the sentences into features is measured with the predictions
+        inputs = extractor.process_inputs_for_bert(sentences, batch_size, num_parallel_calls, prefetch_buffer_size)
+        start = time.perf_counter()
+        predictions = np.asarray(model.predict(inputs, verbose=0))
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = predictions
+        print_result(
+            f"batch size {batch_size}, parallel calls {num_parallel_calls}, prefetch {prefetch_buffer_size}",
+            len(sentences),
+            seconds,
+            predictions,
+            reference,
+        )
+
+    for buckets in length_buckets:
+        # the first call also traces the model for every bucket
+        extractor.predict_by_length(model, sentences, buckets)
+        start = time.perf_counter()
+        predictions = np.asarray(extractor.predict_by_length(model, sentences, buckets))
+        print_result(f"length buckets {buckets}", len(sentences), time.perf_counter() - start, predictions, reference)
+
+    compare_features(sentences)
+    builder = get_default_feature_builder()
+    model.predict(builder.build_features(sentences[:INFERENCE_BATCH_SIZE]), batch_size=INFERENCE_BATCH_SIZE, verbose=0)
+    start = time.perf_counter()
+    predictions = np.asarray(
+        model.predict(builder.build_features(sentences), batch_size=INFERENCE_BATCH_SIZE, verbose=0)
+    )
+    print_result(
+        f"vectorized features, batch size {INFERENCE_BATCH_SIZE}",
+        len(sentences),
+        time.perf_counter() - start,
+        predictions,
+        reference,
+    )
+
+
+if __name__ == "__main__":
+    run_benchmark()
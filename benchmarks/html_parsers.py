@@ -0,0 +1,56 @@
+"""Compare the speed of the HTML parser backends on the test fixtures and on synthetic policy pages.
+
+Run it from the parent folder of this package, e.g. `python3 -m <package>.benchmarks.html_parsers`
+where `<package>` is the folder of this repository
+"""
+import os
+import timeit
+from ..preprocessors.html_parsers import HTML_PARSER_BACKENDS
+from ..preprocessors.paragraphs_extractor import ParagraphsExtractor
+from ..preprocessors.utils.json_helper import from_json_file
+
+CURRENT_DIR = os.path.dirname(__file__)
+FIXTURES_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "preprocessors", "test")
+FIXTURES = ["calm.json", "fitbit.json"]
+SYNTHETIC_NUM_SECTIONS = [50, 500]
+NUM_RUNS = 5
+
+
+def generate_synthetic_policy(num_sections):
+    """Generate a policy page with nested wrappers, inline tags, comments and scripts
+
+    Args:
+        num_sections (int): the number of headings of the page
+
+    Returns:
+        (str): the raw html text
+    """
+    sections = []
+    for i in range(num_sections):
+        sections.append(
+            "<section><h2>Section {0}</h2>"
+            "<p>We collect your <b>email address</b> and <a href='#'>device identifiers</a><!-- -->.</p>"
+            "<ul><li>You can opt out at any time.</li><li>Contact us at privacy@example.com.</li></ul>"
+            "<script>track({0});</script>"
+            "<p>Third parties may receive this information under an agreement.</p></section>".format(i)
+        )
+    return "<html><body><div id='root'>{}</div></body></html>".format("".join(sections))
+
+
+def run_benchmark(num_runs=NUM_RUNS):
+    pages = {name: from_json_file(os.path.join(FIXTURES_DIR, name))["privacyPolicyText"] for name in FIXTURES}
+    for num_sections in SYNTHETIC_NUM_SECTIONS:
+        pages["synthetic ({} sections)".format(num_sections)] = generate_synthetic_policy(num_sections)
+
+    extractors = {backend: ParagraphsExtractor(html_parser_backend=backend) for backend in HTML_PARSER_BACKENDS}
+    for name, html in pages.items():
+        results = [extractor.get_segments_by_html_tags(html) for extractor in extractors.values()]
+        identical = all(result == results[0] for result in results)
+        print(f"{name} ({len(html) / 1024:.0f}KB), identical segments: {identical}")
+        for backend, extractor in extractors.items():
+            seconds = min(timeit.repeat(lambda: extractor.get_segments_by_html_tags(html), number=1, repeat=num_runs))
+            print(f"    {backend}: {seconds * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,84 @@
+"""Compare the sentence segmenters of the custom Spacy pipeline on the test fixtures.
+
+The boundaries of each segmenter are compared with the boundaries of the statistical `senter`, which is the reference,
+and the throughput of each segmenter is measured on the same paragraphs.
+Run it from the parent folder of this package, e.g. `python3 -m <package>.benchmarks.sentence_segmenters`
+where `<package>` is the folder of this repository
+"""
+import os
+import timeit
+from ..preprocessors.paragraphs_extractor import ParagraphsExtractor
+from ..preprocessors.utils.json_helper import from_json_file
+from ..preprocessors.utils.spacy_utils import SENTENCE_SEGMENTERS, get_custom_extractor
+
+CURRENT_DIR = os.path.dirname(__file__)
+FIXTURES_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "preprocessors", "test")
+FIXTURES = ["calm.json", "fitbit.json"]
+REFERENCE_SEGMENTER = "senter"
+NUM_RUNS = 3
+
+
+def get_boundaries(doc):
+    """Get the character offsets where a new sentence starts, leaving out the start of the text
+
+    Args:
+        doc (spacy.tokens.Doc): the processed paragraph
+
+    Returns:
+        (set(int)): the character offsets of the sentence boundaries
+    """
+    return {sent.start_char for sent in doc.sents if sent.start_char > 0}
+
+
+def get_boundary_agreement(reference_docs, docs):
+    """Compare the sentence boundaries of the same paragraphs processed by two segmenters
+
+    Args:
+        reference_docs (list(spacy.tokens.Doc)): the paragraphs split by the reference segmenter
+        docs (list(spacy.tokens.Doc)): the same paragraphs split by the compared segmenter
+
+    Returns:
+        (dict): the precision, recall and F1 of the boundaries, and the ratio of paragraphs split in the same sentences
+    """
+    num_common = num_reference = num_found = num_same_paragraphs = 0
+    for reference_doc, doc in zip(reference_docs, docs):
+        reference_boundaries = get_boundaries(reference_doc)
+        boundaries = get_boundaries(doc)
+        num_common += len(reference_boundaries & boundaries)
+        num_reference += len(reference_boundaries)
+        num_found += len(boundaries)
+        num_same_paragraphs += reference_boundaries == boundaries
+
+    precision = num_common / num_found if num_found > 0 else 1.0
+    recall = num_common / num_reference if num_reference > 0 else 1.0
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0,
+        "same_paragraphs": num_same_paragraphs / len(docs) if len(docs) > 0 else 1.0,
+    }
+
+
+def run_benchmark(num_runs=NUM_RUNS):
+    extractor = ParagraphsExtractor()
+    for name in FIXTURES:
+        paragraphs = extractor.get_paragraphs(from_json_file(os.path.join(FIXTURES_DIR, name))["privacyPolicyText"])
+        num_words = sum(len(paragraph.split()) for paragraph in paragraphs)
+        print(f"{name} ({len(paragraphs)} paragraphs, {num_words} words)")
+
+        reference_docs = list(get_custom_extractor(REFERENCE_SEGMENTER).pipe(paragraphs))
+        for segmenter in SENTENCE_SEGMENTERS:
+            pipeline = get_custom_extractor(segmenter)
+            docs = list(pipeline.pipe(paragraphs))
+            seconds = min(timeit.repeat(lambda: list(pipeline.pipe(paragraphs)), number=1, repeat=num_runs))
+            agreement = get_boundary_agreement(reference_docs, docs)
+            print(
+                f"    {segmenter}: {len(paragraphs) / seconds:.0f} paragraphs/s, "
+                f"{sum(len(list(doc.sents)) for doc in docs)} sentences, "
+                f"boundary precision {agreement['precision']:.3f}, recall {agreement['recall']:.3f}, "
+                f"F1 {agreement['f1']:.3f}, identical paragraphs {agreement['same_paragraphs']:.1%}"
+            )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,61 @@
+"""Measure the start-up time of the custom Spacy pipeline, with and without the on-disk pipeline cache.
+
+Each measurement runs in a fresh Python process, like a new criteria or worker process would.
+Run it from the parent folder of this package, e.g. `python3 -m <package>.benchmarks.spacy_startup`
+where `<package>` is the folder of this repository
+"""
+import sys
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+NUM_RUNS = 5
+
+MEASURE_SCRIPT = """
+import time
+start = time.perf_counter()
+from {package}.preprocessors.utils import spacy_utils
+imported = time.perf_counter()
+spacy_utils.load_custom_extractor(cache_dir={cache_dir!r})
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def measure_startup(cache_dir):
+    """Measure the import time of `spacy_utils` and the loading time of the custom pipeline in a fresh process
+
+    Args:
+        cache_dir (str): the folder of the cached pipelines, or None to always build the pipeline
+
+    Returns:
+        (tuple(float, float)): the import time and the loading time, in seconds
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT.format(package=PACKAGE, cache_dir=cache_dir)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    import_time, load_time = output.split()[-2:]
+    return float(import_time), float(load_time)
+
+
+def run_benchmark(num_runs=NUM_RUNS):
+    cache_dir = tempfile.mkdtemp()
+    try:
+        no_cache = [measure_startup(None) for _ in range(num_runs)]
+        cold_cache = measure_startup(cache_dir)
+        warm_cache = [measure_startup(cache_dir) for _ in range(num_runs)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"Import of spacy_utils (lazy, median): {statistics.median(t[0] for t in no_cache):.3f}s")
+    print(f"Build pipeline without cache (median of {num_runs}): {statistics.median(t[1] for t in no_cache):.3f}s")
+    print(f"Build and save pipeline to an empty cache: {cold_cache[1]:.3f}s")
+    print(f"Load pipeline from the cache (median of {num_runs}): {statistics.median(t[1] for t in warm_cache):.3f}s")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -4,10 +4,9 @@ import tensorflow as tf
 from multiprocessing import Process
 from multiprocessing import Queue
 from multiprocessing import Event
-from itertools import chain
-from ..preprocessors.paragraphs_extractor import ParagraphsExtractor
+from ..preprocessors.paragraphs_selector import ParagraphsSelector, KEYWORD_ALIASES
 from ..assessor.assessor import assess_against_threshold
-from ..parameters import C12_KEYWORDS, NUM_TOKENS_LOWER_LIMIT
+from ..parameters import C12_KEYWORDS, C12_BUDGET
 from ..models.bert.utils import init_default_tokeniser
 
 CRITERIA_PATH = "models/bert/saved_models/c12"
@@ -18,20 +17,125 @@ THRESHOLD = 1  # each pipeline will have its own threshold
 NUM_TOP_PARAGRAPHS = 5
 
 
-class C12pipeline(Process):
+class C12selection:
+    """
+    Select the sentences of a policy which are assessed against C12, and assess the labels predicted for them.
+    It is not a process, so the multi-head pipeline selects the sentences of C12 without creating a `C12pipeline`.
+    """
+
+    def __init__(self):
+        """
+        Initialise the selector and the keywords of C12
+        """
+        # the main process also selects the paragraphs, to only split the sentences of the selected ones
+        self.selector = ParagraphsSelector()
+        self.keywords = C12_KEYWORDS
+
+    def get_keywords(self):
+        return C12_KEYWORDS
+
+    def get_relevant_scores(self, keyword_occurence):
+        """Calculate the relevant scores of all paragraphs based on their keyword occurence
+
+        Args:
+            keyword_occurence (dict): the keywords and the topic / non-topic keyword occurence matrices of all paragraphs
+
+        Returns:
+            (numpy.ndarray): the relevant score of every paragraph
+        """
+
+        return self.selector.get_relevant_scores(
+            keyword_occurence,
+            weights=[2, 1],
+            keywords=self.keywords,
+        )
+
+    def get_selected_indices(self, keyword_occurence):
+        """Get the indices of the paragraphs selected by `run_assessment`, before their sentences are known
+
+        Args:
+            keyword_occurence (dict): the keywords and the topic / non-topic keyword occurence matrices of all paragraphs
+
+        Returns:
+            (tuple(list(int), dict)): the indices of the selected paragraphs, see `ParagraphsSelector.select_paragraph_indices`
+        """
+        return self.selector.select_paragraph_indices(
+            self.get_relevant_scores(keyword_occurence), NUM_TOP_PARAGRAPHS, keyword_occurence, budget=C12_BUDGET
+        )
+
+    def select_sentences(self, input_data):
+        """Select the sentences of the current policy which are assessed against C12
+
+        Args:
+            input_data (dict): info about the app, containing policy and metadata
+
+        Returns:
+            (tuple(list(str), bool)) or None: the sentences fed into BERT and whether they were selected by the zero
+                relevance fallback, or None if the policy has no sentence
+        """
+        if input_data.get("privacyPolicyText") == "":
+            # no sentence found inside an empty privacy policy text
+            return None
+
+        paragraphs_stats = input_data.get("statistics", [])
+        if len(paragraphs_stats) == 0:
+            # no paragraph statistics can be found, i.e. sentences
+            return None
+
+        relevant_scores = self.get_relevant_scores(input_data.get("keyword_occurence"))
+
+        # select the top most relevant paragraphs (or the most relevant ones within the budget),
+        # or a bounded number of paragraphs if none of them is relevant
+        selected_paragraphs_stats, zero_relevance_fallback = self.selector.select_paragraphs(
+            paragraphs_stats,
+            relevant_scores,
+            NUM_TOP_PARAGRAPHS,
+            input_data.get("keyword_occurence"),
+            budget=C12_BUDGET,
+            count_tokens=self.selector.get_budget_count_tokens(C12_BUDGET),
+        )
+        # the sentence token counts and keywords are pre-calculated with the statistics, so no Spacy model is needed here
+        filtered_sents = self.selector.get_candidate_sentences(
+            selected_paragraphs_stats,
+            self.keywords,
+            zero_relevance_fallback,
+            keyword_aliases=input_data.get("keyword_occurence").get(KEYWORD_ALIASES),
+        )
+        return filtered_sents, zero_relevance_fallback
+
+    def assess_predictions(self, selection, assessments):
+        """Return assessment result for the selected sentences against C12, from the labels predicted for them
+
+        Args:
+            selection (tuple(list(str), bool)): the selected sentences and fallback flag, see `select_sentences`, or None
+            assessments (list(list(float))): the labels predicted for the selected sentences, in the same order
+
+        Returns:
+            dict: return a dictionary containing the assessment result
+        """
+        if selection is None:
+            return { "c12": assess_against_threshold([], [], THRESHOLD) }
+        filtered_sents, zero_relevance_fallback = selection
+
+        result = assess_against_threshold(assessments, filtered_sents, THRESHOLD)
+        # flag the results based on the fallback selection rather than on relevant paragraphs
+        result["zero_relevance_fallback"] = zero_relevance_fallback
+        return { "c12": result }
+
+
+class C12pipeline(C12selection, Process):
     def __init__(self, input_queue: Queue, wait_event: Event, result_queue: Queue):
         """
-        Initialise the extractor and load the pre-trained model for C12
+        Initialise the selector and load the pre-trained model for C12
         """
         Process.__init__(self)
+        C12selection.__init__(self)
         self.input_queue = input_queue
         self.wait_event = wait_event
         self.result_queue = result_queue
 
     def run(self):
         print("C12 Worker process: Starting")
-        self.extractor = ParagraphsExtractor()
-        self.keywords = C12_KEYWORDS
         init_default_tokeniser()
         try:
             self.model = tf.keras.models.load_model(MODEL_PATH)
@@ -47,25 +151,24 @@ class C12pipeline(Process):
             self.result_queue.put(self.run_assessment(input))
             print(f"C12 Process assessment time: { time.time() - assessment_start }")
 
-    def get_keywords(self):
-        return C12_KEYWORDS
-
-    def get_relevant_score(self, paragraph_stat):
-        """Calculate the relevant score of a paragraph based on its statistics
+    def assess_sentences(self, selection, previous_predictions=None):
+        """Return assessment result for the selected sentences against C12
 
         Args:
-            paragraph_stat (dict): a dictionary of different statistics of a paragraph
+            selection (tuple(list(str), bool)): the selected sentences and fallback flag, see `select_sentences`, or None
+            previous_predictions (dict(str, float)): the raw label of the sentences which are already assessed
 
         Returns:
-            (num): the relevant score of a paragraph
+            dict or -1: return a dictionary containing the assessment result, or -1 means model fails to load
         """
+        if self.model is None:
+            return { "c12": -1 }
+        if selection is None:
+            return self.assess_predictions(None, [])
 
-        return self.extractor.get_relevant_score_by_keyword_occurence(
-            paragraph_stat.get("topic_keyword_occurence"),
-            paragraph_stat.get("non_topic_keyword_occurence"),
-            weights=[2, 1],
-            keywords=self.keywords,
-        )
+        # assess the sentences by the machine learning model, except those already assessed in the previous assessment
+        assessments = self.selector.predict_sentences(self.model, selection[0], previous_predictions)
+        return self.assess_predictions(selection, assessments)
 
     def run_assessment(self, input_data):
         """Return assessment result for the current policy against C12
@@ -79,43 +182,6 @@ class C12pipeline(Process):
         if self.model is None:
             return { "c12": -1 }
 
-        if input_data.get("privacyPolicyText") == "":
-            # no sentence found inside an empty privacy policy text
-            return { "c12": assess_against_threshold([], [], THRESHOLD) }
-
-        paragraphs_stats = input_data.get("statistics", [])
-        if len(paragraphs_stats) == 0:
-            # no paragraph statistics can be found, i.e. sentences
-            return { "c12": assess_against_threshold([], [], THRESHOLD) }
-
-        stats_with_relevant_score = [
-            {
-                "relevant_score": self.get_relevant_score(stat),
-                "sentences": stat.get("sentences"),
-            }
-            for stat in paragraphs_stats
-        ]
-
-        # select the top most relevant paragraphs
-        selected_paragraphs_stats = self.extractor.rank_paragraphs_by_relevant_score(
-            stats_with_relevant_score, NUM_TOP_PARAGRAPHS
-        )
-        sentences = list(
-            chain.from_iterable(
-                stat.get("sentences") for stat in selected_paragraphs_stats
-            )
-        )
-        
-        filtered_sents = [
-            s
-            for s in sentences
-            if len(self.extractor.tokenize_text(s)) >= NUM_TOKENS_LOWER_LIMIT
-        ]
-
-        # transform sentences into the BERT's expected input format
-        processed_sents = self.extractor.process_inputs_for_bert(filtered_sents)
-
-        # asssess the sentences by the machine learning model
-        assessments = self.model.predict(processed_sents) if len(processed_sents) > 0 else []
-
-        return { "c12": assess_against_threshold(assessments, filtered_sents, THRESHOLD) }
\ No newline at end of file
+        return self.assess_sentences(
+            self.select_sentences(input_data), input_data.get("previous_predictions", {}).get("c12")
+        )
\ No newline at end of file
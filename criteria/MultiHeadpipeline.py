@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import tensorflow as tf
+from multiprocessing import Process
+from multiprocessing import Queue
+from multiprocessing import Event
+from ..preprocessors.paragraphs_selector import ParagraphsSelector
+from ..models.bert.utils import init_default_tokeniser
+from ..parameters import MULTI_HEAD_MODEL_PATH
+
+CURRENT_DIR = os.path.dirname(__file__)
+PARENT_PATH = os.path.dirname(CURRENT_DIR)
+# the criteria of the heads of the model, in the order of its output columns, written by `models/bert/train.py`
+HEADS_FILE = "heads.json"
+
+
+class MultiHeadpipeline(Process):
+    def __init__(self, input_queue: Queue, wait_event: Event, result_queue: Queue, criteria_classes: dict):
+        """
+        Initialise the selector and the sentence selection of every criteria, e.g. `C9selection`
+
+        Args:
+            criteria_classes (dict): the selection class of every criteria, by criteria name
+        """
+        Process.__init__(self)
+        self.input_queue = input_queue
+        self.wait_event = wait_event
+        self.result_queue = result_queue
+        self.selector = ParagraphsSelector()
+        self.criteria_selections = {name: cls() for name, cls in criteria_classes.items()}
+        self.model = None
+        self.heads = []
+
+    def run(self):
+        print("Multi-head Worker process: Starting")
+        init_default_tokeniser()
+        try:
+            self.load_model(os.path.join(PARENT_PATH, MULTI_HEAD_MODEL_PATH))
+        except Exception as e:
+            print("Exception when loading the multi-head model: {}".format(e))
+            self.model = None
+
+        missing_heads = [name for name in self.criteria_selections if name not in self.heads]
+        if self.model is not None and len(missing_heads) > 0:
+            print(f"Criteria without a head in the multi-head model, which cannot be assessed: {missing_heads}")
+        print("Multi-head Worker process: Ready")
+        while(True):
+            input = self.input_queue.get()
+            self.wait_event.wait()
+            assessment_start = time.time()
+            self.result_queue.put(self.run_assessment(input))
+            print(f"Multi-head Process assessment time: { time.time() - assessment_start }")
+
+    def load_model(self, model_path):
+        """Load the multi-head model and the criteria of its heads
+
+        Args:
+            model_path (str): the path of the model saved by `models/bert/train.py`
+        """
+        with open(os.path.join(model_path, HEADS_FILE), encoding="utf-8") as heads_file:
+            self.heads = json.load(heads_file)
+        # the masked loss of the training is not needed for the predictions
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+
+    def run_assessment(self, input_data):
+        """Return assessment results for the current policy against the requested criteria, each sentence running
+        through the shared encoder only once, however many criteria assess it
+
+        Args:
+            input_data (dict): info about the app, containing policy and metadata, and the requested criteria name
+                in `requested_criteria`, or None for all criteria
+
+        Returns:
+            dict: the assessment result of every requested criteria, by criteria name, -1 meaning its model fails to load
+        """
+        criteria = input_data.get("requested_criteria")
+        names = list(self.criteria_selections) if criteria is None else [criteria]
+        if self.model is None:
+            return {name: -1 for name in names}
+
+        previous_predictions = input_data.get("previous_predictions", {})
+        selections = {
+            name: self.criteria_selections[name].select_sentences(input_data) for name in names if name in self.heads
+        }
+        # the sentences without a previous prediction for any of the criteria are predicted once by all heads
+        new_sentences = [
+            sentence
+            for name, selection in selections.items()
+            if selection is not None
+            for sentence in selection[0]
+            if sentence not in previous_predictions.get(name, {})
+        ]
+        outputs = dict(zip(new_sentences, self.selector.predict_sentences(self.model, new_sentences)))
+
+        results = {}
+        for name in names:
+            if name not in selections:
+                results[name] = -1
+                continue
+            if selections[name] is None:
+                results.update(self.criteria_selections[name].assess_predictions(None, []))
+                continue
+            column = self.heads.index(name)
+            predictions = {
+                **previous_predictions.get(name, {}),
+                **{sentence: output[column] for sentence, output in outputs.items()},
+            }
+            assessments = [[predictions[sentence]] for sentence in selections[name][0]]
+            results.update(self.criteria_selections[name].assess_predictions(selections[name], assessments))
+        return results
@@ -12,12 +12,120 @@ SENTENCE_NONE_BOUNDARY_KEYWORDS = []
 # https://blog.apastyle.org/files/apa-latin-abbreviations-table-2.pdf
 NONE_BOUNDARY_ABBREVIATIONS = ["cf", "i.e", "viz", "vs", "e.g", "al", "ibid"]
 
+# The sentence segmenter of the Spacy pipeline:
+# "senter" - the statistical sentence segmenter of the Spacy model
+# "sentencizer" - the rule-based Spacy sentencizer, with NONE_BOUNDARY_ABBREVIATIONS and the custom boundary keywords.
+#                 It is faster but less accurate, e.g. for bulk re-assessment jobs
+SENTENCE_SEGMENTER = "senter"
+
 # Characters that need to be removed.
 REMOVE_CHARACTERS = "[\n\t\r*#]"
 
 # The minimum number of tokens to be valid for BERT input
 NUM_TOKENS_LOWER_LIMIT = 3
 
+# The maximum number of tokens of the BERT input, with the [CLS] and [SEP] tokens every sentence also has
+MAX_INPUT_SEQUENCES = 250
+NUM_SPECIAL_TOKENS = 2
+
+# HTML parser used to split a privacy policy into segments and paragraphs: "html.parser" (BeautifulSoup) or "lxml".
+# Both produce the same segments on well-formed pages, "lxml" is several times faster on large pages.
+HTML_PARSER_BACKEND = "html.parser"
+
+# A policy with too few headings is split into paragraphs at its block-level tags and blank lines, and a long block
+# is split into windows of HEADINGLESS_WINDOW_SENTENCES sentences, consecutive windows sharing HEADINGLESS_WINDOW_OVERLAP sentences.
+HEADINGLESS_WINDOW_SENTENCES = 5
+HEADINGLESS_WINDOW_OVERLAP = 1
+
+# Remove the non-content elements (scripts, styles, navigation menus, footers, cookie banners, ...) and the paragraphs
+# repeated across segments before calculating the paragraphs statistics
+REMOVE_BOILERPLATE = True
+
+# A paragraph is a near duplicate of a paragraph of an earlier segment, and removed with the boilerplate, when the
+# Jaccard similarity of their sets of lowercase words is at least this, e.g. a footer repeated with another date.
+# 1 only removes the paragraphs with exactly the same words.
+DUPLICATE_PARAGRAPH_SIMILARITY = 0.8
+
+# Number of paragraphs that Spacy processes together when calculating the paragraphs statistics
+SPACY_BATCH_SIZE = 64
+
+# Number of processes Spacy uses to calculate the paragraphs statistics.
+# -1 uses every CPU core available, 1 keeps the processing in the main process.
+SPACY_N_PROCESS = -1
+
+# Number of paragraph statistics kept in memory, so that paragraphs shared by many policies are only processed once.
+# 0 disables the in-memory cache.
+STATISTICS_CACHE_SIZE = 10000
+
+# Path of the SQLite database which keeps the paragraph statistics across restarts, e.g. "paragraph_statistics.sqlite3".
+# None only keeps them in memory.
+STATISTICS_CACHE_PATH = None
+
+# Calculate the paragraphs statistics in two phases: the keyword occurences of every paragraph with the tokenizer,
+# the rule-based sentence boundaries and the lemma table, then the sentences of the paragraphs selected by the criteria
+# only. The topic sentences and lemmas of the first phase are not those of the Spacy model, so the paragraph rankings,
+# and therefore the assessments, can change. False (the default) splits the sentences of every paragraph with the
+# Spacy model, and counts the keywords with its lemmas.
+LAZY_SENTENCES = False
+
+# Skip the sections whose heading and paragraphs have no keyword of any criteria being run. With `LAZY_SENTENCES`, they
+# are skipped before any sentence is split, otherwise they are only left out of the statistics sent to the criteria.
+# The sections are only skipped if at least one section has a keyword.
+PRUNE_SECTIONS = True
+
+# Path of the TF-IDF index fitted on a corpus of policies, see `preprocessors/tfidf_index.py`, e.g. "tfidf_index.npz".
+# The paragraphs are then scored by the TF-IDF weights of the keywords of each criteria instead of their raw counts,
+# which favours the paragraphs about the keywords over the ones mentioning common keywords in passing.
+# None scores the paragraphs by their keyword counts.
+TFIDF_INDEX_PATH = None
+
+# The minimum number of paragraphs of the corpus a word is found in to be a term of the TF-IDF index
+TFIDF_MIN_DF = 2
+
+# How the criteria select paragraphs when none of the paragraphs contains any of their keywords:
+# "sentence_budget" - the first paragraphs, up to ZERO_RELEVANCE_SENTENCE_BUDGET valid sentences
+# "first" - the first ZERO_RELEVANCE_NUM_PARAGRAPHS paragraphs
+# "any_keyword" - the ZERO_RELEVANCE_NUM_PARAGRAPHS paragraphs with the most keywords of any criteria
+# "all" - every paragraph, which sends the whole policy to BERT
+ZERO_RELEVANCE_FALLBACK = "sentence_budget"
+ZERO_RELEVANCE_NUM_PARAGRAPHS = 5
+ZERO_RELEVANCE_SENTENCE_BUDGET = 30
+
+# Which sentences of the selected paragraphs the criteria send to BERT:
+# "paragraphs" - every sentence with enough tokens
+# "sentences" - at most MAX_SENTENCES sentences, with the most keywords in them and in the SENTENCE_WINDOW sentences
+#               before and after them. The paragraphs selected by the zero relevance fallback send every sentence.
+SENTENCE_SELECTION = "paragraphs"
+SENTENCE_WINDOW = 1
+MAX_SENTENCES = 20
+
+# Number of sentences each criteria model predicts at once. 1 (the default) predicts the sentences one at a time, and
+# gives the exact same labels as before. Larger batches are faster, but the rounding of the float operations depends
+# on the batch, so the raw labels can differ slightly: opt in after checking them with `benchmarks/bert_inference.py`.
+INFERENCE_BATCH_SIZE = 1
+
+# Number of sentences converted into BERT features in parallel, -1 lets TensorFlow tune it
+INFERENCE_NUM_PARALLEL_CALLS = -1
+
+# Number of batches converted into BERT features while the model predicts, -1 lets TensorFlow tune it, 0 disables it
+INFERENCE_PREFETCH_BUFFER_SIZE = -1
+
+# The numbers of tokens the sentences are padded to before BERT, e.g. [32, 64, 128, 250]. The sentences are grouped by
+# their number of tokens, and each group is only padded to its bucket instead of the 250 tokens of the longest
+# sentences, which saves most of the attention computation. The padding is masked, so the raw labels only change by
+# the rounding of the float operations. None pads every sentence to 250 tokens.
+INFERENCE_LENGTH_BUCKETS = None
+
+# Whether the BERT features of the sentences are built at once as NumPy arrays, see `models/bert/features.py`, instead of
+# one sentence at a time in the tf.data pipeline. Both give the same features.
+VECTORIZED_FEATURES = True
+
+# The path of a multi-head model trained by `models/bert/train.py` with MULTI_HEAD, relative to this package,
+# e.g. "models/bert/saved_models/multi_head". Its encoder is shared by all criteria, so a single process runs each
+# sentence through BERT once for all criteria, instead of one process and one BERT model per criteria.
+# None runs the model of each criteria in its own process.
+MULTI_HEAD_MODEL_PATH = None
+
 # Size of the multiprocessing.Queues for the pipeline.py class to send new data to the criteria Processes.
 # This parameter is not expected to change
 INPUT_QUEUE_SIZE = 1
@@ -29,6 +137,10 @@ NUM_CRITERIA = 6
 # CRITERIA-SPECIFIC CONSTANTS
 # ---------------------------
 
+# The <criteria>_BUDGET of each criteria bounds the evidence sent to BERT. The relevant paragraphs are selected
+# by relevance, instead of the top paragraphs, until the budget is filled, e.g. {"unit": "sentences", "size": 40}
+# or {"unit": "tokens", "size": 4000} for WordPiece tokens. None selects the top paragraphs of the criteria.
+
 # C9 - The app collects personal identifiable information (PII).
 C9_KEYWORDS = [
     "email",
@@ -60,6 +172,7 @@ C9_KEYWORDS = [
     "facebook sso",
     "facebook single sign on",
 ]
+C9_BUDGET = None
 
 # C10 - The app ensures the right of access to collected information.
 C10_KEYWORDS = [
@@ -69,6 +182,7 @@ C10_KEYWORDS = [
     "request",
     "contact",
     ]
+C10_BUDGET = None
 
 # C11 - The app gives information about any kind of agreements with third parties.
 C11_KEYWORDS = [
@@ -80,6 +194,7 @@ C11_KEYWORDS = [
     "vendor",
     # TODO: add more keywords
 ]
+C11_BUDGET = None
 
 # C12 - The app requires users to always give their explicit consent before any action is taken.
 C12_KEYWORDS = [
@@ -91,6 +206,7 @@ C12_KEYWORDS = [
     "control",
     "choice",
 ]
+C12_BUDGET = None
 
 # C24 - The app gives users control over their data.
 C24_KEYWORDS = [
@@ -108,6 +224,7 @@ C24_KEYWORDS = [
     "opt out",
     "opt-out",
 ]
+C24_BUDGET = None
 
 # C49 - The app applies appropriate measures to protect minor users in accordance with applicable legislations.
 C49_KEYWORDS = [
@@ -118,4 +235,5 @@ C49_KEYWORDS = [
     "thirteen",
     "children",
     "age",
-]
\ No newline at end of file
+]
+C49_BUDGET = None
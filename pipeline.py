@@ -1,17 +1,30 @@
 import multiprocessing
 import time
+import numpy as np
 from itertools import chain
 from multiprocessing import Queue
 from multiprocessing import Event
-from .criteria.C9pipeline import C9pipeline
-from .criteria.C10pipeline import C10pipeline
-from .criteria.C11pipeline import C11pipeline
-from .criteria.C12pipeline import C12pipeline
-from .criteria.C24pipeline import C24pipeline
-from .criteria.C49pipeline import C49pipeline
+from .criteria.C9pipeline import C9pipeline, C9selection
+from .criteria.C10pipeline import C10pipeline, C10selection
+from .criteria.C11pipeline import C11pipeline, C11selection
+from .criteria.C12pipeline import C12pipeline, C12selection
+from .criteria.C24pipeline import C24pipeline, C24selection
+from .criteria.C49pipeline import C49pipeline, C49selection
+from .criteria.MultiHeadpipeline import MultiHeadpipeline
 from .report_generator.report_generator import generate_report
 from .preprocessors.paragraphs_extractor import ParagraphsExtractor
-from .parameters import INPUT_QUEUE_SIZE, NUM_CRITERIA
+from .preprocessors.keyword_matcher import KeywordMatcher
+from .preprocessors.paragraphs_selector import TFIDF_KEYWORD_OCCURENCE_STATISTIC
+from .preprocessors.tfidf_index import TfidfIndex
+from .preprocessors.assessment_artifact import AssessmentArtifact
+from .parameters import (
+    INPUT_QUEUE_SIZE,
+    NUM_CRITERIA,
+    LAZY_SENTENCES,
+    PRUNE_SECTIONS,
+    TFIDF_INDEX_PATH,
+    MULTI_HEAD_MODEL_PATH,
+)
 
 class Pipeline:
     def __init__(self):
@@ -20,33 +33,187 @@ class Pipeline:
         self.assessment_begin_event = Event()
         self.instantiate_criteria_pipelines()
         self.criteria_pipelines = {
-            "c9": { "pipeline": self.c9pipeline, "input_queue": self.c9input_queue },
-            "c10": { "pipeline": self.c10pipeline, "input_queue": self.c10input_queue },
-            "c11": { "pipeline": self.c11pipeline, "input_queue": self.c11input_queue },
-            "c12": { "pipeline": self.c12pipeline, "input_queue": self.c12input_queue },
-            "c24": { "pipeline": self.c24pipeline, "input_queue": self.c24input_queue },
-            "c49": { "pipeline": self.c49pipeline, "input_queue": self.c49input_queue },
+            "c9": { "pipeline": self.c9pipeline, "input_queue": self.c9input_queue, "selection": C9selection },
+            "c10": { "pipeline": self.c10pipeline, "input_queue": self.c10input_queue, "selection": C10selection },
+            "c11": { "pipeline": self.c11pipeline, "input_queue": self.c11input_queue, "selection": C11selection },
+            "c12": { "pipeline": self.c12pipeline, "input_queue": self.c12input_queue, "selection": C12selection },
+            "c24": { "pipeline": self.c24pipeline, "input_queue": self.c24input_queue, "selection": C24selection },
+            "c49": { "pipeline": self.c49pipeline, "input_queue": self.c49input_queue, "selection": C49selection },
             # TODO: add more criteria pipelines
         }
+        self.instantiate_multi_head_pipeline()
 
         print("Number of processors: " + str(multiprocessing.cpu_count()))
 
-        for pipeline_process in self.get_pipelines():
+        for pipeline_process in self.get_processes():
             pipeline_process.start()
 
         self.extractor = ParagraphsExtractor()
-        self.keywords = list(
+        # the keywords of all criteria are only gathered once, instead of once per paragraph
+        self.keywords = set(
             chain.from_iterable(
                 pipeline.get_keywords() for pipeline in self.get_pipelines()
             )
         )
+        # a single matcher finds the keywords of all criteria in one scan of each paragraph
+        self.keyword_matcher = KeywordMatcher(self.keywords)
+        self.tfidf_index = self.load_tfidf_index()
+
+    def load_tfidf_index(self):
+        """Load the TF-IDF index which scores the paragraphs, see `TFIDF_INDEX_PATH`
+
+        Returns:
+            (TfidfIndex): the index, or None if the paragraphs are scored by their keyword counts
+        """
+        if TFIDF_INDEX_PATH is None:
+            return None
+        try:
+            tfidf_index = TfidfIndex.load(TFIDF_INDEX_PATH)
+        except Exception as e:
+            print("Exception when loading the TF-IDF index, the keyword counts are used instead: {}".format(e))
+            return None
+
+        missing_keywords = tfidf_index.get_missing_keywords(self.keyword_matcher)
+        if len(missing_keywords) > 0:
+            print(f"Keywords missing from the TF-IDF index, which must be fitted again to find them: {missing_keywords}")
+        return tfidf_index
 
     def get_pipelines(self):
         return [value.get("pipeline") for value in self.criteria_pipelines.values()]
 
+    def get_processes(self):
+        """Get the processes which assess the policies, i.e. the multi-head pipeline if any, or else every criteria pipeline
+
+        Returns:
+            (list(Process)): the processes to start
+        """
+        if self.multi_head_pipeline is not None:
+            return [self.multi_head_pipeline]
+        return self.get_pipelines()
+
     def get_input_queues(self):
         return [value.get("input_queue") for value in self.criteria_pipelines.values()]
 
+    def get_requested_pipelines(self, criteria):
+        return self.get_pipelines() if criteria is None else [self.criteria_pipelines[criteria]["pipeline"]]
+
+    def get_policy_statistics(self, sections, criteria, artifact=None):
+        """Get the statistics of the paragraphs of a policy that are used by the criteria being run
+
+        Args:
+            sections (list(dict)): the sections of the policy, each with its heading and paragraphs
+            criteria (str): criteria name, or None if all criteria are run
+            artifact (AssessmentArtifact): the previous assessment of the policy, whose unchanged paragraphs are reused
+                with `LAZY_SENTENCES`, and which keeps the statistics for the next assessment. None to process every paragraph.
+
+        Returns:
+            (tuple(list(dict), dict, dict)): the paragraph statistics without the keyword occurences, the keyword
+                occurence matrices, and the number of paragraphs of the policy, pruned and split into sentences
+        """
+        paragraphs = list(chain.from_iterable(section["paragraphs"] for section in sections))
+        section_ids = [i for i, section in enumerate(sections) for _ in section["paragraphs"]]
+        headings = [section["heading"] for section in sections for _ in section["paragraphs"]]
+        counts = {"paragraphs": len(paragraphs), "pruned": 0, "split": len(paragraphs)}
+
+        if LAZY_SENTENCES and artifact is not None:
+            # only the paragraphs which changed since the previous assessment are processed again
+            paragraphs_statistics = artifact.get_statistics(
+                paragraphs,
+                lambda changed: self.extractor.get_paragraphs_keyword_statistics(changed, self.keyword_matcher),
+            )
+        elif LAZY_SENTENCES:
+            paragraphs_statistics = self.extractor.get_paragraphs_keyword_statistics(paragraphs, self.keyword_matcher)
+        else:
+            paragraphs_statistics = self.extractor.get_paragraphs_statistics(paragraphs, self.keyword_matcher)
+        self.extractor.add_headings(paragraphs_statistics, section_ids, headings, self.keyword_matcher)
+        keyword_statistics = paragraphs_statistics
+        # the keyword occurences are sent as paragraphs x keywords matrices, so each criteria scores all paragraphs at once
+        paragraphs_statistics, keyword_occurence = self.extractor.vectorize_keyword_occurence(
+            paragraphs_statistics, self.keyword_matcher.keywords, self.keyword_matcher.aliases
+        )
+
+        if PRUNE_SECTIONS:
+            paragraphs_statistics, keyword_occurence = self.prune_sections(
+                paragraphs_statistics, keyword_occurence, criteria
+            )
+            counts["pruned"] = len(paragraphs) - len(paragraphs_statistics)
+            if LAZY_SENTENCES:
+                counts["split"] = len(paragraphs_statistics)
+
+        if self.tfidf_index is not None:
+            # the weights of the paragraphs left come from their keyword counts, so they have the same keywords
+            keyword_occurence[TFIDF_KEYWORD_OCCURENCE_STATISTIC] = self.tfidf_index.get_keyword_tfidf(
+                keyword_occurence["topic_keyword_occurence"] + keyword_occurence["non_topic_keyword_occurence"],
+                [stat["content"] for stat in paragraphs_statistics],
+                self.keyword_matcher,
+            )
+
+        if LAZY_SENTENCES:
+            # only the paragraphs selected by the criteria being run need their sentences
+            counts["split"] = self.add_selected_sentences(paragraphs_statistics, keyword_occurence, criteria)
+            if artifact is not None:
+                artifact.set_statistics(keyword_statistics, paragraphs_statistics)
+        return paragraphs_statistics, keyword_occurence, counts
+
+    def prune_sections(self, paragraphs_statistics, keyword_occurence, criteria):
+        """Remove the sections whose heading and paragraphs have no keyword of any criteria being run, see `PRUNE_SECTIONS`
+
+        If no section has any keyword, every section is kept for the zero relevance fallback of the criteria.
+
+        Args:
+            paragraphs_statistics (list(dict)): the statistics of every paragraph, with their section
+            keyword_occurence (dict): the keywords and the topic / non-topic / heading keyword occurence matrices
+            criteria (str): criteria name, or None if all criteria are run
+
+        Returns:
+            (tuple(list(dict), dict)): the statistics and the keyword occurence of the paragraphs of the sections kept
+        """
+        section_ids = [stat["section"] for stat in paragraphs_statistics]
+        relevant = np.zeros(len(paragraphs_statistics), dtype=bool)
+        for pipeline in self.get_requested_pipelines(criteria):
+            relevant |= self.extractor.get_relevant_sections_mask(
+                section_ids,
+                pipeline.get_relevant_scores(keyword_occurence),
+                self.extractor.get_heading_scores(keyword_occurence, pipeline.get_keywords()),
+            )
+        if not np.any(relevant):
+            return paragraphs_statistics, keyword_occurence
+
+        indices = np.flatnonzero(relevant)
+        return (
+            [paragraphs_statistics[i] for i in indices],
+            self.extractor.select_keyword_occurence(keyword_occurence, indices),
+        )
+
+    def add_selected_sentences(self, paragraphs_statistics, keyword_occurence, criteria):
+        """Split the sentences of the paragraphs selected by the criteria being run, see `LAZY_SENTENCES`
+
+        Args:
+            paragraphs_statistics (list(dict)): the keyword statistics of every paragraph, without the keyword occurences
+            keyword_occurence (dict): the keywords and the topic / non-topic keyword occurence matrices of all paragraphs
+            criteria (str): criteria name, or None if all criteria are run
+
+        Returns:
+            (int): the number of paragraphs whose sentences were split
+        """
+        selected_indices = set()
+        budgets = []
+        for pipeline in self.get_requested_pipelines(criteria):
+            indices, budget = pipeline.get_selected_indices(keyword_occurence)
+            if budget is None:
+                selected_indices.update(indices)
+            else:
+                budgets.append((indices, budget))
+
+        num_split = self.extractor.add_paragraphs_sentences(
+            paragraphs_statistics, sorted(selected_indices), self.keyword_matcher
+        )
+        for order, budget in budgets:
+            num_split += self.extractor.add_budget_paragraphs_sentences(
+                paragraphs_statistics, order, budget, self.keyword_matcher
+            )
+        return num_split
+
     def instantiate_criteria_queues(self):
         self.c9input_queue  = Queue(INPUT_QUEUE_SIZE)
         self.c10input_queue = Queue(INPUT_QUEUE_SIZE)
@@ -65,32 +232,75 @@ class Pipeline:
         self.c49pipeline = C49pipeline(self.c49input_queue, self.assessment_begin_event, self.assessment_queue)
         # TODO: add more pipelines
 
-    def run_assessment(self, input_data, criteria):
+    def instantiate_multi_head_pipeline(self):
+        """Create the process of the multi-head model, see `MULTI_HEAD_MODEL_PATH`. The criteria pipelines then only select
+        the paragraphs in this process, and are never started: the multi-head process selects the sentences with the
+        selection class of every criteria.
+        """
+        self.multi_head_pipeline = None
+        if MULTI_HEAD_MODEL_PATH is None:
+            return
+        self.multi_head_input_queue = Queue(INPUT_QUEUE_SIZE)
+        self.multi_head_pipeline = MultiHeadpipeline(
+            self.multi_head_input_queue,
+            self.assessment_begin_event,
+            self.assessment_queue,
+            {name: value["selection"] for name, value in self.criteria_pipelines.items()},
+        )
+
+    def run_assessment(self, input_data, criteria, previous_assessment=None):
         """Start the assessment pipeline & trigger individual pipeline for each criteria. A report is generated at the end to summarise the results
 
         Args:
             input_data (dict): Info about the app, including policy and metadata
             criteria (str): criteria name (e.g c9, c10, c24). If criteria is None, pipelines of all criteria will be triggered to run.
+            previous_assessment (dict): the artifact of the previous assessment of the same policy, see `run_incremental_assessment`
 
         Returns:
             (dict): Summary of the results
         """
+        report, _ = self.run_incremental_assessment(input_data, criteria, previous_assessment)
+        return report
+
+    def run_incremental_assessment(self, input_data, criteria, previous_assessment=None):
+        """Run the assessment pipeline, only processing what changed since the previous assessment of the same policy
+
+        The report is the same as the report of a full assessment. If no paragraph changed, the previous report is returned
+        without running the criteria. Otherwise, only the changed paragraphs are processed again, and only the sentences
+        which were not assessed before are sent to BERT, see `AssessmentArtifact`.
+
+        Args:
+            input_data (dict): Info about the app, including policy and metadata
+            criteria (str): criteria name (e.g c9, c10, c24). If criteria is None, pipelines of all criteria will be triggered to run.
+            previous_assessment (dict): the artifact of the previous assessment of the policy, or None for a full assessment
+
+        Returns:
+            (tuple(dict, dict)): Summary of the results, and the artifact of this assessment for the next one, None if it failed
+        """
         # Check that the criteria is correct, if specified, first to skip preprocessing if there is an issue
         if criteria and not criteria in self.criteria_pipelines:
-            return { "message": "Criteria does not exist :(" }
+            return { "message": "Criteria does not exist :(" }, None
 
         start_assessment_time = time.time()
         privacy_policy_html = input_data.get("privacyPolicyText", "")
-        paragraphs = self.extractor.get_paragraphs(privacy_policy_html)
+        cleaning_stats = {}
+        sections = self.extractor.get_sections(privacy_policy_html, cleaning_stats)
+
+        artifact = AssessmentArtifact(previous_assessment)
+        if artifact.is_unchanged(sections, criteria):
+            print(f"Unchanged policy, the previous assessment is reused: {time.time() - start_assessment_time}s")
+            return artifact.get_report(), previous_assessment
 
         ###################################################################
         stats_start = time.time()
         # get the paragraphs statistics that are used by all criteria
-        paragraphs_statistics = [
-            self.extractor.get_paragraph_statistics(paragraph, set(self.keywords))
-            for paragraph in paragraphs
-        ]
-        data = {"statistics": paragraphs_statistics, **input_data}
+        paragraphs_statistics, keyword_occurence, paragraph_counts = self.get_policy_statistics(sections, criteria, artifact)
+        data = {
+            "statistics": paragraphs_statistics,
+            "keyword_occurence": keyword_occurence,
+            "previous_predictions": artifact.get_predictions(),
+            **input_data,
+        }
         stats_end = time.time()
         ###################################################################
 
@@ -98,7 +308,16 @@ class Pipeline:
         try:
             ###################################################################
             pipeline_specific_start = time.time()
-            if criteria is None:
+            if self.multi_head_pipeline is not None:
+                # the shared encoder assesses all requested criteria at once
+                self.multi_head_input_queue.put({**data, "requested_criteria": criteria}, block=False)
+
+                self.assessment_begin_event.set()
+
+                assessment_results = self.assessment_queue.get(block=True)
+                self.assessment_begin_event.clear()
+
+            elif criteria is None:
                 for input_queue in self.get_input_queues():
                     input_queue.put(data, block=False)
 
@@ -122,13 +341,19 @@ class Pipeline:
             pipeline_specific_end = time.time()
             ###################################################################
             print(f"\nCalculate paragraphs statistics (topic/keywords): {stats_end - stats_start}s")
+            print(f"Paragraphs pruned / split into sentences: {paragraph_counts}")
+            print(f"Paragraphs reused from the previous assessment: {artifact.get_counters()}")
+            print(f"Boilerplate removed before the statistics: {cleaning_stats}")
+            if self.extractor.statistics_cache is not None:
+                print(f"Paragraphs statistics cache: {self.extractor.statistics_cache.get_counters()}")
             print(f"Assessment processes (sending input to the processes and waiting for responses): {pipeline_specific_end - pipeline_specific_start}s.")
             print(f"Entire pipeline: {time.time() - start_assessment_time}s")
-            return generate_report(assessment_results)
+            report = generate_report(assessment_results)
+            return report, artifact.to_dict(sections, criteria, assessment_results, report)
 
         except Exception as e:
             return {
                 "message": "Something went wrong :( {}. Please try again later.".format(
                     e
                 )
-            }
\ No newline at end of file
+            }, None
\ No newline at end of file
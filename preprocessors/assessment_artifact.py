@@ -0,0 +1,241 @@
+import os
+import copy
+import json
+import hashlib
+from glob import glob
+from .statistics_cache import STATISTICS_VERSION
+from .paragraphs_selector import SENTENCE_STATISTICS
+from .utils.spacy_utils import get_cache_key
+from .. import parameters
+from ..parameters import SENTENCE_SEGMENTER, MULTI_HEAD_MODEL_PATH
+
+# Bump whenever the content of the artifacts changes, so that outdated artifacts are never reused
+ARTIFACT_VERSION = 2
+# the statistics kept for every paragraph, its section and heading being added again from the new policy
+ARTIFACT_STATISTICS = [
+    "topic_sentence",
+    "topic_keyword_occurence",
+    "non_topic_keyword_occurence",
+] + SENTENCE_STATISTICS
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the folder of the models of the criteria pipelines, e.g. "models/bert/saved_models/c9"
+CRITERIA_MODELS_PATH = os.path.join(PACKAGE_PATH, "models", "bert", "saved_models")
+# the graph of a saved model, written again whenever the model is saved
+SAVED_MODEL_FILE = "saved_model.pb"
+
+
+def get_model_version(model_path):
+    """Get the version of a saved model, i.e. the modification time of its graph
+
+    Args:
+        model_path (str): the path of the saved model
+
+    Returns:
+        (float): the version of the model, or None if there is no model
+    """
+    try:
+        return os.path.getmtime(os.path.join(model_path, SAVED_MODEL_FILE))
+    except OSError:
+        return None
+
+
+def get_models_key():
+    """Get the path and version of every model which predicts the sentences, i.e. the multi-head model if
+    `MULTI_HEAD_MODEL_PATH` is set, or else the model of every criteria
+
+    Returns:
+        (dict(str, float)): the version of every model, by path relative to the package
+    """
+    if MULTI_HEAD_MODEL_PATH is not None:
+        model_paths = [os.path.join(PACKAGE_PATH, MULTI_HEAD_MODEL_PATH)]
+    else:
+        model_paths = sorted(glob(os.path.join(CRITERIA_MODELS_PATH, "c*")))
+    return {os.path.relpath(path, PACKAGE_PATH): get_model_version(path) for path in model_paths}
+
+
+def get_config_key():
+    """Get the hash of the configuration the assessment depends on, i.e. every parameter, the Spacy pipeline and the
+    models which predict the sentences
+
+    Returns:
+        (str): the configuration hash
+    """
+    config = {
+        "version": ARTIFACT_VERSION,
+        "statistics_version": STATISTICS_VERSION,
+        "spacy": get_cache_key(SENTENCE_SEGMENTER),
+        "models": get_models_key(),
+        "parameters": {name: getattr(parameters, name) for name in dir(parameters) if name.isupper()},
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AssessmentArtifact:
+    """
+    What an assessment of a policy needs to assess the next version of the same policy incrementally.
+
+    Most re-crawled policies are unchanged, and most edits only touch a few sections, so the artifact keeps:
+
+    - The heading and the hash of every paragraph of every section of the policy, in order, to return the previous
+      report if no section changed, the headings and the sections affecting the pruning and the relevance
+    - The statistics of every paragraph (with the sentences of the paragraphs split), by hash, so that only the
+      changed paragraphs are processed again
+    - The prediction of every sentence assessed by each criteria, so that only the new sentences go through BERT
+
+    An artifact is only reused with the same configuration, see `get_config_key`, which includes the path and version
+    of the models, so the previous predictions are never reused once a model is saved again or another model is used.
+    The artifact is a dictionary of JSON types, so it can be stored with the assessment results.
+    """
+
+    def __init__(self, previous_assessment=None):
+        """
+        Args:
+            previous_assessment (dict): the artifact of the previous assessment of the policy, see `to_dict`, or None
+        """
+        self.config_key = get_config_key()
+        self.previous = {}
+        if (
+            isinstance(previous_assessment, dict)
+            and previous_assessment.get("version") == ARTIFACT_VERSION
+            and previous_assessment.get("config") == self.config_key
+        ):
+            self.previous = previous_assessment
+        self.statistics = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Reset the number of paragraphs reused from the previous assessment and processed again"""
+        self.reused_paragraphs = 0
+        self.changed_paragraphs = 0
+
+    def get_counters(self):
+        """Get the number of paragraphs reused from the previous assessment and processed again
+
+        Returns:
+            (dict): the number of reused and changed paragraphs
+        """
+        return {"reused_paragraphs": self.reused_paragraphs, "changed_paragraphs": self.changed_paragraphs}
+
+    def get_paragraph_key(self, paragraph):
+        """Get the hash of a paragraph
+
+        Args:
+            paragraph (str): the sanitised paragraph content
+
+        Returns:
+            (str): the paragraph hash
+        """
+        return hashlib.sha1(paragraph.encode("utf-8")).hexdigest()
+
+    def get_sections_key(self, sections):
+        """Get the heading and the paragraph hashes of every section
+
+        Args:
+            sections (list(dict)): the sections of the policy, each with its heading and paragraphs
+
+        Returns:
+            (list(list)): the heading and the list of paragraph hashes of every section, as JSON types
+        """
+        return [
+            [section["heading"], [self.get_paragraph_key(paragraph) for paragraph in section["paragraphs"]]]
+            for section in sections
+        ]
+
+    def is_unchanged(self, sections, criteria):
+        """Check whether the previous assessment assessed the same sections against the same criteria
+
+        Args:
+            sections (list(dict)): the sections of the policy, each with its heading and paragraphs
+            criteria (str): criteria name, or None if all criteria are run
+
+        Returns:
+            (bool): True if the previous report is the report of the policy
+        """
+        return (
+            "report" in self.previous
+            and self.previous.get("criteria") == criteria
+            and self.previous.get("sections") == self.get_sections_key(sections)
+        )
+
+    def get_report(self):
+        """Get the report of the previous assessment
+
+        Returns:
+            (dict): the previous report
+        """
+        return copy.deepcopy(self.previous.get("report"))
+
+    def get_statistics(self, paragraphs, compute_statistics):
+        """Get the statistics of paragraphs, only computing those of the paragraphs which are not in the previous assessment
+
+        Args:
+            paragraphs (list(str)): the paragraphs of the policy
+            compute_statistics (callable): get the statistics of a list of paragraphs,
+                e.g. `ParagraphsExtractor.get_paragraphs_keyword_statistics`
+
+        Returns:
+            (list(dict)): the statistics of every paragraph, the reused ones with their sentences if they were split
+        """
+        previous_statistics = self.previous.get("statistics", {})
+        statistics = []
+        changed = []
+        for i, paragraph in enumerate(paragraphs):
+            stat = previous_statistics.get(self.get_paragraph_key(paragraph))
+            if stat is None:
+                changed.append(i)
+            statistics.append(None if stat is None else {"content": paragraph, **copy.deepcopy(stat)})
+
+        for i, stat in zip(changed, compute_statistics([paragraphs[i] for i in changed])):
+            statistics[i] = stat
+        self.reused_paragraphs += len(paragraphs) - len(changed)
+        self.changed_paragraphs += len(changed)
+        return statistics
+
+    def set_statistics(self, keyword_statistics, paragraphs_statistics):
+        """Keep the statistics of the paragraphs for the next assessment
+
+        Args:
+            keyword_statistics (list(dict)): the keyword statistics of every paragraph, before they are vectorized
+            paragraphs_statistics (list(dict)): the statistics sent to the criteria, with the sentences of the split paragraphs
+        """
+        sentences = {stat["content"]: stat for stat in paragraphs_statistics if "sentences" in stat}
+        self.statistics = {}
+        for stat in keyword_statistics:
+            stat = {**stat, **sentences.get(stat["content"], {})}
+            self.statistics[self.get_paragraph_key(stat["content"])] = {
+                key: stat[key] for key in ARTIFACT_STATISTICS if key in stat
+            }
+
+    def get_predictions(self):
+        """Get the predictions of the previous assessment
+
+        Returns:
+            (dict(str, dict(str, float))): the raw label of every sentence assessed by each criteria, by criteria name
+        """
+        return self.previous.get("predictions", {})
+
+    def to_dict(self, sections, criteria, assessment_results, report):
+        """Get the artifact of the current assessment, for the next assessment of the policy
+
+        Args:
+            sections (list(dict)): the sections of the policy, each with its heading and paragraphs
+            criteria (str): criteria name, or None if all criteria are run
+            assessment_results (dict): the results of every criteria, by criteria name
+            report (dict): the report of the assessment
+
+        Returns:
+            (dict): the artifact
+        """
+        return {
+            "version": ARTIFACT_VERSION,
+            "config": self.config_key,
+            "criteria": criteria,
+            "sections": self.get_sections_key(sections),
+            "statistics": self.statistics,
+            "predictions": {
+                name: {sentence["text"]: float(sentence["raw_label"]) for sentence in result["sentences"]}
+                for name, result in assessment_results.items()
+                if result != -1
+            },
+            "report": copy.deepcopy(report),
+        }
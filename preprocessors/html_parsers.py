@@ -0,0 +1,231 @@
+from bs4 import BeautifulSoup
+from bs4.element import (
+    CData,
+    NavigableString,
+    RubyParenthesisString,
+    RubyTextString,
+    Script,
+    Stylesheet,
+    TemplateString,
+)
+
+HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+# Tags which break the text flow, i.e. the text before and after them does not belong to the same paragraph
+BLOCK_TAGS = set(HEADING_TAGS + [
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "details", "dialog", "div", "dl",
+    "dt", "fieldset", "figcaption", "figure", "footer", "form", "header", "hr", "html", "li", "main", "nav", "ol",
+    "p", "pre", "section", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+])
+# Tags whose strings are only part of their own text, never part of the text of their parents
+# (the same string containers as BeautifulSoup's html.parser tree builder)
+STRING_CONTAINER_TAGS = ["script", "style", "template", "rt", "rp"]
+
+# Events of the document-order walk over the nodes of a document
+NODE_START = "start"  # (NODE_START, element): an element starts, its content follows
+NODE_END = "end"  # (NODE_END, element): an element ends, after all of its content
+NODE_TEXT = "text"  # (NODE_TEXT, text, string_container): a text node, with the tag name of its string container or None
+
+# The BeautifulSoup string types which are text, with the tag name of their string container.
+# Any other string type (comment, doctype, ...) has no text.
+BS4_STRING_CONTAINERS = {
+    NavigableString: None,
+    CData: None,
+    Script: "script",
+    Stylesheet: "style",
+    TemplateString: "template",
+    RubyTextString: "rt",
+    RubyParenthesisString: "rp",
+}
+
+
+class BeautifulSoupParser:
+    """
+    HTML parser backend based on BeautifulSoup and Python's built-in `html.parser`.
+    """
+
+    def parse(self, html):
+        """Parse an HTML document
+
+        Args:
+            html (str): the raw html text
+
+        Returns:
+            (BeautifulSoup): the parsed document
+        """
+        return BeautifulSoup(html, features="html.parser")
+
+    def iter_nodes(self, document):
+        """Walk over every node of a document once, in document order
+
+        Args:
+            document (BeautifulSoup): the parsed document
+
+        Returns:
+            (iter(tuple)): the NODE_START, NODE_END and NODE_TEXT events of the walk
+        """
+        # depth-first walk without recursion, as policy pages can be deeply nested
+        stack = [(document, iter(document.contents))]
+        while len(stack) > 0:
+            element, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if element is not document:
+                    yield NODE_END, element
+            elif isinstance(child, NavigableString):
+                if type(child) in BS4_STRING_CONTAINERS:
+                    yield NODE_TEXT, str(child), BS4_STRING_CONTAINERS[type(child)]
+                else:
+                    yield NODE_TEXT, "", None
+            else:
+                yield NODE_START, child
+                stack.append((child, iter(child.contents)))
+
+    def get_name(self, element):
+        """Get the tag name of an element
+
+        Args:
+            element (bs4.Tag): an element
+
+        Returns:
+            (str): the tag name
+        """
+        return element.name
+
+    def get_attribute(self, element, name):
+        """Get the value of an attribute of an element
+
+        Args:
+            element (bs4.Tag): an element
+            name (str): the attribute name
+
+        Returns:
+            (str): the attribute value, None if the element does not have the attribute.
+                The values of multi-valued attributes such as `class` are separated by spaces.
+        """
+        value = element.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlParser:
+    """
+    HTML parser backend based on lxml, which builds its tree in C and is much faster than `html.parser`.
+
+    The text and tails of lxml elements are walked as text nodes, and comments as empty text nodes,
+    so the walk is the same as the one of `BeautifulSoupParser`.
+    """
+
+    def __init__(self):
+        # lxml is only needed when this backend is selected
+        import lxml.html
+
+        self.lxml_html = lxml.html
+        self.html_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+    def parse(self, html):
+        """Parse an HTML document
+
+        Args:
+            html (str): the raw html text
+
+        Returns:
+            (lxml.html.HtmlElement): the root element of the parsed document
+        """
+        if len(html.strip()) == 0:
+            # lxml refuses to parse an empty document
+            return self.lxml_html.Element("html")
+        return self.lxml_html.document_fromstring(html.encode("utf-8"), parser=self.html_parser)
+
+    def iter_nodes(self, document):
+        """Walk over every node of a document once, in document order
+
+        Args:
+            document (lxml.html.HtmlElement): the root element of the parsed document
+
+        Returns:
+            (iter(tuple)): the NODE_START, NODE_END and NODE_TEXT events of the walk
+        """
+        container = self.get_string_container(document, None)
+        yield NODE_START, document
+        if document.text:
+            yield NODE_TEXT, document.text, container
+
+        # depth-first walk without recursion, as policy pages can be deeply nested.
+        # Each level keeps its element, its children and its string container.
+        stack = [(document, iter(document), container)]
+        while len(stack) > 0:
+            element, children, container = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield NODE_END, element
+                if len(stack) > 0 and element.tail:
+                    yield NODE_TEXT, element.tail, stack[-1][2]
+            elif isinstance(child.tag, str):
+                child_container = self.get_string_container(child, container)
+                yield NODE_START, child
+                if child.text:
+                    yield NODE_TEXT, child.text, child_container
+                stack.append((child, iter(child), child_container))
+            else:
+                # comments and processing instructions have no text, only their tails belong to the text
+                yield NODE_TEXT, "", None
+                if child.tail:
+                    yield NODE_TEXT, child.tail, container
+
+    def get_string_container(self, element, parent_container):
+        """Get the tag name of the string container of the text of an element
+
+        Args:
+            element (lxml.html.HtmlElement): an element
+            parent_container (str): the string container of the text of its parent
+
+        Returns:
+            (str): the tag name of the string container, or None if the element is not inside any string container
+        """
+        return element.tag if element.tag in STRING_CONTAINER_TAGS else parent_container
+
+    def get_name(self, element):
+        """Get the tag name of an element
+
+        Args:
+            element (lxml.html.HtmlElement): an element
+
+        Returns:
+            (str): the tag name
+        """
+        return element.tag
+
+    def get_attribute(self, element, name):
+        """Get the value of an attribute of an element
+
+        Args:
+            element (lxml.html.HtmlElement): an element
+            name (str): the attribute name
+
+        Returns:
+            (str): the attribute value, None if the element does not have the attribute
+        """
+        return element.get(name)
+
+
+HTML_PARSER_BACKENDS = {
+    "html.parser": BeautifulSoupParser,
+    "lxml": LxmlParser,
+}
+
+
+def get_html_parser(backend):
+    """Get an HTML parser backend by its name
+
+    Args:
+        backend (str): the name of the backend, one of `HTML_PARSER_BACKENDS`
+
+    Returns:
+        (BeautifulSoupParser or LxmlParser): the HTML parser backend
+    """
+    if backend not in HTML_PARSER_BACKENDS:
+        raise ValueError(
+            "Unknown HTML parser backend {}, expected one of {}".format(backend, list(HTML_PARSER_BACKENDS))
+        )
+    return HTML_PARSER_BACKENDS[backend]()
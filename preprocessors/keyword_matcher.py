@@ -0,0 +1,149 @@
+from bisect import bisect_left
+from itertools import accumulate
+from .utils.spacy_utils import get_custom_extractor
+
+KEYWORD_END = None  # Trie key marking that the keywords stored under it end at this node
+
+
+class KeywordMatcher:
+    """
+    Match many (possibly multi-word) keywords within a list of words in a single scan.
+
+    The keywords are split into their lowercase lemmas by the Spacy pipeline once, the same as the words of the
+    paragraphs, and stored in a trie, so the cost of a scan depends on the length of the text and of the longest
+    keyword, not on the number of keywords.
+
+    - Keywords are lemmatized, e.g. "children" matches "child" and "children", and "cell tower" matches "cell towers"
+    - Punctuations are ignored, e.g. "opt-out" and "opt out" both match "opt-out" and "opt out"
+    - Keywords with the same words are one keyword, e.g. "opt out" is an alias of "opt-out", so an occurence
+      is only counted once
+    """
+
+    def __init__(self, keywords, need_lemma=True):
+        """Build the keyword trie
+
+        Args:
+            keywords (iter(str)): the keywords of all criteria
+            need_lemma (bool): the flag to indicate whether the keywords are matched against lemmas or against the
+                original text of the words (Default True).
+        """
+        self.need_lemma = need_lemma
+        self.keywords = []
+        # the keyword counted instead of each keyword with the same words as a previous one
+        self.aliases = {}
+        self.trie = {}
+        self.max_keyword_length = 0
+
+        for key in dict.fromkeys(key.lower() for key in keywords):
+            words = self.split_keyword(key)
+            node = self.trie
+            for word in words:
+                node = node.setdefault(word, {})
+            if len(words) > 0 and KEYWORD_END in node:
+                self.aliases[key] = node[KEYWORD_END]
+                continue
+            self.keywords.append(key)
+            if len(words) == 0:
+                continue
+            node[KEYWORD_END] = key
+            self.max_keyword_length = max(self.max_keyword_length, len(words))
+
+    def split_keyword(self, key):
+        """Split a keyword into its lowercase lemmas (or words), leaving out the punctuations, the same as the words of a paragraph
+
+        Args:
+            key (str): the keyword
+
+        Returns:
+            (list(str)): the words of the keyword
+        """
+        if not self.need_lemma:
+            return [token.text.lower() for token in get_custom_extractor().tokenizer(key) if not token.is_punct]
+        return [token.lemma_.lower() for token in get_custom_extractor()(key) if not token.is_punct]
+
+    def get_keyword(self, key):
+        """Get the keyword counted for a keyword, i.e. the first keyword with the same words
+
+        Args:
+            key (str): the keyword
+
+        Returns:
+            (str): the lowercase keyword whose occurences are counted
+        """
+        return self.aliases.get(key.lower(), key.lower())
+
+    def find_matches(self, words):
+        """Find every occurence of every keyword within a list of words
+
+        Overlapping occurences are all reported, i.e. "facebook single sign on" also contains "single sign on".
+
+        Args:
+            words (list(str)): the lowercase words of a text
+
+        Returns:
+            (iter(tuple(str, int))): the matched keyword and the index of the word right after the match
+        """
+        num_words = len(words)
+        for start in range(num_words):
+            node = self.trie
+            end = start
+            while end < num_words and end - start < self.max_keyword_length:
+                node = node.get(words[end])
+                if node is None:
+                    break
+                end += 1
+                if KEYWORD_END in node:
+                    yield node[KEYWORD_END], end
+
+    def count_keywords(self, words):
+        """Count the occurence of every keyword within a list of words
+
+        Args:
+            words (list(str)): the lowercase words of a text
+
+        Returns:
+            (dict(str, num)): the number of occurence of every keyword
+        """
+        keyword_counts = dict.fromkeys(self.keywords, 0)
+        for key, _ in self.find_matches(words):
+            keyword_counts[key] += 1
+        return keyword_counts
+
+    def count_topic_keywords(self, words, num_topic_words):
+        """Count the occurence of every keyword within the topic sentence and within the rest of a paragraph, in a single scan
+
+        An occurence belongs to the topic sentence only if it ends within the topic sentence.
+
+        Args:
+            words (list(str)): the lowercase words of the paragraph
+            num_topic_words (int): the number of words of the topic sentence, which starts the paragraph
+
+        Returns:
+            (tuple(dict(str, num), dict(str, num))): the number of occurence of every keyword within the topic sentence and within the non-topic sentences
+        """
+        topic_keyword_counts = dict.fromkeys(self.keywords, 0)
+        non_topic_keyword_counts = dict.fromkeys(self.keywords, 0)
+        for key, end in self.find_matches(words):
+            if end <= num_topic_words:
+                topic_keyword_counts[key] += 1
+            else:
+                non_topic_keyword_counts[key] += 1
+        return topic_keyword_counts, non_topic_keyword_counts
+
+    def find_sentences_keywords(self, words, sentence_num_words):
+        """Find the keywords of every sentence of a paragraph, in a single scan
+
+        An occurence belongs to the sentence it ends in, the same as `count_topic_keywords`.
+
+        Args:
+            words (list(str)): the lowercase words of the paragraph
+            sentence_num_words (list(int)): the number of words of every sentence, which split the paragraph in order
+
+        Returns:
+            (list(list(str))): the matched keywords of every sentence, a keyword matched twice is listed twice
+        """
+        sentence_ends = list(accumulate(sentence_num_words))
+        sentences_keywords = [[] for _ in sentence_num_words]
+        for key, end in self.find_matches(words):
+            sentences_keywords[bisect_left(sentence_ends, end)].append(key)
+        return sentences_keywords
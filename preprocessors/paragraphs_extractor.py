@@ -1,70 +1,213 @@
 import re
-import tensorflow as tf
+import copy
+import math
+import multiprocessing
 from itertools import chain
 from collections import Counter
-from bs4 import BeautifulSoup
-from .utils.spacy_utils import custom_extractor
-from ..parameters import REMOVE_CHARACTERS
-from ..models.bert.utils import to_feature_map
+from .html_parsers import HEADING_TAGS, BLOCK_TAGS, STRING_CONTAINER_TAGS, NODE_START, NODE_END, NODE_TEXT, get_html_parser
+from .keyword_matcher import KeywordMatcher
+from .paragraphs_selector import ParagraphsSelector
+from .statistics_cache import StatisticsCache
+from .utils.spacy_utils import RULE_SENTENCE_COMPONENTS, get_custom_extractor
+from .utils.lemma_table import get_lemma_table
+from ..parameters import (
+    REMOVE_CHARACTERS,
+    SPACY_BATCH_SIZE,
+    SPACY_N_PROCESS,
+    HTML_PARSER_BACKEND,
+    STATISTICS_CACHE_SIZE,
+    STATISTICS_CACHE_PATH,
+    HEADINGLESS_WINDOW_SENTENCES,
+    HEADINGLESS_WINDOW_OVERLAP,
+    REMOVE_BOILERPLATE,
+    DUPLICATE_PARAGRAPH_SIMILARITY,
+    SENTENCE_SEGMENTER,
+    NUM_TOKENS_LOWER_LIMIT,
+    ZERO_RELEVANCE_NUM_PARAGRAPHS,
+)
 
-HEADING_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
 MINIMUM_EXPECTED_SEGMENTS = 6 # For situations where a policy HTML does not have enough of the above HEADING_TAGS
-
-class ParagraphsExtractor:
+# Rules used to split the text of a policy without enough headings into paragraphs
+BLANK_LINE_PATTERN = re.compile(r"\n[^\S\n]*\n\s*")
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"“(])")
+SENTENCE_END_PUNCTUATIONS = ".!?:;"
+CLOSING_PUNCTUATIONS = "\"'”’)]"
+TITLE_MAX_NUM_WORDS = 20
+# Elements which never hold policy text, such as code, navigation menus and footers
+BOILERPLATE_TAGS = {"script", "style", "noscript", "template", "nav", "footer", "iframe", "svg", "canvas", "button", "select"}
+# The ids, classes and roles of cookie banners and navigation menus
+BOILERPLATE_ATTRIBUTES = ["id", "class", "role"]
+BOILERPLATE_ATTRIBUTE_PATTERN = re.compile(
+    r"cookie[-_]?(banner|bar|notice|consent|popup)|consent[-_]?(banner|bar|popup)|onetrust|cookiebot|\bnavigation\b",
+    re.IGNORECASE,
+)
+
+class ParagraphsExtractor(ParagraphsSelector):
     """
-    First component in preprocessing pipeline. This is a pure compotent - no states
+    First component in preprocessing pipeline. Its only state is its configuration (the HTML parser backend, the
+    sentence segmenter and the boilerplate removal) and the cache of the paragraph statistics; the Spacy pipeline is
+    shared by every extractor and only loaded on first use. The statistics of a paragraph only depend on its content.
 
     - Extract privacy policy texts into multiple paragraphs
     - Identify topic sentence
     - Identify common keywords
+    - Count the tokens of each sentence
+
+    The relevance scoring and ranking are inherited from `ParagraphsSelector`.
     """
 
-    def get_paragraphs(self, html):
+    def __init__(
+        self,
+        html_parser_backend=HTML_PARSER_BACKEND,
+        statistics_cache_size=STATISTICS_CACHE_SIZE,
+        statistics_cache_path=STATISTICS_CACHE_PATH,
+        remove_boilerplate=REMOVE_BOILERPLATE,
+        sentence_segmenter=SENTENCE_SEGMENTER,
+    ):
+        """
+        Args:
+            html_parser_backend (str): the name of the HTML parser backend, see `preprocessors/html_parsers.py`
+            statistics_cache_size (int): the number of paragraph statistics cached in memory, 0 to disable
+            statistics_cache_path (str): the path of the SQLite database of cached paragraph statistics, None to disable
+            remove_boilerplate (bool): the flag to indicate whether the non-content elements and the paragraphs
+                repeated across segments are removed before the statistics are calculated
+            sentence_segmenter (str): the sentence segmenter of the Spacy pipeline, see `utils/spacy_utils.py`
+        """
+        self.html_parser = get_html_parser(html_parser_backend)
+        self.remove_boilerplate = remove_boilerplate
+        self.sentence_segmenter = sentence_segmenter
+        self.statistics_cache = None
+        if statistics_cache_size > 0 or statistics_cache_path is not None:
+            self.statistics_cache = StatisticsCache(statistics_cache_size, statistics_cache_path)
+
+    def get_paragraphs(self, html, cleaning_stats=None):
         """Get the list of paragraphs from the HTML privacy policy
 
         Args:
             html (str): The raw html text
+            cleaning_stats (dict): if given, it is filled with the number of elements, paragraphs and bytes removed
+                as boilerplate, see `get_segments_by_html_tags` and `remove_duplicate_paragraphs`
 
         Returns:
             (list(str)): The list of paragraph contents
         """
+        # chain (or concanetate) paragraphs from many sections into a single list of paragraphs (originally list of lists)
+        return list(chain.from_iterable(section.get("paragraphs") for section in self.get_sections(html, cleaning_stats)))
 
-        # retrieve the paragraph contents from its html text
-        segments = self.get_segments_by_html_tags(html)
-        # chain (or concanetate) paragraphs from many `segments` into a single list of paragraphs (originally list of lists)
-        paragraphs_with_tags = chain.from_iterable(
-            segment.get("paragraphs") for segment in segments
-        )
-        # only get the text content of each paragraph
-        return [
-            p.get("content") for p in paragraphs_with_tags if len(p.get("content")) > 0
-        ]
+    def get_sections(self, html, cleaning_stats=None):
+        """Get the sections of the HTML privacy policy, each with its heading and the contents of its paragraphs
+
+        Args:
+            html (str): The raw html text
+            cleaning_stats (dict): if given, it is filled with the number of elements, paragraphs and bytes removed
+                as boilerplate, see `get_segments_by_html_tags` and `remove_duplicate_paragraphs`
 
-    def get_segments_by_html_tags(self, policy_html):
+        Returns:
+            (list(dict)): The sections with at least one paragraph, in the order of the policy
+        """
+        # retrieve the paragraph contents from its html text
+        segments = self.get_segments_by_html_tags(html, cleaning_stats)
+        if self.remove_boilerplate:
+            segments = self.remove_duplicate_paragraphs(segments, cleaning_stats)
+
+        sections = []
+        for segment in segments:
+            # only get the text content of each paragraph
+            paragraphs = [p.get("content") for p in segment.get("paragraphs") if len(p.get("content")) > 0]
+            if len(paragraphs) > 0:
+                sections.append({"heading": segment.get("header").get("content"), "paragraphs": paragraphs})
+        return sections
+
+    def get_segments_by_html_tags(self, policy_html, cleaning_stats=None):
         """Get segements of a policy using html tags
 
+        The policy is walked once, in document order. Every heading starts a new segment, wherever it is nested,
+        and every text block after it belongs to that segment until the next heading. A text block is the largest
+        element or text node which does not contain any heading, e.g. a paragraph, a list or a `div` of paragraphs.
+        The text before the first heading does not belong to any segment.
+
+        If `remove_boilerplate` is set, the non-content elements (scripts, styles, navigation menus, footers,
+        cookie banners, ...) are skipped with everything they contain.
+
         Args:
             policy_html (html): privacy policy of an app in raw html format
+            cleaning_stats (dict): if given, it is filled with the number of boilerplate elements and bytes of text skipped
 
         Returns:
             list: a list of segments. Each segment has a header and paragraphs
         """
         segments = []
-        soup = BeautifulSoup(policy_html, features="html.parser")
-        for heading in soup.find_all(HEADING_TAGS):
-            segment = {
-                "header": {
-                    "tag": heading.name,
-                    "content": self.sanitise_text(heading.get_text()),
-                },
-                "paragraphs": self.get_paragraphs_per_segment(heading),
-            }
-            segments.append(segment)
+        # every string of the policy, with the tag name of its string container
+        strings = []
+        # the string indices where a block-level element starts or ends, and the string ranges of the headings,
+        # which split the policy into paragraphs if it does not have enough headings
+        block_boundaries = []
+        heading_ranges = []
+        # the elements being walked, from the document down to the current element
+        stack = [self.get_walk_frame(None, 0, None)]
+        # the depth within the boilerplate element being skipped, 0 when not skipping
+        skip_depth = 0
+        boilerplate_elements = 0
+        boilerplate_bytes = 0
+        for event in self.html_parser.iter_nodes(self.html_parser.parse(policy_html)):
+            if skip_depth > 0:
+                if event[0] == NODE_START:
+                    skip_depth += 1
+                elif event[0] == NODE_END:
+                    skip_depth -= 1
+                else:
+                    boilerplate_bytes += len(event[1].encode("utf-8"))
+                continue
+
+            if event[0] == NODE_TEXT:
+                strings.append((event[1], event[2]))
+                self.add_text_block(
+                    stack[-1], {"tag": None, "start": len(strings) - 1, "end": len(strings)}, segments, strings
+                )
+            elif event[0] == NODE_START:
+                tag = self.html_parser.get_name(event[1])
+                if self.remove_boilerplate and self.is_boilerplate_element(event[1], tag):
+                    # the text around a skipped element does not belong to the same paragraph
+                    block_boundaries.append(len(strings))
+                    boilerplate_elements += 1
+                    skip_depth = 1
+                    continue
+                frame = self.get_walk_frame(tag, len(strings), stack[-1])
+                if frame["tag"] in BLOCK_TAGS:
+                    block_boundaries.append(len(strings))
+                if frame["is_heading"]:
+                    self.set_has_heading(stack, segments, strings)
+                stack.append(frame)
+            else:
+                frame = stack.pop()
+                if frame["tag"] in BLOCK_TAGS:
+                    block_boundaries.append(len(strings))
+                if frame["is_heading"]:
+                    heading_ranges.append((frame["start"], len(strings)))
+                    segments.append(
+                        {
+                            "header": {
+                                "tag": frame["tag"],
+                                "content": self.sanitise_text(
+                                    "".join(text for text, container in strings[frame["start"] :] if container is None)
+                                ),
+                            },
+                            "paragraphs": [],
+                        }
+                    )
+                elif not frame["has_heading"]:
+                    self.add_text_block(
+                        stack[-1], {"tag": frame["tag"], "start": frame["start"], "end": len(strings)}, segments, strings
+                    )
+
+        if cleaning_stats is not None:
+            cleaning_stats["boilerplate_elements"] = boilerplate_elements
+            cleaning_stats["boilerplate_bytes"] = boilerplate_bytes
 
         if len(segments) >= MINIMUM_EXPECTED_SEGMENTS:
             return segments
 
-        # If not enough segments are found, treat the whole policy text as a segment
+        # If not enough segments are found, split the whole policy text into bounded paragraphs as a single segment
         return [
             {
             "header": {
@@ -72,74 +215,609 @@ class ParagraphsExtractor:
                 "content": "",
                 },
             "paragraphs": [
-                {
-                    "tag": "",
-                    "content": self.sanitise_text(soup.get_text(separator="\n", strip=True))
-                }],
+                {"tag": "", "content": self.sanitise_text(content)}
+                for content in self.get_headingless_paragraphs(strings, block_boundaries, heading_ranges)
+            ],
             }
         ]
 
-    def get_paragraphs_per_segment(self, segmentHeader):
-        """Get list of paragraphs under each segment header
+    def is_boilerplate_element(self, element, tag):
+        """Check whether an element never holds policy text, from its tag name, id, classes and role
 
         Args:
-            segmentHeader (html tag): a header tag h1 or h2 or h3
+            element (object): an element of the HTML parser backend
+            tag (str): the tag name of the element
 
         Returns:
-            list: a list of paragraphs under the segment header
+            (bool): True if the element is boilerplate
         """
-        paragraphs = []
-        for element in segmentHeader.next_siblings:
-            if element is not None and element.name and element.name in HEADING_TAGS:
-                break  # Found the next header, stop processing
-            else:
-                try:
-                    para = {
-                        "tag": element.name,
-                        "content": self.sanitise_text(
-                            element.get_text(separator="\n", strip=True)
-                        ),
-                    }
-                    paragraphs.append(para)
-                except Exception as e:
-                    print(
-                        "Exception {0} when parsing element {1}, header {2}: ".format(
-                            e, element, segmentHeader
-                        )
-                    )
+        if tag in BOILERPLATE_TAGS:
+            return True
+        for name in BOILERPLATE_ATTRIBUTES:
+            value = self.html_parser.get_attribute(element, name)
+            if value is not None and BOILERPLATE_ATTRIBUTE_PATTERN.search(value) is not None:
+                return True
+        return False
+
+    def remove_duplicate_paragraphs(self, segments, cleaning_stats=None, similarity=DUPLICATE_PARAGRAPH_SIMILARITY):
+        """Remove the paragraphs already found in an earlier segment, such as the menus repeated under every heading
+
+        Two paragraphs are duplicates if they have the same words, regardless of the case, the punctuations and the spacing,
+        and near duplicates if the Jaccard similarity of their sets of words is at least `similarity`, e.g. a footer
+        repeated with another date. The paragraphs repeated within the same segment are kept.
+
+        Args:
+            segments (list(dict)): the segments, each with a header and paragraphs
+            cleaning_stats (dict): if given, it is filled with the number of paragraphs and bytes removed
+            similarity (float): the minimum Jaccard similarity of near duplicates, 1 to only remove exact duplicates
+
+        Returns:
+            (list(dict)): the segments without the duplicate paragraphs
+        """
+        seen_keys = set()
+        # the word sets of the paragraphs of the earlier segments, by word, to only compare paragraphs sharing a word
+        seen_word_sets = []
+        word_index = {}
+        duplicate_paragraphs = 0
+        duplicate_bytes = 0
+        cleaned_segments = []
+        for segment in segments:
+            paragraphs = []
+            keys = []
+            for para in segment.get("paragraphs"):
+                key = self.get_duplicate_key(para.get("content"))
+                if len(key) > 0 and (
+                    key in seen_keys or self.is_near_duplicate(set(key.split(" ")), seen_word_sets, word_index, similarity)
+                ):
+                    duplicate_paragraphs += 1
+                    duplicate_bytes += len(para.get("content").encode("utf-8"))
                     continue
+                paragraphs.append(para)
+                keys.append(key)
+            for key in dict.fromkeys(keys):
+                if len(key) > 0 and key not in seen_keys:
+                    words = set(key.split(" "))
+                    for word in words:
+                        word_index.setdefault(word, []).append(len(seen_word_sets))
+                    seen_word_sets.append(words)
+            seen_keys.update(keys)
+            cleaned_segments.append({**segment, "paragraphs": paragraphs})
+
+        if cleaning_stats is not None:
+            cleaning_stats["duplicate_paragraphs"] = duplicate_paragraphs
+            cleaning_stats["duplicate_bytes"] = duplicate_bytes
+        return cleaned_segments
+
+    def is_near_duplicate(self, words, seen_word_sets, word_index, similarity):
+        """Check whether a paragraph is a near duplicate of a paragraph seen before, see `remove_duplicate_paragraphs`
 
-        if len(paragraphs) == 0:
-            # FIXME: extend the HTML segment extractor by adding a layer of logic to deal with no heading tags found.
-            pass
+        Args:
+            words (set(str)): the lowercase words of the paragraph
+            seen_word_sets (list(set(str))): the lowercase words of every paragraph seen before
+            word_index (dict(str, list(int))): the indices of the word sets of `seen_word_sets` with each word
+            similarity (float): the minimum Jaccard similarity of near duplicates
+
+        Returns:
+            (bool): True if the Jaccard similarity of the words with some paragraph seen before is at least `similarity`
+        """
+        if similarity >= 1:
+            return False
+        # the number of shared words of every paragraph seen before sharing at least one word
+        shared_counts = Counter(index for word in words for index in word_index.get(word, []))
+        return any(
+            shared / (len(words) + len(seen_word_sets[index]) - shared) >= similarity
+            for index, shared in shared_counts.items()
+        )
+
+    def get_duplicate_key(self, content):
+        """Get the key under which duplicate paragraphs are found, i.e. their lowercase words
+
+        Args:
+            content (str): the paragraph content
+
+        Returns:
+            (str): the duplicate key, empty if the paragraph has no word
+        """
+        return " ".join(re.findall(r"\w+", content.lower()))
+
+    def get_walk_frame(self, tag, start, parent):
+        """Get the walking state of an element which has just started
+
+        Args:
+            tag (str): the tag name of the element, None for the document
+            start (int): the index of the first string of the element
+            parent (dict): the walking state of the parent element, None for the document
+
+        Returns:
+            (dict): the walking state of the element
+        """
+        in_heading = parent is not None and (parent["is_heading"] or parent["in_heading"])
+        return {
+            "tag": tag,
+            "start": start,
+            # a heading nested in another heading is part of the outer heading's text
+            "is_heading": tag in HEADING_TAGS and not in_heading,
+            "in_heading": in_heading,
+            # whether a heading has been found within the element so far
+            "has_heading": False,
+            # the text blocks of the element waiting to know whether the element contains a heading
+            "pending": [],
+        }
+
+    def set_has_heading(self, stack, segments, strings):
+        """Mark the elements being walked as containing a heading, when a heading starts
+
+        Their pending text blocks come before the heading, so they become paragraphs of the current segment.
+
+        Args:
+            stack (list(dict)): the walking state of the elements being walked, from the document down
+            segments (list(dict)): the segments found so far
+            strings (list(tuple(str, str))): the strings found so far, with the tag names of their string containers
+        """
+        newly_marked = []
+        for frame in reversed(stack):
+            if frame["has_heading"]:
+                break
+            frame["has_heading"] = True
+            newly_marked.append(frame)
+
+        # the pending blocks of the outer elements come first in document order
+        for frame in reversed(newly_marked):
+            for block in frame["pending"]:
+                self.add_paragraph(block, segments, strings)
+            frame["pending"] = []
+
+    def add_text_block(self, parent, block, segments, strings):
+        """Add a text block which has just ended, as a paragraph if its parent contains a heading
 
+        Args:
+            parent (dict): the walking state of the parent element
+            block (dict): the tag name of the text block (None for a text node) and the range of its strings
+            segments (list(dict)): the segments found so far
+            strings (list(tuple(str, str))): the strings found so far, with the tag names of their string containers
+        """
+        if parent["has_heading"]:
+            self.add_paragraph(block, segments, strings)
+        else:
+            parent["pending"].append(block)
+
+    def add_paragraph(self, block, segments, strings):
+        """Add a text block to the current segment as a paragraph
+
+        Args:
+            block (dict): the tag name of the text block (None for a text node) and the range of its strings
+            segments (list(dict)): the segments found so far
+            strings (list(tuple(str, str))): the strings found so far, with the tag names of their string containers
+        """
+        if len(segments) == 0:
+            return  # the text before the first heading
+        tag = block["tag"]
+        if tag is None:
+            content = strings[block["start"]][0].strip()
+        else:
+            container = tag if tag in STRING_CONTAINER_TAGS else None
+            content = self.get_block_text(strings, block["start"], block["end"], container)
+        segments[-1]["paragraphs"].append({"tag": tag, "content": self.sanitise_text(content)})
+
+    def get_headingless_paragraphs(
+        self,
+        strings,
+        block_boundaries,
+        heading_ranges,
+        window_sentences=HEADINGLESS_WINDOW_SENTENCES,
+        window_overlap=HEADINGLESS_WINDOW_OVERLAP,
+    ):
+        """Split the text of a policy without enough headings into bounded paragraphs
+
+        - The text is split at every block-level element (paragraphs, list items, table cells, line breaks, ...)
+          and at every blank line. The text of the headings is left out, the same as with enough headings.
+        - A title-like block, i.e. a short block without any sentence punctuation, is merged into the next block.
+        - A block longer than `window_sentences` sentences is split into windows of `window_sentences` sentences,
+          with `window_overlap` sentences shared by consecutive windows.
+
+        Args:
+            strings (list(tuple(str, str))): every string of the policy, with the tag names of their string containers
+            block_boundaries (list(int)): the string indices where a block-level element starts or ends, in order
+            heading_ranges (list(tuple(int, int))): the string ranges of the headings, in order
+            window_sentences (int): the maximum number of sentences of a paragraph
+            window_overlap (int): the number of sentences shared by consecutive windows of a long block
+
+        Returns:
+            (list(str)): the paragraph contents
+        """
+        blocks = []
+        heading_index = 0
+        for start, end in zip([0] + block_boundaries, block_boundaries + [len(strings)]):
+            while heading_index < len(heading_ranges) and heading_ranges[heading_index][1] <= start:
+                heading_index += 1
+            if start >= end or (heading_index < len(heading_ranges) and heading_ranges[heading_index][0] <= start):
+                continue  # empty or within a heading
+            text = "".join(text for text, container in strings[start:end] if container is None)
+            blocks += [" ".join(block.split()) for block in BLANK_LINE_PATTERN.split(text)]
+
+        paragraphs = []
+        titles = []
+        for block in blocks:
+            if len(block) == 0:
+                continue
+            if self.is_title_like(block):
+                titles.append(block)
+                continue
+            paragraphs += self.get_sentence_windows(titles + self.split_sentences(block), window_sentences, window_overlap)
+            titles = []
+        if len(titles) > 0:
+            paragraphs += self.get_sentence_windows(titles, window_sentences, window_overlap)
         return paragraphs
 
+    def is_title_like(self, text):
+        """Check whether a block of text looks like a title, i.e. it is short and does not end like a sentence
+
+        Args:
+            text (str): the whitespace-normalised text of a block
+
+        Returns:
+            (bool): True if the block looks like a title
+        """
+        return (
+            len(text.split()) <= TITLE_MAX_NUM_WORDS
+            and text.rstrip(CLOSING_PUNCTUATIONS)[-1:] not in SENTENCE_END_PUNCTUATIONS
+        )
+
+    def split_sentences(self, text):
+        """Split a text into sentences with a punctuation rule, which is only used to bound the paragraph size
+
+        The sentences of the paragraphs are still determined by the Spacy pipeline.
+
+        Args:
+            text (str): the whitespace-normalised text of a block
+
+        Returns:
+            (list(str)): the sentences
+        """
+        return SENTENCE_SPLIT_PATTERN.split(text)
+
+    def get_sentence_windows(self, sentences, window_sentences, window_overlap):
+        """Group sentences into windows of a bounded number of sentences
+
+        Args:
+            sentences (list(str)): the sentences
+            window_sentences (int): the maximum number of sentences of a window
+            window_overlap (int): the number of sentences shared by consecutive windows
+
+        Returns:
+            (list(str)): the text of every window
+        """
+        window_sentences = max(window_sentences, 1)
+        step = max(window_sentences - window_overlap, 1)
+        return [
+            " ".join(sentences[start : start + window_sentences])
+            for start in range(0, max(len(sentences) - window_overlap, 1), step)
+        ]
+
+    def get_block_text(self, strings, start, end, container):
+        """Get the text of a range of strings, the same way as BeautifulSoup's `get_text` with a newline separator and stripping
+
+        Only the strings of the same string container as the text block are kept, i.e. the text of a paragraph
+        does not include its scripts and styles, but the text of a script is its code.
+
+        Args:
+            strings (list(tuple(str, str))): the strings, with the tag names of their string containers
+            start (int): the index of the first string of the range
+            end (int): the index after the last string of the range
+            container (str): the tag name of the string container of the text block, None if it is not a string container
+
+        Returns:
+            (str): the text
+        """
+        stripped_strings = (
+            text.strip() for text, string_container in strings[start:end] if string_container == container
+        )
+        return "\n".join(text for text in stripped_strings if len(text) > 0)
+
     def get_paragraph_statistics(self, paragraph, keywords):
         """Get the statistics of a paragraph
 
         Args:
             paragraph (str): The paragraph content
-            keywords (iter(str)): Criteria-specific keywords used to search for relevant paragraphs
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
         Returns:
             (dict): Paragraph Meta-statistics such as topic sentence and the keyword occurence
         """
-        topic_sentence = self.get_topic_sentence(paragraph)
+        return self.get_paragraphs_statistics([paragraph], keywords, n_process=1)[0]
 
-        paragraph_keyword_dict = self.count_keywords(paragraph, keywords)
-        topic_keyword_dict = self.count_keywords(topic_sentence, keywords)
+    def get_paragraphs_statistics(
+        self,
+        paragraphs,
+        keywords,
+        batch_size=SPACY_BATCH_SIZE,
+        n_process=SPACY_N_PROCESS,
+    ):
+        """Get the statistics of many paragraphs at once
 
-        non_topic_keyword_dict = {
-            key: paragraph_keyword_dict.get(key) - topic_keyword_dict.get(key)
-            for key in keywords
-        }
+        The paragraphs are streamed through the Spacy pipeline in batches, optionally spread over several processes.
+        The statistics of each paragraph are the same as the ones of `get_paragraph_statistics`.
+        The paragraphs found in the statistics cache are not processed again.
+
+        Args:
+            paragraphs (list(str)): The paragraph contents
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+            batch_size (int): Number of paragraphs processed together by Spacy
+            n_process (int): Number of processes used by Spacy, -1 means every CPU core
+        Returns:
+            (list(dict)): Paragraph Meta-statistics of every paragraph, in the same order as the given paragraphs
+        """
+        # build the keyword matcher once for all paragraphs
+        keywords = self.get_keyword_matcher(keywords)
+        if self.statistics_cache is None:
+            return self.compute_paragraphs_statistics(paragraphs, keywords, batch_size, n_process)
+
+        config_key = self.statistics_cache.get_config_key(keywords, self.sentence_segmenter)
+        cache_keys = [self.statistics_cache.get_key(paragraph, config_key) for paragraph in paragraphs]
+        paragraphs_statistics = [self.statistics_cache.get(key) for key in cache_keys]
+
+        # only the paragraphs which are not cached go through Spacy, and a paragraph repeated within the policy only once
+        missing = {}
+        for i, key in enumerate(cache_keys):
+            if paragraphs_statistics[i] is None:
+                missing.setdefault(key, []).append(i)
+        missing_paragraphs = [paragraphs[indices[0]] for indices in missing.values()]
+        missing_statistics = self.compute_paragraphs_statistics(missing_paragraphs, keywords, batch_size, n_process)
+
+        for (key, indices), statistics in zip(missing.items(), missing_statistics):
+            self.statistics_cache.put(key, statistics)
+            paragraphs_statistics[indices[0]] = statistics
+            for i in indices[1:]:
+                # each paragraph gets its own statistics, the same as without the cache
+                paragraphs_statistics[i] = copy.deepcopy(statistics)
+        self.statistics_cache.commit()
+        return paragraphs_statistics
+
+    def compute_paragraphs_statistics(self, paragraphs, keyword_matcher, batch_size, n_process):
+        """Calculate the statistics of many paragraphs with the Spacy pipeline, without the cache
+
+        Args:
+            paragraphs (list(str)): The paragraph contents
+            keyword_matcher (KeywordMatcher): The matcher of the criteria-specific keywords
+            batch_size (int): Number of paragraphs processed together by Spacy
+            n_process (int): Number of processes used by Spacy, -1 means every CPU core
+        Returns:
+            (list(dict)): Paragraph Meta-statistics of every paragraph, in the same order as the given paragraphs
+        """
+        if len(paragraphs) == 0:
+            return []
+        docs = get_custom_extractor(self.sentence_segmenter).pipe(
+            paragraphs,
+            batch_size=batch_size,
+            n_process=self.get_num_processes(len(paragraphs), batch_size, n_process),
+        )
+        return [self.get_doc_statistics(doc, keyword_matcher) for doc in docs]
+
+    def get_policies_statistics(
+        self,
+        policies_paragraphs,
+        keywords,
+        batch_size=SPACY_BATCH_SIZE,
+        n_process=SPACY_N_PROCESS,
+    ):
+        """Get the paragraph statistics of many policies at once
+
+        The paragraphs of all policies share the same Spacy stream, so small policies still fill up the batches.
+
+        Args:
+            policies_paragraphs (list(list(str))): The paragraph contents of each policy
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+            batch_size (int): Number of paragraphs processed together by Spacy
+            n_process (int): Number of processes used by Spacy, -1 means every CPU core
+        Returns:
+            (list(list(dict))): Paragraph Meta-statistics of every policy, in the same order as the given policies
+        """
+        paragraphs_statistics = self.get_paragraphs_statistics(
+            list(chain.from_iterable(policies_paragraphs)),
+            keywords,
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+
+        policies_statistics = []
+        start = 0
+        for paragraphs in policies_paragraphs:
+            policies_statistics.append(paragraphs_statistics[start : start + len(paragraphs)])
+            start += len(paragraphs)
+        return policies_statistics
+
+    def get_paragraphs_keyword_statistics(self, paragraphs, keywords, batch_size=SPACY_BATCH_SIZE):
+        """Get the keyword statistics of many paragraphs, without splitting their sentences with the Spacy model
+
+        First phase of the lazy statistics. The paragraphs are only tokenized, the topic sentence is found with the
+        rule-based sentence boundaries, and the words are lemmatized with the lemma table (see `utils/lemma_table.py`),
+        which is enough to score and select the paragraphs. The sentences are only added by `add_paragraphs_sentences`
+        to the paragraphs some criteria selects. The keyword occurences are not exactly those of
+        `get_paragraphs_statistics`, so the paragraph rankings can differ, see `LAZY_SENTENCES`.
+
+        Args:
+            paragraphs (list(str)): The paragraph contents
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+            batch_size (int): Number of paragraphs processed together by Spacy
+        Returns:
+            (list(dict)): The content, topic sentence and keyword occurence of every paragraph, in the same order
+        """
+        keyword_matcher = self.get_keyword_matcher(keywords)
+        lemma_table = get_lemma_table()
+        extractor = get_custom_extractor("sentencizer")
+        docs = extractor.pipe(
+            paragraphs,
+            batch_size=batch_size,
+            disable=[name for name in extractor.pipe_names if name not in RULE_SENTENCE_COMPONENTS],
+        )
+
+        paragraphs_statistics = []
+        for doc in docs:
+            topic_sentence = next(doc.sents, None)
+            topic_keyword_dict, non_topic_keyword_dict = keyword_matcher.count_topic_keywords(
+                [word.lower() for word in lemma_table.get_token_words(doc)],
+                len(lemma_table.get_token_words(topic_sentence, need_lemma=False)) if topic_sentence is not None else 0,
+            )
+            paragraphs_statistics.append(
+                {
+                    "content": doc.text,
+                    "topic_sentence": topic_sentence.text if topic_sentence is not None else "",
+                    "topic_keyword_occurence": topic_keyword_dict,
+                    "non_topic_keyword_occurence": non_topic_keyword_dict,
+                }
+            )
+        return paragraphs_statistics
+
+    def add_headings(self, paragraphs_stats, section_ids, headings, keywords):
+        """Add the section, the heading and the keyword occurence of the heading to the statistics of every paragraph
+
+        The keywords of each distinct heading are only counted once, with the whole Spacy pipeline.
+
+        Args:
+            paragraphs_stats (list(dict)): The statistics of every paragraph
+            section_ids (list(int)): The index of the section of every paragraph, see `get_sections`
+            headings (list(str)): The heading of the section of every paragraph
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+        """
+        keyword_matcher = self.get_keyword_matcher(keywords)
+        headings_keyword_occurence = {}
+        for stat, section_id, heading in zip(paragraphs_stats, section_ids, headings):
+            if heading not in headings_keyword_occurence:
+                headings_keyword_occurence[heading] = self.count_keywords(heading, keyword_matcher)
+            stat["section"] = section_id
+            stat["heading"] = heading
+            stat["heading_keyword_occurence"] = dict(headings_keyword_occurence[heading])
+
+    def add_paragraphs_sentences(
+        self,
+        paragraphs_stats,
+        indices,
+        keywords,
+        batch_size=SPACY_BATCH_SIZE,
+        n_process=SPACY_N_PROCESS,
+    ):
+        """Add the sentences, the sentence token counts and the sentence keywords to the statistics of some paragraphs
+
+        Second phase of the lazy statistics, only for the paragraphs selected by the criteria. The sentences come from
+        `get_paragraphs_statistics`, so they are the same as without the lazy statistics, and are cached the same way.
+        The paragraphs which already have their sentences are skipped.
+
+        Args:
+            paragraphs_stats (list(dict)): The statistics of every paragraph, from `get_paragraphs_keyword_statistics`
+            indices (iter(int)): The indices of the paragraphs which need their sentences
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+            batch_size (int): Number of paragraphs processed together by Spacy
+            n_process (int): Number of processes used by Spacy, -1 means every CPU core
+        Returns:
+            (int): The number of paragraphs whose sentences were added
+        """
+        indices = [i for i in dict.fromkeys(indices) if "sentences" not in paragraphs_stats[i]]
+        full_statistics = self.get_paragraphs_statistics(
+            [paragraphs_stats[i]["content"] for i in indices],
+            keywords,
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+        for i, statistics in zip(indices, full_statistics):
+            paragraphs_stats[i]["sentences"] = statistics["sentences"]
+            paragraphs_stats[i]["sentence_token_counts"] = statistics["sentence_token_counts"]
+            paragraphs_stats[i]["sentence_keywords"] = statistics["sentence_keywords"]
+        return len(indices)
+
+    def add_budget_paragraphs_sentences(
+        self,
+        paragraphs_stats,
+        order,
+        budget,
+        keywords,
+        min_num_tokens=NUM_TOKENS_LOWER_LIMIT,
+        num_paragraphs_per_step=ZERO_RELEVANCE_NUM_PARAGRAPHS,
+    ):
+        """Add the sentences to the paragraphs in the given order, until they fill a budget
+
+        The second phase of the lazy statistics for the selections which depend on the sentences, i.e. the "sentence_budget"
+        zero relevance fallback and the criteria budgets (see `ParagraphsSelector.select_paragraphs_by_budget`).
+        A budget in tokens is counted with the lower bound of the WordPiece tokens of each sentence, so the paragraphs
+        split are always enough for the budget counted with the BERT tokenizer.
+
+        Args:
+            paragraphs_stats (list(dict)): The statistics of every paragraph, from `get_paragraphs_keyword_statistics`
+            order (list(int)): The indices of the paragraphs, in the order they are selected
+            budget (dict): The "size" of the budget and its "unit"
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+            min_num_tokens (int): The minimum number of tokens of a valid sentence
+            num_paragraphs_per_step (int): The number of paragraphs split at once
+        Returns:
+            (int): The number of paragraphs whose sentences were added
+        """
+        num_added = 0
+        used = 0
+        for start in range(0, len(order), num_paragraphs_per_step):
+            # the selection also looks at the first sentence which does not fit, so the budget must be exceeded
+            if used > budget["size"]:
+                break
+            step_indices = order[start : start + num_paragraphs_per_step]
+            num_added += self.add_paragraphs_sentences(paragraphs_stats, step_indices, keywords, n_process=1)
+            used += sum(
+                self.get_sentence_cost(sentence, num_tokens, budget["unit"])
+                for i in step_indices
+                for sentence, num_tokens in zip(
+                    paragraphs_stats[i]["sentences"], paragraphs_stats[i]["sentence_token_counts"]
+                )
+                if num_tokens >= min_num_tokens
+            )
+        return num_added
+
+    def get_num_processes(self, num_paragraphs, batch_size, n_process):
+        """Get the number of processes worth starting for a number of paragraphs
+
+        Starting a process costs more than processing a few paragraphs, so no more processes are used than there are batches.
+
+        Args:
+            num_paragraphs (int): Number of paragraphs to process
+            batch_size (int): Number of paragraphs processed together by Spacy
+            n_process (int): Number of processes requested, -1 means every CPU core
+        Returns:
+            (int): Number of processes to use, at least 1
+        """
+        if n_process == -1:
+            n_process = multiprocessing.cpu_count()
+        num_batches = math.ceil(num_paragraphs / max(batch_size, 1))
+        return max(1, min(n_process, num_batches))
+
+    def get_doc_statistics(self, doc, keywords):
+        """Get the statistics of a paragraph which has already been parsed by the Spacy pipeline.
+
+        The sentences, the topic sentence and the keyword occurences are all derived from the same Doc,
+        so the paragraph only goes through the Spacy pipeline once.
+
+        Args:
+            doc (spacy.tokens.Doc): The parsed paragraph
+            keywords (iter(str) or KeywordMatcher): Criteria-specific keywords used to search for relevant paragraphs
+        Returns:
+            (dict): Paragraph Meta-statistics such as topic sentence and the keyword occurence
+        """
+        keyword_matcher = self.get_keyword_matcher(keywords)
+        sentences = list(doc.sents)
+        topic_sentence = sentences[0] if len(sentences) > 0 else []
+
+        # match the keywords of the whole paragraph once, and split the matches between the topic and the non-topic sentences
+        words = self.get_lowercase_words_from_tokens(doc)
+        topic_keyword_dict, non_topic_keyword_dict = keyword_matcher.count_topic_keywords(
+            words,
+            len(self.get_words_from_tokens(topic_sentence)),
+        )
+        sentence_token_counts = [len(self.get_words_from_tokens(sent)) for sent in sentences]
 
         return {
-            "content": paragraph,
-            "topic_sentence": topic_sentence,
+            "content": doc.text,
+            "topic_sentence": topic_sentence.text if len(sentences) > 0 else "",
             "topic_keyword_occurence": topic_keyword_dict,
             "non_topic_keyword_occurence": non_topic_keyword_dict,
-            "sentences": self.get_sentences_from_single_paragraph(paragraph)
+            "sentences": [sent.text for sent in sentences],
+            # the criteria filter out the short sentences without having to tokenize them again
+            "sentence_token_counts": sentence_token_counts,
+            # the criteria score the sentences on their own, see `ParagraphsSelector.select_best_sentences`
+            "sentence_keywords": keyword_matcher.find_sentences_keywords(words, sentence_token_counts),
             # TODO:
             # Add more statistics in case the pipeline needs more, i.e.,
             # "keyword_occurence": paragraph_keyword_dict,
@@ -156,7 +834,7 @@ class ParagraphsExtractor:
         Returns:
             (list[str]): the list of sentences of the given paragraph.
         """
-        return [sent.text for sent in custom_extractor(paragraph).sents]
+        return [sent.text for sent in get_custom_extractor(self.sentence_segmenter)(paragraph).sents]
 
     def get_sentences_from_many_paragraphs(self, paragraphs):
         """Get the list of sentences of a number of paragraphs
@@ -186,148 +864,120 @@ class ParagraphsExtractor:
         sentences = self.get_sentences_from_single_paragraph(paragraph)
         return sentences[0] if len(sentences) > 0 else ""
 
-    def tokenize_text(self, text, need_lemma=True):
+    def tokenize_text(self, text, need_lemma=True, fast=False):
         """Tokenize a piece of text into words, with consideration of different forms of a word
 
         Args:
             text (str): the piece of text in string
+            need_lemma (bool): the flag to indicate whether the lemma or the original text of a word is returned (Default True).
+            fast (bool): the flag to indicate whether the text is only tokenized and lemmatized with the lemma table,
+                instead of going through the whole Spacy pipeline (Default False). See `utils/lemma_table.py`.
 
         Returns:
             (list(str)): the list of tokens
         """
-        word_tokens = []
+        if fast:
+            return get_lemma_table().get_words(text, need_lemma=need_lemma)
+        return self.get_words_from_tokens(get_custom_extractor(self.sentence_segmenter)(text), need_lemma=need_lemma)
 
-        for token in custom_extractor(text):
-            if not token.is_punct:
-                word_tokens.append(token.lemma_ if need_lemma else token.text)
+    def get_words_from_tokens(self, tokens, need_lemma=True):
+        """Get the words of already parsed Spacy tokens, leaving out the punctuations
 
-        return word_tokens
+        Args:
+            tokens (iter(spacy.tokens.Token)): a parsed Doc, a sentence Span or any other sequence of tokens
+            need_lemma (bool): the flag to indicate whether the lemma or the original text of a token is returned (Default True).
 
-    def count_keyword(self, text, key, need_lemma=True):
+        Returns:
+            (list(str)): the list of words
+        """
+        return [
+            token.lemma_ if need_lemma else token.text
+            for token in tokens
+            if not token.is_punct
+        ]
+
+    def count_keyword(self, text, key, need_lemma=True, fast=False):
         """Count the number of occurence of a keyword with optional choice to consider the different forms of the keyword
 
         Args:
             text (str): the piece of meaningful text in string format
             key (str): the keyword which needs finding frequency
             need_lemma (bool): the flag to indicate whether different forms of the keyword are counted as matched (Default True).
+            fast (bool): the flag to indicate whether the text is only tokenized, see `tokenize_text` (Default False).
 
         Returns:
             (num): the number of occurence of the keyword within the given text.
         """
-        tokens = self.tokenize_text(text, need_lemma=need_lemma)
+        tokens = self.tokenize_text(text, need_lemma=need_lemma, fast=fast)
         lowercase_tokens = [token.lower() for token in tokens]
         return lowercase_tokens.count(key.lower())
 
-    def count_keywords(self, text, keys, need_lemma=True):
+    def count_keywords(self, text, keys, need_lemma=True, fast=False):
         """Count the occurence of keywords with optional choice to consider the different forms of the keyword
 
         Args:
             text (str): the piece of meaningful text in string format
-            keys (iter(str)): the keyword which needs finding frequency
+            keys (iter(str) or KeywordMatcher): the keyword which needs finding frequency
             need_lemma (bool): the flag to indicate whether different forms of the keyword are counted as matched (Default True).
+            fast (bool): the flag to indicate whether the text is only tokenized, see `tokenize_text` (Default False).
 
         Returns:
             (dict(str, num)): the number of occurence of the keyword within the given text.
         """
-        # We keep every token in lowercase.
-        tokens = self.tokenize_text(text, need_lemma=need_lemma)
-        lowercase_tokens = [token.lower() for token in tokens]
-        token_frequency_counts = Counter(lowercase_tokens)
-        lowercase_keys = [key.lower() for key in keys]
-        return {key: token_frequency_counts.get(key, 0) for key in lowercase_keys}
-
-    def get_relevant_score_by_keyword_occurence(
-        self,
-        topic_sentence_keyword_freq,
-        non_topic_sentence_keyword_freq,
-        weights,
-        keywords=[],
-    ):
-        """Calculate the relevant score of a paragraph.
+        if fast:
+            words = self.tokenize_text(text, need_lemma=need_lemma, fast=True)
+            return self.get_keyword_matcher(keys, need_lemma=need_lemma).count_keywords([word.lower() for word in words])
+        return self.count_keywords_in_tokens(get_custom_extractor(self.sentence_segmenter)(text), keys, need_lemma=need_lemma)
 
-        The formula for the relevance score
-            score =  C_t x w_t + C_nt x w_nt
-
-        where
-            C_t: the number of matched keywords in the topic sentence.
-            C_nt: the number of matched keywords in the non topic sentences.
-            w_t: the weight allocated for the topic sentence.
-            w_nt: the weight allocated for the non-topic sentences.
+    def count_keywords_in_tokens(self, tokens, keys, need_lemma=True):
+        """Count the occurence of keywords within already parsed Spacy tokens
 
         Args:
-            topic_sentence_keyword_freq (dict(str, num)): pre-calculated keyword occurence dictionary for topic sentence.
-            non_topic_sentence_keyword_freq (dict(str, num)): pre-calculated keyword occurence dictionary for non-topic sentences.
-            weights (list(num)): the list of weights for the relevance score formula.
-                (Default to [1, 1], i.e. the keyword occurrence in the topic sentence
-                will have the same impact as the keyword occurence in the non-topic sentences).
-            keywords (iter(str)): collection of concerned keywords
+            tokens (iter(spacy.tokens.Token)): a parsed Doc, a sentence Span or any other sequence of tokens
+            keys (iter(str) or KeywordMatcher): the keyword which needs finding frequency
+            need_lemma (bool): the flag to indicate whether different forms of the keyword are counted as matched (Default True).
 
         Returns:
-            score (num): the overall relevant score of a particular paragraph against a set of keywords
+            (dict(str, num)): the number of occurence of the keyword within the given tokens.
         """
-        if len(weights) < 2:
-            normalized_weights = [0.5, 0.5]
-        else:
-            # need to normalize the weights as the final weights all sum up to 1.0
-            denominator = sum(weights[:2])
-            if denominator == 0:
-                print("Error: Sum of all weights must not be 0")
-                return 0
-            normalized_weights = [w / denominator for w in weights[:2]]
-
-        topic_sentence_match_count = sum(
-            topic_sentence_keyword_freq.get(key, 0) for key in keywords
-        )
-        non_topic_sentences_match_count = sum(
-            non_topic_sentence_keyword_freq.get(key, 0) for key in keywords
+        return self.get_keyword_matcher(keys, need_lemma=need_lemma).count_keywords(
+            self.get_lowercase_words_from_tokens(tokens, need_lemma=need_lemma)
         )
 
-        return (
-            normalized_weights[0] * topic_sentence_match_count
-            + normalized_weights[1] * non_topic_sentences_match_count
-        )
+    def get_lowercase_words_from_tokens(self, tokens, need_lemma=True):
+        """Get the lowercase words of already parsed Spacy tokens, which is the form the keywords are matched against
 
-    def rank_paragraphs_by_relevant_score(self, paragraphs, num_paragraphs):
-        """Rank the paragraphs based on the relevant score. The score is determined by the occurrence of a certain keywords. A number of top paragraphs will be returned.
         Args:
-            processed_segments (dictionary): a dictionary of segments after identifying topic sentences, keyword occurrences, and relevant score.
+            tokens (iter(spacy.tokens.Token)): a parsed Doc, a sentence Span or any other sequence of tokens
+            need_lemma (bool): the flag to indicate whether the lemma or the original text of a token is returned (Default True).
+
         Returns:
-            (list): ranked paragraphs
+            (list(str)): the list of lowercase words
         """
-        # If all paragraphs have 0 relevance, then return all of them
-        if (all(element.get("relevant_score") == 0 for element in paragraphs)):
-            return paragraphs
-        # Otherwise, sort them by relevance and return the top num_paragraphs
-        else:
-            ranked_paragraphs = sorted(
-                paragraphs, key=lambda x: x.get("relevant_score"), reverse=True
-            )
-
-            # don't need to check len here, python slice already automatically checks for list len
-            return ranked_paragraphs[:num_paragraphs]
+        # We keep every token in lowercase.
+        return [word.lower() for word in self.get_words_from_tokens(tokens, need_lemma=need_lemma)]
 
-    def sanitise_text(self, text):
-        """Sanitise a given text by eliminating a set of special characters.
+    def get_keyword_matcher(self, keywords, need_lemma=True):
+        """Get a keyword matcher for a collection of keywords
 
         Args:
-            (string): a text content
+            keywords (iter(str) or KeywordMatcher): the keywords, or a keyword matcher which has already been built
+            need_lemma (bool): the flag to indicate whether the keywords are matched against lemmas (Default True).
 
         Returns:
-            (string): a sanitised text.
+            (KeywordMatcher): the keyword matcher of the given keywords
         """
-        return re.sub(REMOVE_CHARACTERS, " ", text)
+        if isinstance(keywords, KeywordMatcher):
+            return keywords
+        return KeywordMatcher(keywords, need_lemma=need_lemma)
 
-    def process_inputs_for_bert(self, sentences):
-        """Convert a list of sentences to the format BERT expect
+    def sanitise_text(self, text):
+        """Sanitise a given text by eliminating a set of special characters.
 
         Args:
-            sentences (list): list of sentences in string
+            (string): a text content
 
         Returns:
-            list: list of sentences but split into features expected by BERT
+            (string): a sanitised text.
         """
-        input_sents = tf.data.Dataset.from_tensor_slices(
-            (sentences, [0] * len(sentences))
-        )
-        input_sents = input_sents.map(to_feature_map).batch(1)
-        return input_sents
\ No newline at end of file
+        return re.sub(REMOVE_CHARACTERS, " ", text)
@@ -0,0 +1,801 @@
+import numpy as np
+from bisect import bisect_left
+from functools import partial
+from itertools import chain
+from ..parameters import (
+    NUM_TOKENS_LOWER_LIMIT,
+    ZERO_RELEVANCE_FALLBACK,
+    ZERO_RELEVANCE_NUM_PARAGRAPHS,
+    ZERO_RELEVANCE_SENTENCE_BUDGET,
+    SENTENCE_SELECTION,
+    SENTENCE_WINDOW,
+    MAX_SENTENCES,
+    INFERENCE_BATCH_SIZE,
+    INFERENCE_NUM_PARALLEL_CALLS,
+    INFERENCE_PREFETCH_BUFFER_SIZE,
+    INFERENCE_LENGTH_BUCKETS,
+    VECTORIZED_FEATURES,
+    MAX_INPUT_SEQUENCES,
+    NUM_SPECIAL_TOKENS,
+)
+
+KEYWORD_OCCURENCE_STATISTICS = ["topic_keyword_occurence", "non_topic_keyword_occurence"]
+# only vectorized if every paragraph has it, see `ParagraphsExtractor.add_headings`
+HEADING_KEYWORD_OCCURENCE_STATISTIC = "heading_keyword_occurence"
+# the sparse TF-IDF weights of the keywords, only there if the paragraphs are scored with the TF-IDF index
+TFIDF_KEYWORD_OCCURENCE_STATISTIC = "tfidf_keyword_occurence"
+# the keyword counted for each keyword with the same words as another one, see `KeywordMatcher.aliases`
+KEYWORD_ALIASES = "keyword_aliases"
+ZERO_RELEVANCE_FALLBACKS = ["sentence_budget", "first", "any_keyword", "all"]
+SENTENCE_SELECTIONS = ["paragraphs", "sentences"]
+BUDGET_UNITS = ["sentences", "tokens"]
+# the statistics with one value per sentence of the paragraph
+SENTENCE_STATISTICS = ["sentences", "sentence_token_counts", "sentence_keywords"]
+
+
+class ParagraphsSelector:
+    """
+    Second component in preprocessing pipeline, used by every criteria. This is a pure compotent - no states
+
+    - Score the relevance of paragraphs from their pre-calculated statistics
+    - Select the most relevant paragraphs
+    - Prepare their sentences for BERT
+
+    It only relies on the statistics calculated by `ParagraphsExtractor`, so it does not need a Spacy model.
+    """
+
+    def get_relevant_score_by_keyword_occurence(
+        self,
+        topic_sentence_keyword_freq,
+        non_topic_sentence_keyword_freq,
+        weights,
+        keywords=[],
+    ):
+        """Calculate the relevant score of a paragraph.
+
+        The formula for the relevance score
+            score =  C_t x w_t + C_nt x w_nt
+
+        where
+            C_t: the number of matched keywords in the topic sentence.
+            C_nt: the number of matched keywords in the non topic sentences.
+            w_t: the weight allocated for the topic sentence.
+            w_nt: the weight allocated for the non-topic sentences.
+
+        Args:
+            topic_sentence_keyword_freq (dict(str, num)): pre-calculated keyword occurence dictionary for topic sentence.
+            non_topic_sentence_keyword_freq (dict(str, num)): pre-calculated keyword occurence dictionary for non-topic sentences.
+            weights (list(num)): the list of weights for the relevance score formula.
+                (Default to [1, 1], i.e. the keyword occurrence in the topic sentence
+                will have the same impact as the keyword occurence in the non-topic sentences).
+            keywords (iter(str)): collection of concerned keywords
+
+        Returns:
+            score (num): the overall relevant score of a particular paragraph against a set of keywords
+        """
+        # need to normalize the weights as the final weights all sum up to 1.0
+        normalized_weights = self.get_normalized_weights(weights)
+        if normalized_weights is None:
+            return 0
+
+        topic_sentence_match_count = sum(
+            topic_sentence_keyword_freq.get(key, 0) for key in keywords
+        )
+        non_topic_sentences_match_count = sum(
+            non_topic_sentence_keyword_freq.get(key, 0) for key in keywords
+        )
+
+        return (
+            normalized_weights[0] * topic_sentence_match_count
+            + normalized_weights[1] * non_topic_sentences_match_count
+        )
+
+    def get_normalized_weights(self, weights):
+        """Normalize the weights of the relevance score formula, so they sum up to 1.0
+
+        Args:
+            weights (list(num)): the weights for the topic sentence and the non-topic sentences.
+                Default to [0.5, 0.5] if fewer than 2 weights are given.
+
+        Returns:
+            (list(num)) or None: the normalized weights, or None if the weights sum up to 0
+        """
+        if len(weights) < 2:
+            return [0.5, 0.5]
+
+        denominator = sum(weights[:2])
+        if denominator == 0:
+            print("Error: Sum of all weights must not be 0")
+            return None
+        return [w / denominator for w in weights[:2]]
+
+    def vectorize_keyword_occurence(self, paragraphs_stats, keywords, keyword_aliases=None):
+        """Move the keyword occurence dictionaries of the paragraph statistics into paragraphs x keywords count matrices
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph, as calculated by `ParagraphsExtractor`
+            keywords (list(str)): the lowercase keywords of all criteria, i.e. the columns of the matrices
+            keyword_aliases (dict(str, str)): the column of each keyword with the same words as a column,
+                see `KeywordMatcher.aliases`
+
+        Returns:
+            (tuple(list(dict), dict)): the paragraph statistics without their keyword occurence dictionaries,
+                and the keyword occurence with the keywords and the topic / non-topic (and heading) count matrices
+        """
+        statistics = KEYWORD_OCCURENCE_STATISTICS
+        if len(paragraphs_stats) > 0 and all(HEADING_KEYWORD_OCCURENCE_STATISTIC in stat for stat in paragraphs_stats):
+            statistics = KEYWORD_OCCURENCE_STATISTICS + [HEADING_KEYWORD_OCCURENCE_STATISTIC]
+
+        keyword_occurence = {"keywords": list(keywords), KEYWORD_ALIASES: dict(keyword_aliases or {})}
+        for statistic in statistics:
+            keyword_occurence[statistic] = np.array(
+                [
+                    [stat.get(statistic).get(key, 0) for key in keywords]
+                    for stat in paragraphs_stats
+                ],
+                dtype=np.int32,
+            ).reshape(len(paragraphs_stats), len(keywords))
+
+        stats_without_keyword_occurence = [
+            {key: value for key, value in stat.items() if key not in statistics}
+            for stat in paragraphs_stats
+        ]
+        return stats_without_keyword_occurence, keyword_occurence
+
+    def get_keyword_weights(self, keywords, keyword_aliases=None):
+        """Get the weight of every counted keyword for a set of criteria-specific keywords
+
+        A keyword listed twice by a criteria is counted twice, the same as `get_relevant_score_by_keyword_occurence`,
+        but the keywords with the same words (e.g. "opt-out" and "opt out") are a single keyword, counted once.
+
+        Args:
+            keywords (iter(str)): collection of concerned keywords
+            keyword_aliases (dict(str, str)): the keyword counted for each keyword with the same words as another one
+
+        Returns:
+            (dict(str, int)): the weight of every lowercase counted keyword
+        """
+        keyword_aliases = keyword_aliases or {}
+        spelling_counts = {}
+        for key in keywords:
+            spelling_counts[key.lower()] = spelling_counts.get(key.lower(), 0) + 1
+
+        keyword_weights = {}
+        for key, count in spelling_counts.items():
+            key = keyword_aliases.get(key, key)
+            keyword_weights[key] = max(keyword_weights.get(key, 0), count)
+        return keyword_weights
+
+    def get_keyword_weight_vector(self, keyword_occurence, keywords):
+        """Get the weight of every column of the keyword occurence matrices for a set of criteria-specific keywords, see `get_keyword_weights`
+
+        Args:
+            keyword_occurence (dict): the keyword occurence with the keywords and the count matrices
+            keywords (iter(str)): collection of concerned keywords
+
+        Returns:
+            (numpy.ndarray): the number of times each column is a concerned keyword
+        """
+        columns = {key: column for column, key in enumerate(keyword_occurence.get("keywords"))}
+        weight_vector = np.zeros(len(columns), dtype=np.float64)
+        for key, weight in self.get_keyword_weights(keywords, keyword_occurence.get(KEYWORD_ALIASES)).items():
+            column = columns.get(key)
+            if column is not None:
+                weight_vector[column] += weight
+        return weight_vector
+
+    def get_relevant_scores(self, keyword_occurence, weights, keywords):
+        """Calculate the relevant scores of all paragraphs at once.
+
+        This is the same formula as `get_relevant_score_by_keyword_occurence`, calculated with two matrix-vector products
+        over the keyword occurence matrices instead of one dictionary lookup per paragraph and keyword.
+
+        If the keyword occurence has the TF-IDF weights of the keywords, the score is instead their sum over the
+        concerned keywords, i.e. a single sparse matrix-vector product, and the topic / non-topic weights are not used.
+        A paragraph still has a score above 0 if and only if it has a concerned keyword, see `TfidfIndex.get_missing_keywords`.
+
+        Args:
+            keyword_occurence (dict): the keyword occurence with the keywords and the topic / non-topic count matrices
+            weights (list(num)): the list of weights for the relevance score formula.
+            keywords (iter(str)): collection of concerned keywords
+
+        Returns:
+            (numpy.ndarray): the relevant score of every paragraph
+        """
+        topic_occurence = keyword_occurence.get("topic_keyword_occurence")
+        non_topic_occurence = keyword_occurence.get("non_topic_keyword_occurence")
+
+        normalized_weights = self.get_normalized_weights(weights)
+        if normalized_weights is None:
+            return np.zeros(topic_occurence.shape[0])
+
+        keyword_weight_vector = self.get_keyword_weight_vector(keyword_occurence, keywords)
+        tfidf_occurence = keyword_occurence.get(TFIDF_KEYWORD_OCCURENCE_STATISTIC)
+        if tfidf_occurence is not None:
+            return np.asarray(tfidf_occurence @ keyword_weight_vector).ravel()
+        return (
+            normalized_weights[0] * (topic_occurence @ keyword_weight_vector)
+            + normalized_weights[1] * (non_topic_occurence @ keyword_weight_vector)
+        )
+
+    def get_heading_scores(self, keyword_occurence, keywords):
+        """Calculate the heading keyword score of all paragraphs at once, i.e. the number of concerned keywords in their heading
+
+        Args:
+            keyword_occurence (dict): the keyword occurence with the keywords and the count matrices
+            keywords (iter(str)): collection of concerned keywords
+
+        Returns:
+            (numpy.ndarray): the heading score of every paragraph, 0 if the headings were not counted
+        """
+        heading_occurence = keyword_occurence.get(HEADING_KEYWORD_OCCURENCE_STATISTIC)
+        if heading_occurence is None:
+            return np.zeros(keyword_occurence.get("topic_keyword_occurence").shape[0])
+        return heading_occurence @ self.get_keyword_weight_vector(keyword_occurence, keywords)
+
+    def get_relevant_sections_mask(self, section_ids, scores, heading_scores):
+        """Find the paragraphs of the sections whose heading or paragraphs have a concerned keyword
+
+        Args:
+            section_ids (list(int)): the index of the section of every paragraph
+            scores (numpy.ndarray): the relevant score of every paragraph
+            heading_scores (numpy.ndarray): the heading score of every paragraph
+
+        Returns:
+            (numpy.ndarray): True for every paragraph of a section with a score above 0
+        """
+        section_ids = np.asarray(section_ids, dtype=np.int64)
+        if len(section_ids) == 0:
+            return np.zeros(0, dtype=bool)
+        section_scores = np.bincount(section_ids, weights=scores + heading_scores)
+        return section_scores[section_ids] > 0
+
+    def select_keyword_occurence(self, keyword_occurence, indices):
+        """Keep the rows of some paragraphs in the keyword occurence matrices
+
+        Args:
+            keyword_occurence (dict): the keyword occurence with the keywords and the count matrices
+            indices (list(int)): the indices of the kept paragraphs
+
+        Returns:
+            (dict): the keyword occurence of the kept paragraphs
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return {
+            key: value if key in ("keywords", KEYWORD_ALIASES) else value[indices]
+            for key, value in keyword_occurence.items()
+        }
+
+    def get_top_indices(self, scores, num_top):
+        """Get the indices of the highest scores, from the highest to the lowest score.
+
+        Equal scores keep their original order, so the result is the same as a stable sort of all scores,
+        but only the top scores are sorted.
+
+        Args:
+            scores (numpy.ndarray): the scores
+            num_top (int): the number of indices to return
+
+        Returns:
+            (numpy.ndarray): the indices of the top scores
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        num_scores = len(scores)
+        if num_top <= 0 or num_scores == 0:
+            return np.array([], dtype=np.int64)
+
+        if num_top < num_scores:
+            # find the lowest score which still makes the top, without sorting every score
+            kth_index = np.argpartition(scores, num_scores - num_top)[num_scores - num_top]
+            kth_score = scores[kth_index]
+            above_kth = np.flatnonzero(scores > kth_score)
+            equal_kth = np.flatnonzero(scores == kth_score)[: num_top - len(above_kth)]
+            candidates = np.concatenate([above_kth, equal_kth])
+        else:
+            candidates = np.arange(num_scores)
+
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def select_top_paragraphs(self, paragraphs_stats, scores, num_paragraphs):
+        """Select the most relevant paragraphs from their relevant scores
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph
+            scores (numpy.ndarray): the relevant score of every paragraph
+            num_paragraphs (int): the number of paragraphs to select
+
+        Returns:
+            (list(dict)): the statistics of the selected paragraphs, from the most to the least relevant
+        """
+        # If all paragraphs have 0 relevance, then return all of them
+        if not np.any(scores):
+            return paragraphs_stats
+
+        return [paragraphs_stats[i] for i in self.get_top_indices(scores, num_paragraphs)]
+
+    def select_paragraphs(
+        self,
+        paragraphs_stats,
+        scores,
+        num_paragraphs,
+        keyword_occurence=None,
+        fallback=ZERO_RELEVANCE_FALLBACK,
+        budget=None,
+        count_tokens=None,
+    ):
+        """Select the most relevant paragraphs, or fall back to a bounded selection if no paragraph is relevant
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph
+            scores (numpy.ndarray): the relevant score of every paragraph
+            num_paragraphs (int): the number of paragraphs to select
+            keyword_occurence (dict): the keyword occurence of all criteria, only needed by the "any_keyword" fallback
+            fallback (str): the selection used when every paragraph has 0 relevance, one of `ZERO_RELEVANCE_FALLBACKS`
+            budget (dict): if given, the relevant paragraphs are selected until this budget is filled instead of
+                `num_paragraphs`, see `select_paragraphs_by_budget`
+            count_tokens (callable): the number of tokens of a sentence, for a budget in "tokens"
+
+        Returns:
+            (tuple(list(dict), bool)): the statistics of the selected paragraphs, and whether the fallback was used
+        """
+        if np.any(scores):
+            if budget is not None:
+                return self.select_paragraphs_by_budget(
+                    paragraphs_stats, self.get_relevant_indices(scores), budget, count_tokens
+                ), False
+            return [paragraphs_stats[i] for i in self.get_top_indices(scores, num_paragraphs)], False
+        return self.select_zero_relevance_paragraphs(paragraphs_stats, keyword_occurence, fallback), True
+
+    def get_relevant_indices(self, scores):
+        """Get the indices of the paragraphs with a score above 0, from the highest to the lowest score
+
+        Args:
+            scores (numpy.ndarray): the relevant score of every paragraph
+
+        Returns:
+            (list(int)): the indices of the relevant paragraphs
+        """
+        return list(self.get_top_indices(scores, int(np.count_nonzero(scores > 0))))
+
+    def select_paragraphs_by_budget(
+        self,
+        paragraphs_stats,
+        order,
+        budget,
+        count_tokens=None,
+        min_num_tokens=NUM_TOKENS_LOWER_LIMIT,
+    ):
+        """Select paragraphs in the given order, with their valid sentences, until a budget is filled
+
+        The last selected paragraph is cut before its first valid sentence which does not fit in the budget,
+        and no paragraph after it is selected, so the sentences sent to BERT never cost more than the budget.
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph, with their sentences and sentence token counts
+            order (list(int)): the indices of the paragraphs, in the order they are selected
+            budget (dict): the "size" of the budget and its "unit", one of `BUDGET_UNITS`
+            count_tokens (callable): the number of tokens of a sentence, for the "tokens" unit, see `get_sentence_cost`
+            min_num_tokens (int): the minimum number of tokens of a valid sentence
+
+        Returns:
+            (list(dict)): the statistics of the selected paragraphs, in the given order
+        """
+        selected = []
+        used = 0
+        for i in order:
+            stat = paragraphs_stats[i]
+            sentences = stat.get("sentences")
+            end = len(sentences)
+            for j, (sentence, num_tokens) in enumerate(zip(sentences, stat.get("sentence_token_counts"))):
+                if num_tokens < min_num_tokens:
+                    continue
+                cost = self.get_sentence_cost(sentence, num_tokens, budget["unit"], count_tokens)
+                if used + cost > budget["size"]:
+                    end = j
+                    break
+                used += cost
+
+            if end == len(sentences):
+                selected.append(stat)
+                continue
+            if end > 0:
+                selected.append({**stat, **{key: stat[key][:end] for key in SENTENCE_STATISTICS if key in stat}})
+            break
+        return selected
+
+    def get_budget_count_tokens(self, budget):
+        """Get the WordPiece token counter of a budget, see `get_sentence_cost`
+
+        The feature builder of the default tokeniser is only created for a budget in "tokens".
+
+        Args:
+            budget (dict): the budget, with its `size` and `unit`, or None
+
+        Returns:
+            (callable): the number of tokens of a sentence in BERT input, or None if the budget is not in tokens
+        """
+        if budget is None or budget.get("unit") != "tokens":
+            return None
+        from ..models.bert.features import get_default_feature_builder
+
+        return get_default_feature_builder().count_tokens
+
+    def get_sentence_cost(self, sentence, num_tokens, unit, count_tokens=None):
+        """Get the cost of a valid sentence in a budget
+
+        Args:
+            sentence (str): the sentence
+            num_tokens (int): the number of words of the sentence, see `ParagraphsExtractor.get_doc_statistics`
+            unit (str): the unit of the budget, one of `BUDGET_UNITS`
+            count_tokens (callable): the number of WordPiece tokens of a sentence in BERT input. If None, the number of
+                words of the sentence and the special tokens is used, which is never more than its WordPiece tokens.
+
+        Returns:
+            (int): the cost of the sentence
+        """
+        if unit == "sentences":
+            return 1
+        if unit == "tokens":
+            if count_tokens is not None:
+                return count_tokens(sentence)
+            return min(num_tokens + NUM_SPECIAL_TOKENS, MAX_INPUT_SEQUENCES)
+        raise ValueError("Unknown budget unit {}, expected one of {}".format(unit, BUDGET_UNITS))
+
+    def select_zero_relevance_paragraphs(
+        self,
+        paragraphs_stats,
+        keyword_occurence,
+        fallback,
+        num_paragraphs=ZERO_RELEVANCE_NUM_PARAGRAPHS,
+        sentence_budget=ZERO_RELEVANCE_SENTENCE_BUDGET,
+    ):
+        """Select a bounded number of paragraphs when none of them contains any concerned keyword
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph
+            keyword_occurence (dict): the keyword occurence of all criteria, only needed by the "any_keyword" fallback
+            fallback (str): the selection strategy, one of `ZERO_RELEVANCE_FALLBACKS`
+            num_paragraphs (int): the number of paragraphs selected by the "first" and "any_keyword" fallbacks
+            sentence_budget (int): the number of valid sentences selected by the "sentence_budget" fallback
+
+        Returns:
+            (list(dict)): the statistics of the selected paragraphs
+        """
+        if fallback == "sentence_budget":
+            return self.select_first_sentences(paragraphs_stats, sentence_budget)
+        indices = self.get_zero_relevance_indices(len(paragraphs_stats), keyword_occurence, fallback, num_paragraphs)
+        return [paragraphs_stats[i] for i in indices]
+
+    def select_paragraph_indices(
+        self,
+        scores,
+        num_paragraphs,
+        keyword_occurence=None,
+        fallback=ZERO_RELEVANCE_FALLBACK,
+        budget=None,
+        num_fallback_paragraphs=ZERO_RELEVANCE_NUM_PARAGRAPHS,
+        sentence_budget=ZERO_RELEVANCE_SENTENCE_BUDGET,
+    ):
+        """Get the indices of the paragraphs `select_paragraphs` selects, before their sentences are known
+
+        Args:
+            scores (numpy.ndarray): the relevant score of every paragraph
+            num_paragraphs (int): the number of paragraphs to select
+            keyword_occurence (dict): the keyword occurence of all criteria, only needed by the "any_keyword" fallback
+            fallback (str): the selection used when every paragraph has 0 relevance, one of `ZERO_RELEVANCE_FALLBACKS`
+            budget (dict): if given, the relevant paragraphs are selected until this budget is filled
+            num_fallback_paragraphs (int): the number of paragraphs selected by the "first" and "any_keyword" fallbacks
+            sentence_budget (int): the number of valid sentences selected by the "sentence_budget" fallback
+
+        Returns:
+            (tuple(list(int), dict)): the indices of the selected paragraphs and None, or, if the selection depends on
+                the sentences of the paragraphs, the order in which they are selected and the budget they fill
+        """
+        if np.any(scores):
+            if budget is not None:
+                return self.get_relevant_indices(scores), budget
+            return list(self.get_top_indices(scores, num_paragraphs)), None
+        if fallback == "sentence_budget":
+            return list(range(len(scores))), {"size": sentence_budget, "unit": "sentences"}
+        return self.get_zero_relevance_indices(len(scores), keyword_occurence, fallback, num_fallback_paragraphs), None
+
+    def get_zero_relevance_indices(self, num_total, keyword_occurence, fallback, num_paragraphs):
+        """Get the indices of the paragraphs selected by the fallbacks which do not depend on the sentences
+
+        Args:
+            num_total (int): the number of paragraphs of the policy
+            keyword_occurence (dict): the keyword occurence of all criteria, only needed by the "any_keyword" fallback
+            fallback (str): the selection strategy, one of `ZERO_RELEVANCE_FALLBACKS` except "sentence_budget"
+            num_paragraphs (int): the number of paragraphs selected by the "first" and "any_keyword" fallbacks
+
+        Returns:
+            (list(int)): the indices of the selected paragraphs
+        """
+        if fallback == "first":
+            return list(range(min(num_paragraphs, num_total)))
+        if fallback == "any_keyword":
+            # the keywords of the other criteria are a cheap hint of the paragraphs about privacy at all
+            scores = self.get_relevant_scores(keyword_occurence, [2, 1], keyword_occurence.get("keywords"))
+            if not np.any(scores):
+                return list(range(min(num_paragraphs, num_total)))
+            return list(self.get_top_indices(scores, num_paragraphs))
+        if fallback == "all":
+            return list(range(num_total))
+        raise ValueError(
+            "Unknown zero relevance fallback {}, expected one of {}".format(fallback, ZERO_RELEVANCE_FALLBACKS)
+        )
+
+    def select_first_sentences(self, paragraphs_stats, sentence_budget, min_num_tokens=NUM_TOKENS_LOWER_LIMIT):
+        """Select the first paragraphs until they have a number of sentences valid for BERT input
+
+        The last selected paragraph is cut, so exactly `sentence_budget` valid sentences are selected
+        if the paragraphs have enough of them.
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of every paragraph, with their sentences and sentence token counts
+            sentence_budget (int): the number of valid sentences to select
+            min_num_tokens (int): the minimum number of tokens of a valid sentence
+
+        Returns:
+            (list(dict)): the statistics of the selected paragraphs, in their original order
+        """
+        selected = []
+        num_sentences = 0
+        for stat in paragraphs_stats:
+            if num_sentences >= sentence_budget:
+                break
+            token_counts = stat.get("sentence_token_counts")
+            num_valid = sum(1 for num_tokens in token_counts if num_tokens >= min_num_tokens)
+            if num_sentences + num_valid <= sentence_budget:
+                selected.append(stat)
+                num_sentences += num_valid
+                continue
+
+            # keep the sentences of the last paragraph up to its last valid sentence within the budget
+            end = 0
+            while num_sentences < sentence_budget:
+                if token_counts[end] >= min_num_tokens:
+                    num_sentences += 1
+                end += 1
+            selected.append(
+                {
+                    **stat,
+                    **{key: stat[key][:end] for key in SENTENCE_STATISTICS if key in stat},
+                }
+            )
+        return selected
+
+    def rank_paragraphs_by_relevant_score(self, paragraphs, num_paragraphs):
+        """Rank the paragraphs based on the relevant score. The score is determined by the occurrence of a certain keywords. A number of top paragraphs will be returned.
+        Args:
+            processed_segments (dictionary): a dictionary of segments after identifying topic sentences, keyword occurrences, and relevant score.
+        Returns:
+            (list): ranked paragraphs
+        """
+        scores = np.array([element.get("relevant_score") for element in paragraphs], dtype=np.float64)
+        return self.select_top_paragraphs(paragraphs, scores, num_paragraphs)
+
+    def get_sentences_for_bert(self, paragraphs_stats, min_num_tokens=NUM_TOKENS_LOWER_LIMIT):
+        """Get the sentences of the selected paragraphs which have enough tokens to be valid for BERT input
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of the selected paragraphs, with their sentences and sentence token counts
+            min_num_tokens (int): the minimum number of tokens of a valid sentence
+
+        Returns:
+            (list(str)): the valid sentences, in the order of the given paragraphs
+        """
+        sentences_with_token_counts = chain.from_iterable(
+            zip(stat.get("sentences"), stat.get("sentence_token_counts"))
+            for stat in paragraphs_stats
+        )
+        return [
+            sentence
+            for sentence, num_tokens in sentences_with_token_counts
+            if num_tokens >= min_num_tokens
+        ]
+
+    def get_candidate_sentences(
+        self,
+        paragraphs_stats,
+        keywords,
+        zero_relevance_fallback=False,
+        selection=SENTENCE_SELECTION,
+        window=SENTENCE_WINDOW,
+        max_sentences=MAX_SENTENCES,
+        min_num_tokens=NUM_TOKENS_LOWER_LIMIT,
+        keyword_aliases=None,
+    ):
+        """Get the sentences of the selected paragraphs which are sent to BERT
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of the selected paragraphs
+            keywords (iter(str)): collection of concerned keywords
+            zero_relevance_fallback (bool): whether the paragraphs were selected by the zero relevance fallback,
+                in which case no sentence has any concerned keyword and every valid sentence is sent
+            selection (str): "paragraphs" to send every valid sentence, "sentences" to only send the best scoring ones
+            window (int): the number of neighbour sentences on each side which add their keywords to the score of a sentence
+            max_sentences (int): the maximum number of sentences sent in the "sentences" selection
+            min_num_tokens (int): the minimum number of tokens of a valid sentence
+            keyword_aliases (dict(str, str)): the keyword counted for each keyword with the same words as another one
+
+        Returns:
+            (list(str)): the sentences, in the order of the given paragraphs
+        """
+        if selection not in SENTENCE_SELECTIONS:
+            raise ValueError(
+                "Unknown sentence selection {}, expected one of {}".format(selection, SENTENCE_SELECTIONS)
+            )
+        if selection == "paragraphs" or zero_relevance_fallback:
+            return self.get_sentences_for_bert(paragraphs_stats, min_num_tokens)
+        return self.select_best_sentences(
+            paragraphs_stats, keywords, window, max_sentences, min_num_tokens, keyword_aliases=keyword_aliases
+        )
+
+    def select_best_sentences(
+        self,
+        paragraphs_stats,
+        keywords,
+        window=SENTENCE_WINDOW,
+        max_sentences=MAX_SENTENCES,
+        min_num_tokens=NUM_TOKENS_LOWER_LIMIT,
+        keyword_aliases=None,
+    ):
+        """Select the valid sentences with the most concerned keywords around them
+
+        The score of a sentence is the number of concerned keywords in it and in the `window` sentences before and after it
+        within the same paragraph, so a sentence next to a keyword is kept with it. The sentences which score 0 are never
+        selected, and equal scores are broken by the keywords of the sentence itself, then by the order of the paragraphs.
+
+        Args:
+            paragraphs_stats (list(dict)): the statistics of the selected paragraphs, with their sentence keywords
+            keywords (iter(str)): collection of concerned keywords, weighted by `get_keyword_weights`
+            window (int): the number of neighbour sentences on each side which add their keywords to the score of a sentence
+            max_sentences (int): the maximum number of selected sentences
+            min_num_tokens (int): the minimum number of tokens of a valid sentence
+            keyword_aliases (dict(str, str)): the keyword counted for each keyword with the same words as another one
+
+        Returns:
+            (list(str)): the selected sentences, in the order of the given paragraphs
+        """
+        keyword_weights = self.get_keyword_weights(keywords, keyword_aliases)
+
+        candidates = []
+        for stat in paragraphs_stats:
+            hits = [
+                sum(keyword_weights.get(key, 0) for key in sentence_keywords)
+                for sentence_keywords in stat.get("sentence_keywords")
+            ]
+            for i, (sentence, num_tokens) in enumerate(zip(stat.get("sentences"), stat.get("sentence_token_counts"))):
+                score = sum(hits[max(0, i - window) : i + window + 1])
+                if num_tokens >= min_num_tokens and score > 0:
+                    candidates.append((score, hits[i], len(candidates), sentence))
+
+        best = sorted(candidates, key=lambda candidate: (-candidate[0], -candidate[1], candidate[2]))[:max_sentences]
+        return [sentence for _, _, _, sentence in sorted(best, key=lambda candidate: candidate[2])]
+
+    def process_inputs_for_bert(
+        self,
+        sentences,
+        batch_size=INFERENCE_BATCH_SIZE,
+        num_parallel_calls=INFERENCE_NUM_PARALLEL_CALLS,
+        prefetch_buffer_size=INFERENCE_PREFETCH_BUFFER_SIZE,
+        max_seq_length=MAX_INPUT_SEQUENCES,
+    ):
+        """Convert a list of sentences to the format BERT expect
+
+        The sentences are converted in parallel but keep their order, and the next batches are converted while
+        BERT predicts the current one.
+
+        Args:
+            sentences (list): list of sentences in string
+            batch_size (int): number of sentences BERT predicts at once
+            num_parallel_calls (int): number of sentences converted in parallel, -1 lets TensorFlow tune it
+            prefetch_buffer_size (int): number of batches converted in advance, -1 lets TensorFlow tune it, 0 disables it
+            max_seq_length (int): number of tokens every sentence is truncated or padded to
+
+        Returns:
+            tf.data.Dataset: batches of sentences split into features expected by BERT
+        """
+        # TensorFlow is only imported by the criteria processes, see `models.bert.utils.init_default_tokeniser`
+        import tensorflow as tf
+        from ..models.bert.utils import to_feature_map
+
+        input_sents = tf.data.Dataset.from_tensor_slices(
+            (sentences, [0] * len(sentences))
+        )
+        input_sents = input_sents.map(
+            partial(to_feature_map, max_seq_length=max_seq_length),
+            num_parallel_calls=tf.data.AUTOTUNE if num_parallel_calls == -1 else num_parallel_calls,
+            deterministic=True,
+        ).batch(batch_size)
+        if prefetch_buffer_size != 0:
+            input_sents = input_sents.prefetch(tf.data.AUTOTUNE if prefetch_buffer_size == -1 else prefetch_buffer_size)
+        return input_sents
+
+    def predict_batches(self, model, sentences, max_seq_length=MAX_INPUT_SEQUENCES):
+        """Predict the labels of sentences in batches of `INFERENCE_BATCH_SIZE`
+
+        With `VECTORIZED_FEATURES`, the features of all sentences are built at once as NumPy arrays,
+        otherwise the sentences go through the `tf.data` pipeline of `process_inputs_for_bert`.
+
+        Args:
+            model (tf.keras.Model): the criteria model
+            sentences (list(str)): the sentences fed into BERT
+            max_seq_length (int): number of tokens every sentence is truncated or padded to
+
+        Returns:
+            (list): the labels the model predicts for each sentence, in the same order
+        """
+        if VECTORIZED_FEATURES:
+            from ..models.bert.features import get_default_feature_builder
+
+            features = get_default_feature_builder().build_features(sentences, max_seq_length=max_seq_length)
+            return model.predict(features, batch_size=INFERENCE_BATCH_SIZE)
+        return model.predict(self.process_inputs_for_bert(sentences, max_seq_length=max_seq_length))
+
+    def predict_sentences(self, model, sentences, previous_predictions=None):
+        """Predict the labels of sentences, only running the model on the sentences without a previous prediction
+
+        A sentence assessed more than once is only predicted once, as its prediction does not depend on the other sentences.
+
+        Args:
+            model (tf.keras.Model): the criteria model
+            sentences (list(str)): the sentences fed into BERT
+            previous_predictions (dict(str, float)): the raw label of the sentences assessed by the previous assessment
+                of the policy, see `AssessmentArtifact.get_predictions`
+
+        Returns:
+            (list(list(float))): the labels the model predicts for each sentence, in the same order
+        """
+        previous_predictions = previous_predictions or {}
+        new_sentences = [sentence for sentence in dict.fromkeys(sentences) if sentence not in previous_predictions]
+
+        predictions = {}
+        if len(new_sentences) > 0:
+            if INFERENCE_LENGTH_BUCKETS is None:
+                outputs = self.predict_batches(model, new_sentences)
+            elif VECTORIZED_FEATURES:
+                from ..models.bert.features import get_default_feature_builder
+
+                outputs = self.predict_by_length(
+                    model, new_sentences, INFERENCE_LENGTH_BUCKETS, count_tokens=get_default_feature_builder().count_tokens
+                )
+            else:
+                outputs = self.predict_by_length(model, new_sentences, INFERENCE_LENGTH_BUCKETS)
+            predictions = {sentence: [float(label) for label in output] for sentence, output in zip(new_sentences, outputs)}
+        return [predictions[sentence] if sentence in predictions else [previous_predictions[sentence]] for sentence in sentences]
+
+    def predict_by_length(self, model, sentences, length_buckets, count_tokens=None):
+        """Predict the labels of sentences grouped by their number of tokens, each group being padded to its bucket only
+
+        Most sentences are much shorter than `MAX_INPUT_SEQUENCES`, so most of the attention would go to padding.
+        The padding is masked, so a prediction only changes by the rounding of the float operations.
+
+        Args:
+            model (tf.keras.Model): the criteria model
+            sentences (list(str)): the sentences fed into BERT
+            length_buckets (list(int)): the numbers of tokens the sentences are padded to, `MAX_INPUT_SEQUENCES` being
+                always added as the last bucket
+            count_tokens (callable): the number of tokens of a sentence in BERT input, `models.bert.utils.count_tokens`
+                if None
+
+        Returns:
+            (list): the labels the model predicts for each sentence, in the same order as the given sentences
+        """
+        from ..models.bert import utils
+
+        if count_tokens is None:
+            count_tokens = utils.count_tokens
+        boundaries = sorted({min(boundary, MAX_INPUT_SEQUENCES) for boundary in length_buckets} | {MAX_INPUT_SEQUENCES})
+        buckets = {}
+        for i, sentence in enumerate(sentences):
+            boundary = boundaries[bisect_left(boundaries, min(count_tokens(sentence), MAX_INPUT_SEQUENCES))]
+            buckets.setdefault(boundary, []).append(i)
+
+        outputs = [None] * len(sentences)
+        for boundary, indices in sorted(buckets.items()):
+            bucket_outputs = self.predict_batches(model, [sentences[i] for i in indices], max_seq_length=boundary)
+            for i, output in zip(indices, bucket_outputs):
+                outputs[i] = output
+        return outputs
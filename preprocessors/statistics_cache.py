@@ -0,0 +1,163 @@
+import json
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from .utils.spacy_utils import get_cache_key
+from ..parameters import SENTENCE_SEGMENTER
+
+# Bump whenever the content of the paragraph statistics changes, so that outdated statistics are never reused
+STATISTICS_VERSION = 3
+
+
+class StatisticsCache:
+    """
+    Content-addressed cache of paragraph statistics.
+
+    Policies share a lot of boilerplate paragraphs (template policies, SDK disclosures, cookie sections),
+    so the statistics of a paragraph are kept under a hash of its text and of the configuration they depend on
+    (the keywords and whether they are matched by lemma, the Spacy pipeline and the sentence boundaries).
+
+    - A bounded in-memory LRU tier, within the process
+    - An optional SQLite tier, which survives restarts and can be shared by several processes
+
+    The statistics are stored as JSON, so the callers always get their own copy.
+    """
+
+    def __init__(self, max_size, db_path=None):
+        """
+        Args:
+            max_size (int): the maximum number of paragraphs kept in memory, 0 to only use the SQLite tier
+            db_path (str): the path of the SQLite database, or None to only keep the statistics in memory
+        """
+        self.max_size = max_size
+        self.db_path = db_path
+        self.memory = OrderedDict()
+        self.config_keys = {}
+        self.db = None
+        if db_path is not None:
+            self.db = sqlite3.connect(db_path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS paragraph_statistics (key TEXT PRIMARY KEY, statistics TEXT NOT NULL)"
+            )
+            self.db.commit()
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Reset the hit and miss counters"""
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_counters(self):
+        """Get the hit and miss counters since the cache was created or the counters were reset
+
+        Returns:
+            (dict): the number of memory hits, disk hits and misses, and the number of paragraphs in memory
+        """
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": len(self.memory),
+        }
+
+    def get_config_key(self, keyword_matcher, segmenter=SENTENCE_SEGMENTER):
+        """Get the hash of the configuration the statistics depend on
+
+        Args:
+            keyword_matcher (KeywordMatcher): the matcher of the keywords counted in the statistics
+            segmenter (str): the sentence segmenter of the Spacy pipeline
+
+        Returns:
+            (str): the configuration hash
+        """
+        keywords = tuple(keyword_matcher.keywords)
+        memo_key = (keywords, keyword_matcher.need_lemma, segmenter)
+        if memo_key not in self.config_keys:
+            config = {
+                "version": STATISTICS_VERSION,
+                "keywords": keywords,
+                "need_lemma": keyword_matcher.need_lemma,
+                "spacy": get_cache_key(segmenter),
+            }
+            self.config_keys[memo_key] = hashlib.sha1(json.dumps(config).encode("utf-8")).hexdigest()
+        return self.config_keys[memo_key]
+
+    def get_key(self, paragraph, config_key):
+        """Get the cache key of a paragraph
+
+        Args:
+            paragraph (str): the sanitised paragraph content
+            config_key (str): the configuration hash, see `get_config_key`
+
+        Returns:
+            (str): the cache key
+        """
+        return hashlib.sha1("{}\0{}".format(config_key, paragraph).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Get the statistics of a paragraph
+
+        Args:
+            key (str): the cache key of the paragraph
+
+        Returns:
+            (dict): the paragraph statistics, or None if they are not cached
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return json.loads(value)
+
+        if self.db is not None:
+            row = self.db.execute("SELECT statistics FROM paragraph_statistics WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self.put_in_memory(key, row[0])
+                return json.loads(row[0])
+
+        self.misses += 1
+        return None
+
+    def put(self, key, statistics):
+        """Cache the statistics of a paragraph
+
+        The SQLite tier is only written when `commit` is called, so a batch of paragraphs is written at once.
+
+        Args:
+            key (str): the cache key of the paragraph
+            statistics (dict): the paragraph statistics
+        """
+        value = json.dumps(statistics)
+        self.put_in_memory(key, value)
+        if self.db is not None:
+            self.db.execute(
+                "INSERT OR REPLACE INTO paragraph_statistics (key, statistics) VALUES (?, ?)", (key, value)
+            )
+
+    def put_in_memory(self, key, value):
+        """Put a value in the LRU tier, evicting the least recently used values beyond `max_size`
+
+        Args:
+            key (str): the cache key of the paragraph
+            value (str): the paragraph statistics in JSON
+        """
+        if self.max_size <= 0:
+            return
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def commit(self):
+        """Write the statistics cached since the last commit to the SQLite tier"""
+        if self.db is not None:
+            self.db.commit()
+
+    def clear(self):
+        """Remove every cached statistics from both tiers"""
+        self.memory.clear()
+        if self.db is not None:
+            self.db.execute("DELETE FROM paragraph_statistics")
+            self.db.commit()
@@ -0,0 +1,162 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from ..paragraphs_extractor import ParagraphsExtractor
+from ..assessment_artifact import AssessmentArtifact, ARTIFACT_VERSION, SAVED_MODEL_FILE, get_model_version
+
+
+class TestAssessmentArtifact(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the artifact of a previous assessment before EACH test case
+        """
+        self.paragraphs = ["We collect your email.", "We use cookies."]
+        self.sections = [
+            {"heading": "Data we collect", "paragraphs": self.paragraphs[:1]},
+            {"heading": "Cookies", "paragraphs": self.paragraphs[1:]},
+        ]
+        self.keyword_statistics = [
+            {
+                "content": paragraph,
+                "topic_sentence": paragraph,
+                "topic_keyword_occurence": {"email": 1},
+                "non_topic_keyword_occurence": {},
+                "section": i,
+                "heading": self.sections[i]["heading"],
+            }
+            for i, paragraph in enumerate(self.paragraphs)
+        ]
+        self.paragraphs_statistics = [
+            {
+                "content": self.paragraphs[0],
+                "sentences": [self.paragraphs[0]],
+                "sentence_token_counts": [4],
+                "sentence_keywords": [["email"]],
+            },
+            {"content": self.paragraphs[1]},
+        ]
+        self.assessment_results = {
+            "c9": {"final_result": 1, "sentences": [{"text": self.paragraphs[0], "raw_label": 0.75, "rounded_label": 1}]},
+            "c10": -1,
+        }
+        self.report = {"results": self.assessment_results}
+
+        artifact = AssessmentArtifact()
+        artifact.set_statistics(self.keyword_statistics, self.paragraphs_statistics)
+        # the artifacts are stored as JSON
+        self.previous = json.loads(
+            json.dumps(artifact.to_dict(self.sections, None, self.assessment_results, self.report))
+        )
+
+    def test_to_dict(self):
+        self.assertEqual(self.previous["version"], ARTIFACT_VERSION)
+        self.assertListEqual([heading for heading, _ in self.previous["sections"]], ["Data we collect", "Cookies"])
+        paragraph_keys = [key for _, keys in self.previous["sections"] for key in keys]
+        self.assertEqual(len(paragraph_keys), 2)
+        self.assertDictEqual(self.previous["predictions"], {"c9": {self.paragraphs[0]: 0.75}})
+        # the section and heading are not kept, the sentences are kept with the keyword statistics
+        self.assertDictEqual(
+            self.previous["statistics"][paragraph_keys[0]],
+            {
+                "topic_sentence": self.paragraphs[0],
+                "topic_keyword_occurence": {"email": 1},
+                "non_topic_keyword_occurence": {},
+                "sentences": [self.paragraphs[0]],
+                "sentence_token_counts": [4],
+                "sentence_keywords": [["email"]],
+            },
+        )
+        self.assertNotIn("sentences", self.previous["statistics"][paragraph_keys[1]])
+
+    def test_is_unchanged(self):
+        artifact = AssessmentArtifact(self.previous)
+        self.assertTrue(artifact.is_unchanged(self.sections, None))
+        self.assertDictEqual(artifact.get_report(), self.report)
+        self.assertFalse(artifact.is_unchanged(self.sections, "c9"))
+        self.assertFalse(artifact.is_unchanged(self.sections[::-1], None))
+        self.assertFalse(
+            artifact.is_unchanged(self.sections + [{"heading": "Sale", "paragraphs": ["We sell nothing."]}], None)
+        )
+        # the same paragraphs in other sections, or under another heading, are not the same policy
+        self.assertFalse(artifact.is_unchanged([{"heading": "Data we collect", "paragraphs": self.paragraphs}], None))
+        self.assertFalse(
+            artifact.is_unchanged([{**self.sections[0], "heading": "Information we collect"}, self.sections[1]], None)
+        )
+
+    def test_is_unchanged_renamed_heading(self):
+        """
+        A re-crawled policy whose only change is a heading must be assessed again, the headings affecting the
+        pruning of the sections and the relevance of the paragraphs
+        """
+        extractor = ParagraphsExtractor()
+        policy_html = """
+        <h1>Privacy Policy</h1><p>Intro</p>
+        <h2>Data we collect</h2><p>We collect your email.</p>
+        <h2>Cookies</h2><p>We use cookies.</p>
+        <h2>Security</h2><p>We protect your data.</p>
+        <h2>Children's privacy</h2><p>We do not collect the data of children.</p>
+        <h2>Contact us</h2><p>Send us an email.</p>
+        """
+        sections = extractor.get_sections(policy_html)
+        artifact = AssessmentArtifact()
+        previous = json.loads(json.dumps(artifact.to_dict(sections, None, {}, self.report)))
+
+        self.assertTrue(AssessmentArtifact(previous).is_unchanged(extractor.get_sections(policy_html), None))
+        renamed = extractor.get_sections(policy_html.replace("<h2>Cookies</h2>", "<h2>Tracking technologies</h2>"))
+        self.assertListEqual(
+            [section["paragraphs"] for section in renamed], [section["paragraphs"] for section in sections]
+        )
+        self.assertFalse(AssessmentArtifact(previous).is_unchanged(renamed, None))
+
+    def test_outdated_artifacts_are_not_reused(self):
+        for previous in [None, {**self.previous, "config": "other"}, {**self.previous, "version": ARTIFACT_VERSION - 1}]:
+            artifact = AssessmentArtifact(previous)
+            self.assertFalse(artifact.is_unchanged(self.sections, None))
+            self.assertDictEqual(artifact.get_predictions(), {})
+
+    def test_get_model_version(self):
+        """
+        A model saved again must have another version, so that its artifacts get another configuration
+        """
+        model_dir = tempfile.mkdtemp()
+        try:
+            self.assertIsNone(get_model_version(model_dir))
+            model_file = os.path.join(model_dir, SAVED_MODEL_FILE)
+            open(model_file, "w").close()
+            os.utime(model_file, (1000, 1000))
+            self.assertEqual(get_model_version(model_dir), 1000)
+            os.utime(model_file, (2000, 2000))
+            self.assertEqual(get_model_version(model_dir), 2000)
+        finally:
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+    def test_get_statistics(self):
+        """
+        Only the paragraphs which are not in the previous assessment must be processed again
+        """
+        computed = []
+
+        def compute_statistics(paragraphs):
+            computed.extend(paragraphs)
+            return [{"content": paragraph, "topic_sentence": paragraph} for paragraph in paragraphs]
+
+        artifact = AssessmentArtifact(self.previous)
+        paragraphs = ["We sell nothing.", self.paragraphs[0]]
+        actual = artifact.get_statistics(paragraphs, compute_statistics)
+
+        self.assertListEqual(computed, ["We sell nothing."])
+        self.assertDictEqual(actual[0], {"content": "We sell nothing.", "topic_sentence": "We sell nothing."})
+        self.assertListEqual(actual[1]["sentences"], [self.paragraphs[0]])
+        self.assertEqual(actual[1]["content"], self.paragraphs[0])
+        self.assertDictEqual(artifact.get_counters(), {"reused_paragraphs": 1, "changed_paragraphs": 1})
+
+        # the reused statistics are copies
+        actual[1]["sentences"].append("a")
+        self.assertListEqual(artifact.get_statistics(paragraphs[1:], compute_statistics)[0]["sentences"], [self.paragraphs[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
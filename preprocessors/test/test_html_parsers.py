@@ -0,0 +1,88 @@
+import unittest
+import os
+
+from ..html_parsers import BeautifulSoupParser, LxmlParser, NODE_START, NODE_END, NODE_TEXT, get_html_parser
+from ..paragraphs_extractor import ParagraphsExtractor
+from ..utils.json_helper import from_json_file
+
+CURRENT_DIR = os.path.dirname(__file__)
+TEST_POLICY_PATHS = [
+    os.path.join(CURRENT_DIR, "fitbit.json"),
+    os.path.join(CURRENT_DIR, "calm.json"),
+]
+
+
+class TestHtmlParsers(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the instances to be tested before EACH test case
+        """
+        self.policies = [from_json_file(path)["privacyPolicyText"] for path in TEST_POLICY_PATHS]
+        self.bs4_parser = BeautifulSoupParser()
+        self.lxml_parser = LxmlParser()
+
+    def test_get_html_parser(self):
+        self.assertIsInstance(get_html_parser("html.parser"), BeautifulSoupParser)
+        self.assertIsInstance(get_html_parser("lxml"), LxmlParser)
+        with self.assertRaises(ValueError):
+            get_html_parser("unknown")
+
+    def get_events(self, parser, html):
+        """Get the walk of a document, with element names instead of elements"""
+        return [
+            (event[0], parser.get_name(event[1])) if event[0] != NODE_TEXT else event
+            for event in parser.iter_nodes(parser.parse(html))
+        ]
+
+    def test_iter_nodes(self):
+        """
+        Comments have no text, and the strings of scripts and styles belong to their own string containers, the same as BeautifulSoup
+        """
+        html = "<h1>Title<!-- hidden --> here</h1><p>a<b>b</b><script>var x;</script>c</p>"
+        expected_events = [
+            (NODE_START, "h1"),
+            (NODE_TEXT, "Title", None),
+            (NODE_TEXT, "", None),
+            (NODE_TEXT, " here", None),
+            (NODE_END, "h1"),
+            (NODE_START, "p"),
+            (NODE_TEXT, "a", None),
+            (NODE_START, "b"),
+            (NODE_TEXT, "b", None),
+            (NODE_END, "b"),
+            (NODE_START, "script"),
+            (NODE_TEXT, "var x;", "script"),
+            (NODE_END, "script"),
+            (NODE_TEXT, "c", None),
+            (NODE_END, "p"),
+        ]
+        self.assertListEqual(self.get_events(self.bs4_parser, html), expected_events)
+        # lxml always wraps the document into html and body elements
+        self.assertListEqual(
+            self.get_events(self.lxml_parser, html),
+            [(NODE_START, "html"), (NODE_START, "body")] + expected_events + [(NODE_END, "body"), (NODE_END, "html")],
+        )
+
+    def test_same_segments_on_fixtures(self):
+        """
+        Both backends must produce identical segments and paragraphs
+        """
+        bs4_extractor = ParagraphsExtractor(html_parser_backend="html.parser")
+        lxml_extractor = ParagraphsExtractor(html_parser_backend="lxml")
+        for policy in self.policies:
+            self.assertListEqual(
+                lxml_extractor.get_segments_by_html_tags(policy),
+                bs4_extractor.get_segments_by_html_tags(policy),
+            )
+            self.assertListEqual(
+                lxml_extractor.get_paragraphs(policy),
+                bs4_extractor.get_paragraphs(policy),
+            )
+
+    def test_empty_policy(self):
+        lxml_extractor = ParagraphsExtractor(html_parser_backend="lxml")
+        self.assertListEqual(lxml_extractor.get_paragraphs(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from ..keyword_matcher import KeywordMatcher
+from ..paragraphs_extractor import ParagraphsExtractor
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the instance to be tested before EACH test case
+        """
+        self.matcher = KeywordMatcher(
+            [
+                "address",
+                "address book",
+                "date of birth",
+                "opt-out",
+                "opt out",
+                "single sign on",
+                "facebook single sign on",
+                "Cookie",
+            ]
+        )
+
+    def test_split_keyword(self):
+        self.assertListEqual(self.matcher.split_keyword("Date of Birth"), ["date", "of", "birth"])
+        self.assertListEqual(self.matcher.split_keyword("opt-out"), ["opt", "out"])
+
+    def test_count_keywords_single_word(self):
+        words = ["we", "use", "cookie", "and", "your", "address"]
+        actual = self.matcher.count_keywords(words)
+
+        self.assertEqual(actual["cookie"], 1)
+        self.assertEqual(actual["address"], 1)
+        self.assertEqual(actual["address book"], 0)
+
+    def test_count_keywords_multi_words(self):
+        words = ["your", "address", "book", "and", "date", "of", "birth", "date", "of"]
+        actual = self.matcher.count_keywords(words)
+
+        self.assertEqual(actual["address"], 1)
+        self.assertEqual(actual["address book"], 1)
+        self.assertEqual(actual["date of birth"], 1)
+
+    def test_count_keywords_ignores_punctuations(self):
+        # "opt-out" is split into "opt" and "out" once the punctuations are left out
+        words = ["you", "can", "opt", "out"]
+        actual = self.matcher.count_keywords(words)
+
+        self.assertEqual(actual["opt-out"], 1)
+
+    def test_keywords_with_the_same_words_are_counted_once(self):
+        # "opt out" has the same words as "opt-out", so it is an alias of it and not a keyword of its own
+        self.assertNotIn("opt out", self.matcher.keywords)
+        self.assertEqual(self.matcher.get_keyword("opt out"), "opt-out")
+        self.assertEqual(self.matcher.get_keyword("Cookie"), "cookie")
+
+        words = ["you", "can", "opt", "out"]
+        self.assertListEqual(list(self.matcher.find_matches(words)), [("opt-out", 4)])
+        self.assertListEqual(self.matcher.find_sentences_keywords(words, [4]), [["opt-out"]])
+
+    def test_keywords_are_lemmatized(self):
+        # the keywords are split into the same lemmas as the words of the paragraphs
+        extractor = ParagraphsExtractor()
+        matcher = KeywordMatcher(["children", "cell towers"])
+        words = [word.lower() for word in extractor.tokenize_text("We protect children near cell towers.")]
+
+        actual = matcher.count_keywords(words)
+        self.assertEqual(actual["children"], 1)
+        self.assertEqual(actual["cell towers"], 1)
+
+    def test_count_keywords_overlapping(self):
+        words = ["log", "in", "with", "facebook", "single", "sign", "on"]
+        actual = self.matcher.count_keywords(words)
+
+        self.assertEqual(actual["facebook single sign on"], 1)
+        self.assertEqual(actual["single sign on"], 1)
+
+    def test_count_topic_keywords(self):
+        # topic sentence: "your address book", non-topic sentence: "address date of birth"
+        words = ["your", "address", "book", "address", "date", "of", "birth"]
+        topic, non_topic = self.matcher.count_topic_keywords(words, 3)
+
+        self.assertEqual(topic["address"], 1)
+        self.assertEqual(topic["address book"], 1)
+        self.assertEqual(non_topic["address"], 1)
+        self.assertEqual(non_topic["address book"], 0)
+        self.assertEqual(non_topic["date of birth"], 1)
+
+    def test_count_topic_keywords_across_sentences(self):
+        # a keyword ending after the topic sentence does not belong to the topic sentence
+        words = ["your", "address", "book"]
+        topic, non_topic = self.matcher.count_topic_keywords(words, 2)
+
+        self.assertEqual(topic["address book"], 0)
+        self.assertEqual(non_topic["address book"], 1)
+
+
+    def test_find_sentences_keywords(self):
+        # sentences: "your address book", "", "address date of birth"
+        words = ["your", "address", "book", "address", "date", "of", "birth"]
+        actual = self.matcher.find_sentences_keywords(words, [3, 0, 4])
+
+        self.assertListEqual(actual, [["address", "address book"], [], ["address", "date of birth"]])
+        self.assertListEqual(self.matcher.find_sentences_keywords([], []), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+
+from ... import parameters
+from ..paragraphs_extractor import ParagraphsExtractor
+from ..utils.json_helper import from_json_file
+from ..utils.lemma_table import get_lemma_table, has_context_free_lemmas
+from ..utils.spacy_utils import get_custom_extractor
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_POLICY_PATHS = [
+    os.path.join(CURRENT_DIR, "fitbit.json"),
+    os.path.join(CURRENT_DIR, "calm.json"),
+]
+CRITERIA_KEYWORDS = sorted(
+    set(
+        parameters.C9_KEYWORDS
+        + parameters.C10_KEYWORDS
+        + parameters.C11_KEYWORDS
+        + parameters.C12_KEYWORDS
+        + parameters.C24_KEYWORDS
+        + parameters.C49_KEYWORDS
+    )
+)
+
+
+class TestLemmaTable(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the instance to be tested before EACH test case
+        """
+        self.paragraphs_extractor = ParagraphsExtractor()
+        self.paragraphs = [
+            paragraph
+            for path in TEST_POLICY_PATHS
+            for paragraph in self.paragraphs_extractor.get_paragraphs(from_json_file(path)["privacyPolicyText"])
+        ]
+
+    def test_count_keywords_parity(self):
+        """
+        With context-free lemmas, the fast path must count exactly the same keywords as the whole Spacy pipeline
+        in every paragraph of the fixtures. A rule-based lemmatizer gives no such guarantee, see `LemmaTable`.
+        """
+        if not has_context_free_lemmas(get_custom_extractor()):
+            self.skipTest("the lemmas of a rule-based lemmatizer depend on the context of the words")
+        for paragraph in self.paragraphs:
+            expected = self.paragraphs_extractor.count_keywords(paragraph, CRITERIA_KEYWORDS)
+            actual = self.paragraphs_extractor.count_keywords(paragraph, CRITERIA_KEYWORDS, fast=True)
+            self.assertEqual(actual, expected)
+            self.assertListEqual(
+                self.paragraphs_extractor.tokenize_text(paragraph, fast=True),
+                self.paragraphs_extractor.tokenize_text(paragraph),
+            )
+
+    def test_tokenize_text_without_lemma(self):
+        """
+        The words themselves come from the same tokenizer, so they must be exactly the same
+        """
+        for paragraph in self.paragraphs[:20]:
+            self.assertListEqual(
+                self.paragraphs_extractor.tokenize_text(paragraph, need_lemma=False, fast=True),
+                self.paragraphs_extractor.tokenize_text(paragraph, need_lemma=False),
+            )
+
+    def test_lemmas_are_cached(self):
+        lemma_table = get_lemma_table()
+        words = lemma_table.get_words("we collect your email addresses.")
+        self.assertEqual(len(words), 5)
+        num_lemmas = len(lemma_table.lemmas)
+        self.assertListEqual(lemma_table.get_words("your email addresses we collect."), words[2:] + words[:2])
+        self.assertEqual(len(lemma_table.lemmas), num_lemmas)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import os
+import math
+from itertools import chain
 
+import tensorflow as tf
 from tensorflow.python.data.ops.dataset_ops import BatchDataset
 from ..paragraphs_extractor import ParagraphsExtractor
 from ..utils.json_helper import from_json_file
@@ -47,6 +50,94 @@ class TestParagraphsExtractor(unittest.TestCase):
                 self.assertNotIn(para["tag"], self.header_tags)
                 self.assertIsInstance(para["content"], str)
 
+    def test_get_segments_by_html_tags_nested_headings(self):
+        """
+        Each text block belongs to the most recent heading, wherever the headings are nested,
+        and no text is duplicated across segments
+        """
+        policy_html = """
+        <p>Skip to content</p>
+        <h1>Privacy Policy</h1>
+        <div class="intro"><p>Intro 1</p><p>Intro 2</p></div>
+        <section>
+            <div><h2>Data we collect</h2></div>
+            <p>Collect 1</p>
+            <div><p>Collect 2</p><h3>Location</h3><p>Location 1</p></div>
+            <ul><li>Location 2</li><li>Location 3</li></ul>
+        </section>
+        <section><h2>Sharing</h2>Sharing 1<p>Sharing 2</p></section>
+        <div><div><h2>Security</h2></div></div>
+        <div><p>Security 1</p></div>
+        <h2>Contact <span>us</span></h2>
+        <p>Contact 1</p>
+        """
+        actual_segments = self.extractor.get_segments_by_html_tags(policy_html)
+        expected_segments = [
+            ("h1", "Privacy Policy", [("div", "Intro 1 Intro 2")]),
+            ("h2", "Data we collect", [("p", "Collect 1"), ("p", "Collect 2")]),
+            ("h3", "Location", [("p", "Location 1"), ("ul", "Location 2 Location 3")]),
+            ("h2", "Sharing", [(None, "Sharing 1"), ("p", "Sharing 2")]),
+            ("h2", "Security", [("div", "Security 1")]),
+            ("h2", "Contact us", [("p", "Contact 1")]),
+        ]
+        self.assertListEqual(
+            [
+                (
+                    segment["header"]["tag"],
+                    segment["header"]["content"],
+                    [(para["tag"], para["content"]) for para in segment["paragraphs"] if len(para["content"]) > 0],
+                )
+                for segment in actual_segments
+            ],
+            expected_segments,
+        )
+
+    def test_get_segments_by_html_tags_without_headings(self):
+        """
+        A policy without enough headings is split at its block-level tags and blank lines into bounded paragraphs,
+        title-like blocks are merged into the next block, and the headings are left out
+        """
+        policy_html = """
+        <h1>Privacy Policy</h1>
+        <div>
+            <p><b>Data we collect</b></p>
+            <p>We collect your <a href="#">email address</a>. We collect your name.</p>
+            <ul><li>Your location.</li><li>Your contacts.</li></ul>
+            One. Two. Three. Four. Five. Six. Seven.<br>After a line break.
+            <pre>First plain text paragraph.
+
+Second plain text paragraph.</pre>
+        </div>
+        """
+        actual_segments = self.extractor.get_segments_by_html_tags(policy_html)
+        self.assertEqual(len(actual_segments), 1)
+        self.assertListEqual(
+            [para["content"] for para in actual_segments[0]["paragraphs"]],
+            [
+                "Data we collect We collect your email address. We collect your name.",
+                "Your location.",
+                "Your contacts.",
+                "One. Two. Three. Four. Five.",
+                "Five. Six. Seven.",
+                "After a line break.",
+                "First plain text paragraph.",
+                "Second plain text paragraph.",
+            ],
+        )
+
+    def test_get_headingless_paragraphs_windows(self):
+        strings = [(" ".join("Sentence {}.".format(i) for i in range(10)), None)]
+        actual = self.extractor.get_headingless_paragraphs(strings, [], [], window_sentences=4, window_overlap=2)
+        self.assertListEqual(
+            actual,
+            [
+                "Sentence 0. Sentence 1. Sentence 2. Sentence 3.",
+                "Sentence 2. Sentence 3. Sentence 4. Sentence 5.",
+                "Sentence 4. Sentence 5. Sentence 6. Sentence 7.",
+                "Sentence 6. Sentence 7. Sentence 8. Sentence 9.",
+            ],
+        )
+
     def test_get_sentences_from_single_paragraph(self):
         """
         get_sentences_from_single_paragraph must be able to tokenize sentences with tolerance to the existence of abbreviation noise,
@@ -358,6 +449,176 @@ class TestParagraphsExtractor(unittest.TestCase):
             expected.get("non_topic_keyword_occurence"),
             {"share": 1, "consent": 1, "provide": 2},
         )
+        # the sentences derived from the single Spacy pass must be the same as splitting the paragraph on its own
+        self.assertListEqual(
+            expected.get("sentences"),
+            self.extractor.get_sentences_from_single_paragraph(p1),
+        )
+        self.assertEqual(
+            expected.get("topic_sentence"),
+            self.extractor.get_topic_sentence(p1),
+        )
+        # the token counts of the sentences must be the same as tokenizing each sentence on its own
+        self.assertListEqual(
+            expected.get("sentence_token_counts"),
+            [len(self.extractor.tokenize_text(s)) for s in expected.get("sentences")],
+        )
+
+    def test_get_paragraph_statistics_multi_word_keywords(self):
+        p1 = "You can opt out of marketing emails. Tell us your date of birth and your address."
+
+        actual = self.extractor.get_paragraph_statistics(
+            p1, ["opt out", "date of birth", "address"]
+        )
+        self.assertDictEqual(
+            actual.get("topic_keyword_occurence"),
+            {"opt out": 1, "date of birth": 0, "address": 0},
+        )
+        self.assertDictEqual(
+            actual.get("non_topic_keyword_occurence"),
+            {"opt out": 0, "date of birth": 1, "address": 1},
+        )
+        self.assertListEqual(actual.get("sentence_keywords"), [["opt out"], ["date of birth", "address"]])
+
+    def test_get_paragraph_statistics_empty_paragraph(self):
+        expected = self.extractor.get_paragraph_statistics("", ["share"])
+
+        self.assertEqual(expected.get("topic_sentence"), "")
+        self.assertListEqual(expected.get("sentences"), [])
+        self.assertListEqual(expected.get("sentence_token_counts"), [])
+        self.assertDictEqual(expected.get("topic_keyword_occurence"), {"share": 0})
+        self.assertDictEqual(expected.get("non_topic_keyword_occurence"), {"share": 0})
+
+    def test_get_paragraphs_statistics(self):
+        """
+        The batched statistics must be exactly the same as the statistics of each single paragraph
+        """
+        paragraphs = [p["content"] for p in self.paragraphs] + [""]
+        keywords = ["collect", "information", "share", "provide"]
+        expected = [
+            self.extractor.get_paragraph_statistics(paragraph, keywords)
+            for paragraph in paragraphs
+        ]
+
+        actual = self.extractor.get_paragraphs_statistics(
+            paragraphs, keywords, batch_size=2, n_process=1
+        )
+        self.assertListEqual(actual, expected)
+
+        actual_multi_process = self.extractor.get_paragraphs_statistics(
+            paragraphs, keywords, batch_size=2, n_process=2
+        )
+        self.assertListEqual(actual_multi_process, expected)
+
+    def test_get_policies_statistics(self):
+        paragraphs = [p["content"] for p in self.paragraphs]
+        policies_paragraphs = [paragraphs[:2], [], paragraphs[2:]]
+        keywords = ["collect", "information"]
+
+        actual = self.extractor.get_policies_statistics(
+            policies_paragraphs, keywords, batch_size=2, n_process=1
+        )
+        self.assertEqual(len(actual), 3)
+        self.assertListEqual(
+            [[stat["content"] for stat in policy] for policy in actual],
+            policies_paragraphs,
+        )
+
+    def test_get_paragraphs_keyword_statistics(self):
+        """
+        The first phase of the lazy statistics must have no sentences, and the same keyword occurences on simple paragraphs
+        """
+        paragraphs = [p["content"] for p in self.paragraphs] + [""]
+        keywords = ["collect", "information", "share", "provide"]
+        expected = self.extractor.get_paragraphs_statistics(paragraphs, keywords, n_process=1)
+
+        actual = self.extractor.get_paragraphs_keyword_statistics(paragraphs, keywords, batch_size=2)
+        self.assertListEqual([stat["content"] for stat in actual], paragraphs)
+        for actual_stat, expected_stat in zip(actual, expected):
+            self.assertNotIn("sentences", actual_stat)
+            self.assertDictEqual(actual_stat["topic_keyword_occurence"], expected_stat["topic_keyword_occurence"])
+            self.assertDictEqual(actual_stat["non_topic_keyword_occurence"], expected_stat["non_topic_keyword_occurence"])
+
+    def test_add_paragraphs_sentences(self):
+        """
+        The second phase must only split the sentences of the given paragraphs, the same way as the full statistics
+        """
+        paragraphs = [p["content"] for p in self.paragraphs]
+        keywords = ["collect", "information"]
+        expected = self.extractor.get_paragraphs_statistics(paragraphs, keywords, n_process=1)
+        stats = self.extractor.get_paragraphs_keyword_statistics(paragraphs, keywords)
+
+        self.assertEqual(self.extractor.add_paragraphs_sentences(stats, [2, 0, 2], keywords, n_process=1), 2)
+        self.assertNotIn("sentences", stats[1])
+        for i in (0, 2):
+            self.assertListEqual(stats[i]["sentences"], expected[i]["sentences"])
+            self.assertListEqual(stats[i]["sentence_token_counts"], expected[i]["sentence_token_counts"])
+        # the paragraphs which already have their sentences are not split again
+        self.assertEqual(self.extractor.add_paragraphs_sentences(stats, [0, 1], keywords, n_process=1), 1)
+
+    def test_add_budget_paragraphs_sentences(self):
+        """
+        The paragraphs must be split in the given order until the budget is exceeded
+        """
+        paragraphs = ["We collect your email address. We share it with our partners."] * 6
+        stats = self.extractor.get_paragraphs_keyword_statistics(paragraphs, ["collect"])
+
+        actual = self.extractor.add_budget_paragraphs_sentences(
+            stats, [4, 0, 1, 2], {"size": 3, "unit": "sentences"}, ["collect"], num_paragraphs_per_step=1
+        )
+        self.assertEqual(actual, 2)
+        self.assertListEqual([("sentences" in stat) for stat in stats], [True, False, False, False, True, False])
+
+        # 7 + 2 tokens per sentence
+        actual = self.extractor.add_budget_paragraphs_sentences(
+            stats, [5, 3], {"size": 18, "unit": "tokens"}, ["collect"], num_paragraphs_per_step=1
+        )
+        self.assertEqual(actual, 2)
+
+    def test_get_sections(self):
+        """
+        The sections must keep their heading, and their paragraphs must be the ones of `get_paragraphs`
+        """
+        policy_html = """
+        <h1>Privacy Policy</h1><p>Intro</p>
+        <h2>Empty</h2>
+        <h2>Data we collect</h2><p>Collect 1</p><p>Collect 2</p>
+        <h2>Sharing</h2><p>Sharing 1</p>
+        <h2>Security</h2><p>Security 1</p>
+        <h2>Children's privacy</h2><p>Children 1</p>
+        """
+        actual = self.extractor.get_sections(policy_html)
+        self.assertListEqual(
+            [(section["heading"], section["paragraphs"]) for section in actual],
+            [
+                ("Privacy Policy", ["Intro"]),
+                ("Data we collect", ["Collect 1", "Collect 2"]),
+                ("Sharing", ["Sharing 1"]),
+                ("Security", ["Security 1"]),
+                ("Children's privacy", ["Children 1"]),
+            ],
+        )
+        self.assertListEqual(
+            self.extractor.get_paragraphs(policy_html),
+            list(chain.from_iterable(section["paragraphs"] for section in actual)),
+        )
+
+    def test_add_headings(self):
+        stats = self.extractor.get_paragraphs_keyword_statistics(["Intro", "Nearby 1", "Nearby 2"], ["nearby", "location"])
+        self.extractor.add_headings(stats, [0, 1, 1], ["Policy", "Location", "Location"], ["nearby", "location"])
+
+        self.assertListEqual([stat["section"] for stat in stats], [0, 1, 1])
+        self.assertListEqual([stat["heading"] for stat in stats], ["Policy", "Location", "Location"])
+        self.assertDictEqual(stats[0]["heading_keyword_occurence"], {"nearby": 0, "location": 0})
+        self.assertDictEqual(stats[2]["heading_keyword_occurence"], {"nearby": 0, "location": 1})
+        # each paragraph has its own occurence
+        self.assertIsNot(stats[1]["heading_keyword_occurence"], stats[2]["heading_keyword_occurence"])
+
+    def test_get_num_processes(self):
+        self.assertEqual(self.extractor.get_num_processes(10, 64, 4), 1)
+        self.assertEqual(self.extractor.get_num_processes(200, 64, 4), 4)
+        self.assertEqual(self.extractor.get_num_processes(200, 64, 8), 4)
+        self.assertEqual(self.extractor.get_num_processes(0, 64, 4), 1)
 
     def test_get_relevant_score_by_keyword_occurence(self):
         """
@@ -432,7 +693,8 @@ class TestParagraphsExtractor(unittest.TestCase):
                 <p>This document can be printed for reference by using the print command in the settings of any browser.</p>
             <body>
         """
-        actual = self.extractor.get_paragraphs(policy_html)
+        # the same section is repeated on purpose, so the duplicate paragraphs are kept here
+        actual = ParagraphsExtractor(remove_boilerplate=False).get_paragraphs(policy_html)
         self.assertIsInstance(actual, list, msg="Invalid type, expected list")
         self.assertEqual(len(actual), 12, msg="Invalid length")
         self.assertEqual(
@@ -446,6 +708,67 @@ class TestParagraphsExtractor(unittest.TestCase):
             msg="Incorrect value",
         )
 
+        # the paragraphs repeated under the next headings are removed by default
+        cleaning_stats = {}
+        self.assertListEqual(self.extractor.get_paragraphs(policy_html, cleaning_stats), actual[:2])
+        self.assertEqual(cleaning_stats["duplicate_paragraphs"], 10)
+        self.assertEqual(cleaning_stats["duplicate_bytes"], 5 * len("".join(actual[:2])))
+
+    def test_get_paragraphs_without_boilerplate(self):
+        """
+        Scripts, styles, navigation menus, footers and cookie banners are skipped and reported
+        """
+        policy_html = """
+        <nav><a href="/">Home</a><a href="/shop">Shop</a></nav>
+        <div id="onetrust-banner-sdk"><p>We use cookies to improve your experience.</p></div>
+        <h2>Data we collect</h2><p>We collect your email.</p><script>track();</script>
+        <h2>Sharing</h2><p>We never share it.</p><div class="main-navigation">Home Shop</div>
+        <h2>Cookies</h2><p>We use cookies to remember you.</p><style>p {}</style>
+        <h2>Security</h2><p>Your data is encrypted.</p>
+        <h2>Children</h2><p>We do not collect data from children.</p>
+        <h2>Contact</h2><p>Contact us by email.</p>
+        <footer><p>© 2021 Example</p></footer>
+        """
+        cleaning_stats = {}
+        actual = self.extractor.get_paragraphs(policy_html, cleaning_stats)
+        self.assertListEqual(
+            actual,
+            [
+                "We collect your email.",
+                "We never share it.",
+                "We use cookies to remember you.",
+                "Your data is encrypted.",
+                "We do not collect data from children.",
+                "Contact us by email.",
+            ],
+        )
+        self.assertEqual(cleaning_stats["boilerplate_elements"], 6)
+        self.assertEqual(
+            cleaning_stats["boilerplate_bytes"],
+            len("HomeShopWe use cookies to improve your experience.track();Home Shopp {}© 2021 Example".encode("utf-8")),
+        )
+
+    def test_remove_near_duplicate_paragraphs(self):
+        """
+        A paragraph repeated under a later heading with a single other word is removed, a similar paragraph is kept
+        """
+        footer = "This policy was last updated on {} and applies to all the services of Example Inc. worldwide."
+        segments = [
+            {"header": "Data", "paragraphs": [{"content": "We collect your email address."}, {"content": footer.format("1 May")}]},
+            {"header": "Sharing", "paragraphs": [{"content": "We never sell your email address."}, {"content": footer.format("2 May")}]},
+        ]
+        cleaning_stats = {}
+        actual = self.extractor.remove_duplicate_paragraphs(segments, cleaning_stats)
+        self.assertListEqual(
+            [para["content"] for segment in actual for para in segment["paragraphs"]],
+            ["We collect your email address.", footer.format("1 May"), "We never sell your email address."],
+        )
+        self.assertEqual(cleaning_stats["duplicate_paragraphs"], 1)
+
+        # only the paragraphs with exactly the same words are removed with a similarity of 1
+        actual = self.extractor.remove_duplicate_paragraphs(segments, similarity=1)
+        self.assertEqual(sum(len(segment["paragraphs"]) for segment in actual), 4)
+
     def test_get_paragraphs__myfitnesspal(self):
         policy_html = """
             <body>
@@ -534,9 +857,14 @@ class TestParagraphsExtractor(unittest.TestCase):
         """
         The structure of BatchDataset is quite complex, so we'll just test if we return the correct type or not
         """
-        actual_inputs = self.extractor.process_inputs_for_bert(self.sentences)
+        actual_inputs = self.extractor.process_inputs_for_bert(self.sentences, prefetch_buffer_size=0)
         self.assertIsInstance(actual_inputs, BatchDataset)
 
+        # the batches are prefetched by default
+        actual_inputs = self.extractor.process_inputs_for_bert(self.sentences, batch_size=4)
+        self.assertIsInstance(actual_inputs, tf.data.Dataset)
+        self.assertEqual(int(actual_inputs.cardinality()), math.ceil(len(self.sentences) / 4))
+
     def test_rank_paragraphs_with_same_relevance(self):
         expected_paragraphs = self.zero_paragraphs
 
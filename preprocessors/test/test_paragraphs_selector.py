@@ -0,0 +1,403 @@
+import unittest
+import random
+import numpy as np
+
+from ..paragraphs_selector import ParagraphsSelector
+from ...parameters import MAX_INPUT_SEQUENCES
+
+
+class TestParagraphsSelector(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the instance to be tested before EACH test case
+        """
+        self.selector = ParagraphsSelector()
+        self.paragraphs_stats = [
+            {
+                "relevant_score": 2,
+                "sentences": ["Learn more here.", "Contact us."],
+                "sentence_token_counts": [3, 2],
+            },
+            {
+                "relevant_score": 1,
+                "sentences": ["We collect your email address.", "Yes."],
+                "sentence_token_counts": [5, 1],
+            },
+        ]
+
+    def test_vectorize_keyword_occurence(self):
+        paragraphs_stats = [
+            {
+                "sentences": ["a"],
+                "topic_keyword_occurence": {"ad": 1, "provide": 2},
+                "non_topic_keyword_occurence": {"ad": 3, "provide": 4},
+            },
+            {
+                "sentences": ["b"],
+                "topic_keyword_occurence": {"ad": 0, "provide": 1},
+                "non_topic_keyword_occurence": {"ad": 2, "provide": 0},
+            },
+        ]
+        stats, keyword_occurence = self.selector.vectorize_keyword_occurence(
+            paragraphs_stats, ["ad", "provide"]
+        )
+
+        self.assertListEqual(stats, [{"sentences": ["a"]}, {"sentences": ["b"]}])
+        self.assertListEqual(keyword_occurence["keywords"], ["ad", "provide"])
+        np.testing.assert_array_equal(keyword_occurence["topic_keyword_occurence"], [[1, 2], [0, 1]])
+        np.testing.assert_array_equal(keyword_occurence["non_topic_keyword_occurence"], [[3, 4], [2, 0]])
+
+        _, empty_occurence = self.selector.vectorize_keyword_occurence([], ["ad", "provide"])
+        self.assertEqual(empty_occurence["topic_keyword_occurence"].shape, (0, 2))
+
+    def test_vectorize_heading_keyword_occurence(self):
+        paragraphs_stats = [
+            {
+                "heading": "Ads",
+                "topic_keyword_occurence": {"ad": 1},
+                "non_topic_keyword_occurence": {"ad": 0},
+                "heading_keyword_occurence": {"ad": 1},
+            },
+        ]
+        stats, keyword_occurence = self.selector.vectorize_keyword_occurence(paragraphs_stats, ["ad"])
+
+        self.assertListEqual(stats, [{"heading": "Ads"}])
+        np.testing.assert_array_equal(keyword_occurence["heading_keyword_occurence"], [[1]])
+        np.testing.assert_array_equal(self.selector.get_heading_scores(keyword_occurence, ["ad", "ad"]), [2])
+
+        # the headings are only vectorized if every paragraph has them
+        _, keyword_occurence = self.selector.vectorize_keyword_occurence(
+            paragraphs_stats + [{"topic_keyword_occurence": {}, "non_topic_keyword_occurence": {}}], ["ad"]
+        )
+        self.assertNotIn("heading_keyword_occurence", keyword_occurence)
+        np.testing.assert_array_equal(self.selector.get_heading_scores(keyword_occurence, ["ad"]), [0, 0])
+
+    def test_get_relevant_sections_mask(self):
+        section_ids = [0, 0, 1, 1, 2, 3]
+        scores = np.array([0.0, 1.5, 0.0, 0.0, 0.0, 0.0])
+        heading_scores = np.array([0.0, 0.0, 0.0, 0.0, 1.0, 0.0])
+
+        actual = self.selector.get_relevant_sections_mask(section_ids, scores, heading_scores)
+        np.testing.assert_array_equal(actual, [True, True, False, False, True, False])
+        self.assertEqual(len(self.selector.get_relevant_sections_mask([], np.zeros(0), np.zeros(0))), 0)
+
+    def test_select_keyword_occurence(self):
+        keyword_occurence = {
+            "keywords": ["ad"],
+            "topic_keyword_occurence": np.array([[1], [2], [3]], dtype=np.int32),
+            "non_topic_keyword_occurence": np.array([[4], [5], [6]], dtype=np.int32),
+        }
+        actual = self.selector.select_keyword_occurence(keyword_occurence, [0, 2])
+
+        self.assertListEqual(actual["keywords"], ["ad"])
+        np.testing.assert_array_equal(actual["topic_keyword_occurence"], [[1], [3]])
+        np.testing.assert_array_equal(actual["non_topic_keyword_occurence"], [[4], [6]])
+
+    def test_get_relevant_scores(self):
+        """
+        The vectorized scores must be the same as the scores of each single paragraph
+        """
+        keywords = ["ad", "provide", "gather", "collect"]
+        paragraphs_stats = [
+            {
+                "topic_keyword_occurence": {key: random.randint(0, 3) for key in keywords},
+                "non_topic_keyword_occurence": {key: random.randint(0, 3) for key in keywords},
+            }
+            for _ in range(20)
+        ]
+        _, keyword_occurence = self.selector.vectorize_keyword_occurence(paragraphs_stats, keywords)
+
+        for weights in ([2, 1], [1, 1], [], [0, 0]):
+            criteria_keywords = ["ad", "provide", "provide", "unknown"]
+            expected = [
+                self.selector.get_relevant_score_by_keyword_occurence(
+                    stat["topic_keyword_occurence"],
+                    stat["non_topic_keyword_occurence"],
+                    weights=weights,
+                    keywords=criteria_keywords,
+                )
+                for stat in paragraphs_stats
+            ]
+            actual = self.selector.get_relevant_scores(keyword_occurence, weights, criteria_keywords)
+            np.testing.assert_allclose(actual, expected)
+
+    def test_get_keyword_weight_vector_with_aliases(self):
+        """
+        The keywords with the same words are counted once, a keyword listed twice is still counted twice
+        """
+        paragraphs_stats = [{"topic_keyword_occurence": {"opt-out": 1}, "non_topic_keyword_occurence": {}}]
+        _, keyword_occurence = self.selector.vectorize_keyword_occurence(
+            paragraphs_stats, ["opt-out", "ad"], {"opt out": "opt-out"}
+        )
+
+        actual = self.selector.get_keyword_weight_vector(keyword_occurence, ["opt-out", "Opt out", "ad", "ad"])
+        np.testing.assert_array_equal(actual, [1, 2])
+        actual = self.selector.get_keyword_weight_vector(keyword_occurence, ["opt out"])
+        np.testing.assert_array_equal(actual, [1, 0])
+
+    def test_get_top_indices(self):
+        """
+        The top indices must be the same as a stable sort of all scores, including the ties
+        """
+        for _ in range(50):
+            scores = [random.randint(0, 4) for _ in range(random.randint(0, 30))]
+            num_top = random.randint(0, 8)
+            expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:num_top]
+            actual = self.selector.get_top_indices(np.array(scores), num_top)
+            self.assertListEqual(list(actual), expected)
+
+    def test_select_top_paragraphs(self):
+        paragraphs_stats = [{"id": i} for i in range(4)]
+
+        actual = self.selector.select_top_paragraphs(paragraphs_stats, np.array([1.0, 3.0, 0.0, 3.0]), 2)
+        self.assertListEqual(actual, [{"id": 1}, {"id": 3}])
+
+        # If all paragraphs have 0 relevance, then all of them are returned
+        actual_zero = self.selector.select_top_paragraphs(paragraphs_stats, np.zeros(4), 2)
+        self.assertListEqual(actual_zero, paragraphs_stats)
+
+    def test_select_paragraphs(self):
+        paragraphs_stats = [{"id": i} for i in range(8)]
+        scores = np.zeros(8)
+        scores[6] = 1.0
+
+        actual, fallback = self.selector.select_paragraphs(paragraphs_stats, scores, 2)
+        self.assertListEqual(actual, [{"id": 6}, {"id": 0}])
+        self.assertFalse(fallback)
+
+        actual, fallback = self.selector.select_paragraphs(paragraphs_stats, np.zeros(8), 2, fallback="first")
+        self.assertListEqual(actual, paragraphs_stats[:5])
+        self.assertTrue(fallback)
+
+        actual, fallback = self.selector.select_paragraphs(paragraphs_stats, np.zeros(8), 2, fallback="all")
+        self.assertListEqual(actual, paragraphs_stats)
+
+        with self.assertRaises(ValueError):
+            self.selector.select_paragraphs(paragraphs_stats, np.zeros(8), 2, fallback="unknown")
+
+    def test_select_paragraph_indices(self):
+        """
+        The indices must be the ones of the paragraphs `select_paragraphs` selects
+        """
+        paragraphs_stats = [{"id": i} for i in range(8)]
+        scores = np.zeros(8)
+        scores[6] = 1.0
+        for fallback in ("first", "all"):
+            for actual_scores in (scores, np.zeros(8)):
+                expected, _ = self.selector.select_paragraphs(paragraphs_stats, actual_scores, 2, fallback=fallback)
+                actual, budget = self.selector.select_paragraph_indices(actual_scores, 2, fallback=fallback)
+                self.assertListEqual([paragraphs_stats[i] for i in actual], expected)
+                self.assertIsNone(budget)
+
+        # the sentence budget depends on the sentences, which are not known yet
+        actual, budget = self.selector.select_paragraph_indices(
+            np.zeros(8), 2, fallback="sentence_budget", sentence_budget=3
+        )
+        self.assertListEqual(actual, list(range(8)))
+        self.assertDictEqual(budget, {"size": 3, "unit": "sentences"})
+        self.assertEqual(self.selector.select_paragraph_indices(scores, 2, fallback="sentence_budget"), ([6, 0], None))
+
+        # a criteria budget selects the relevant paragraphs only, in the order of their scores
+        scores[2] = 2.0
+        budget = {"size": 10, "unit": "tokens"}
+        self.assertEqual(self.selector.select_paragraph_indices(scores, 2, budget=budget), ([2, 6], budget))
+
+    def test_select_paragraphs_any_keyword_fallback(self):
+        paragraphs_stats = [{"id": i} for i in range(3)]
+        keyword_occurence = {
+            "keywords": ["email", "cookie"],
+            "topic_keyword_occurence": np.array([[0, 0], [0, 0], [1, 0]], dtype=np.int32),
+            "non_topic_keyword_occurence": np.array([[0, 0], [0, 3], [0, 0]], dtype=np.int32),
+        }
+        actual, fallback = self.selector.select_paragraphs(
+            paragraphs_stats, np.zeros(3), 2, keyword_occurence, fallback="any_keyword"
+        )
+        self.assertListEqual(actual, [{"id": 1}, {"id": 2}, {"id": 0}])
+        self.assertTrue(fallback)
+
+    def test_select_first_sentences(self):
+        """
+        The sentence budget only counts the sentences valid for BERT input, and cuts the last paragraph
+        """
+        actual = self.selector.select_first_sentences(self.paragraphs_stats, 2, min_num_tokens=3)
+        self.assertListEqual(actual, self.paragraphs_stats)
+
+        actual = self.selector.select_first_sentences(self.paragraphs_stats, 1, min_num_tokens=3)
+        self.assertListEqual(actual, self.paragraphs_stats[:1])
+
+        long_paragraph_stats = {
+            "sentences": ["We collect your email.", "Yes.", "We share it with partners.", "We sell nothing."],
+            "sentence_token_counts": [4, 1, 5, 3],
+        }
+        actual = self.selector.select_first_sentences(self.paragraphs_stats + [long_paragraph_stats], 3, min_num_tokens=3)
+        self.assertListEqual(actual[:2], self.paragraphs_stats)
+        self.assertListEqual(actual[2]["sentences"], ["We collect your email."])
+        self.assertListEqual(actual[2]["sentence_token_counts"], [4])
+
+        self.assertListEqual(self.selector.select_first_sentences(self.paragraphs_stats, 0), [])
+
+    def test_select_best_sentences(self):
+        paragraphs_stats = [
+            {
+                "sentences": ["We collect your email.", "It is used for login.", "Yes.", "Contact us at any time."],
+                "sentence_token_counts": [4, 5, 1, 5],
+                "sentence_keywords": [["email"], [], ["email"], []],
+            },
+            {
+                "sentences": ["Email and ads are shared.", "Nothing else here."],
+                "sentence_token_counts": [5, 3],
+                "sentence_keywords": [["email", "ad"], []],
+            },
+        ]
+        keywords = ["email", "ad"]
+
+        # without a window, only the sentences with keywords, and never the ones with too few tokens
+        actual = self.selector.select_best_sentences(paragraphs_stats, keywords, window=0, max_sentences=5, min_num_tokens=3)
+        self.assertListEqual(actual, ["We collect your email.", "Email and ads are shared."])
+
+        # the neighbours of a keyword are kept with it, within the same paragraph
+        actual = self.selector.select_best_sentences(paragraphs_stats, keywords, window=1, max_sentences=5, min_num_tokens=3)
+        self.assertListEqual(
+            actual,
+            [
+                "We collect your email.",
+                "It is used for login.",
+                "Contact us at any time.",
+                "Email and ads are shared.",
+                "Nothing else here.",
+            ],
+        )
+
+        # the best scores are kept up to the cap, in their original order
+        actual = self.selector.select_best_sentences(paragraphs_stats, keywords, window=1, max_sentences=2, min_num_tokens=3)
+        self.assertListEqual(actual, ["It is used for login.", "Email and ads are shared."])
+
+    def test_get_candidate_sentences(self):
+        stats = [{**stat, "sentence_keywords": [[], []]} for stat in self.paragraphs_stats]
+        expected = self.selector.get_sentences_for_bert(stats, min_num_tokens=3)
+
+        actual = self.selector.get_candidate_sentences(stats, ["email"], selection="paragraphs", min_num_tokens=3)
+        self.assertListEqual(actual, expected)
+        # no sentence has any keyword after the zero relevance fallback, so all of them are sent
+        actual = self.selector.get_candidate_sentences(stats, ["email"], True, selection="sentences", min_num_tokens=3)
+        self.assertListEqual(actual, expected)
+        self.assertListEqual(self.selector.get_candidate_sentences(stats, ["email"], selection="sentences"), [])
+
+        with self.assertRaises(ValueError):
+            self.selector.get_candidate_sentences(stats, ["email"], selection="unknown")
+
+    def test_select_paragraphs_by_budget(self):
+        """
+        The paragraphs must be selected in the given order until the budget is filled, the last one being cut
+        """
+        long_paragraph_stats = {
+            "sentences": ["We collect your email.", "Yes.", "We share it with partners.", "We sell nothing."],
+            "sentence_token_counts": [4, 1, 5, 3],
+            "sentence_keywords": [["email"], [], [], []],
+        }
+        paragraphs_stats = self.paragraphs_stats + [long_paragraph_stats]
+        sentences_budget = {"size": 3, "unit": "sentences"}
+
+        actual = self.selector.select_paragraphs_by_budget(
+            paragraphs_stats, [2, 0], {"size": 2, "unit": "sentences"}, min_num_tokens=3
+        )
+        self.assertListEqual(actual[0]["sentences"], ["We collect your email.", "Yes.", "We share it with partners."])
+        self.assertListEqual(actual[0]["sentence_keywords"], [["email"], [], []])
+        self.assertListEqual(actual[1:], [])
+
+        actual = self.selector.select_paragraphs_by_budget(paragraphs_stats, [1, 0, 2], sentences_budget, min_num_tokens=3)
+        self.assertListEqual(actual[:2], [self.paragraphs_stats[1], self.paragraphs_stats[0]])
+        self.assertListEqual(actual[2]["sentences"], ["We collect your email.", "Yes."])
+
+        # without a tokenizer, each sentence costs its number of words and the special tokens
+        tokens_budget = {"size": 13, "unit": "tokens"}
+        actual = self.selector.select_paragraphs_by_budget(paragraphs_stats, [2, 1], tokens_budget, min_num_tokens=3)
+        self.assertListEqual([stat["sentences"] for stat in actual], [["We collect your email.", "Yes.", "We share it with partners."]])
+        actual = self.selector.select_paragraphs_by_budget(
+            paragraphs_stats, [2, 1], tokens_budget, count_tokens=lambda sentence: 20, min_num_tokens=3
+        )
+        self.assertListEqual(actual, [])
+
+        with self.assertRaises(ValueError):
+            self.selector.select_paragraphs_by_budget(paragraphs_stats, [0], {"size": 1, "unit": "unknown"})
+
+    def test_get_budget_count_tokens(self):
+        # the tokeniser is only needed by a budget in tokens
+        self.assertIsNone(self.selector.get_budget_count_tokens(None))
+        self.assertIsNone(self.selector.get_budget_count_tokens({"size": 3, "unit": "sentences"}))
+
+    def test_select_paragraphs_with_budget(self):
+        scores = np.array([0.0, 1.0])
+        actual, fallback = self.selector.select_paragraphs(
+            self.paragraphs_stats, scores, 5, budget={"size": 5, "unit": "sentences"}
+        )
+        # the paragraphs without any keyword are not selected by a budget
+        self.assertListEqual(actual, [self.paragraphs_stats[1]])
+        self.assertFalse(fallback)
+
+    def test_predict_sentences(self):
+        """
+        Only the sentences without a previous prediction must be predicted, and each of them only once
+        """
+
+        class Model:
+            def __init__(self):
+                self.inputs = []
+
+            def predict(self, inputs):
+                self.inputs.extend(inputs)
+                return np.array([[0.25] for _ in inputs], dtype=np.float32)
+
+        selector = ParagraphsSelector()
+        selector.predict_batches = lambda model, sentences: model.predict(list(sentences))
+        model = Model()
+        actual = selector.predict_sentences(model, ["a", "b", "a", "c"], {"b": 0.75})
+        self.assertListEqual(actual, [[0.25], [0.75], [0.25], [0.25]])
+        self.assertListEqual(model.inputs, ["a", "c"])
+        self.assertIsInstance(actual[0][0], float)
+
+        model = Model()
+        self.assertListEqual(selector.predict_sentences(model, ["b"], {"b": 0.75}), [[0.75]])
+        self.assertListEqual(selector.predict_sentences(model, []), [])
+        self.assertListEqual(model.inputs, [])
+
+    def test_predict_by_length(self):
+        """
+        The sentences must be padded to their bucket, and their predictions returned in their original order
+        """
+        sentences = ["a " * 40, "b", "c " * 300, "d", "e " * 20]
+        padded_lengths = {}
+
+        class Model:
+            def predict(self, inputs):
+                return np.array([[len(sentence)] for sentence in inputs], dtype=np.float32)
+
+        selector = ParagraphsSelector()
+
+        def predict_batches(model, bucket_sentences, max_seq_length):
+            padded_lengths.update({sentence: max_seq_length for sentence in bucket_sentences})
+            return model.predict(bucket_sentences)
+
+        selector.predict_batches = predict_batches
+        actual = selector.predict_by_length(
+            Model(), sentences, [32, 64, 1000], count_tokens=lambda sentence: len(sentence.split()) + 2
+        )
+        self.assertListEqual([float(output[0]) for output in actual], [float(len(sentence)) for sentence in sentences])
+        # the buckets are capped, and the longest sentences are truncated to MAX_INPUT_SEQUENCES
+        self.assertListEqual(
+            [padded_lengths[sentence] for sentence in sentences], [64, 32, MAX_INPUT_SEQUENCES, 32, 32]
+        )
+
+    def test_get_sentences_for_bert(self):
+        """
+        Sentences with fewer tokens than the lower limit must be filtered out, the order of the others is kept
+        """
+        actual = self.selector.get_sentences_for_bert(self.paragraphs_stats, min_num_tokens=3)
+        self.assertListEqual(actual, ["Learn more here.", "We collect your email address."])
+
+    def test_get_sentences_for_bert_empty(self):
+        self.assertListEqual(self.selector.get_sentences_for_bert([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from ..utils import spacy_utils
+
+
+class TestSpacyUtils(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary cache folder before EACH test case
+        """
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_get_custom_extractor_is_loaded_once(self):
+        self.assertIs(spacy_utils.get_custom_extractor(), spacy_utils.get_custom_extractor())
+
+    def test_get_cache_key_is_stable(self):
+        self.assertEqual(spacy_utils.get_cache_key(), spacy_utils.get_cache_key())
+
+    def test_load_custom_extractor_from_cache(self):
+        """
+        The pipeline loaded from the cache must have the same components and split sentences the same way as the built one
+        """
+        built = spacy_utils.load_custom_extractor(cache_dir=self.cache_dir)
+        cache_path = os.path.join(self.cache_dir, spacy_utils.get_cache_key())
+        self.assertTrue(os.path.isdir(cache_path))
+
+        cached = spacy_utils.load_custom_extractor(cache_dir=self.cache_dir)
+        self.assertListEqual(cached.pipe_names, built.pipe_names)
+        self.assertIn("set_custom_boundaries", cached.pipe_names)
+
+        text = "We collect your email address. You can opt out at any time."
+        self.assertListEqual(
+            [sent.text for sent in cached(text).sents],
+            [sent.text for sent in built(text).sents],
+        )
+
+    def test_sentencizer_segmenter(self):
+        """
+        The rule-based segmenter must not split sentences after the none boundary abbreviations
+        """
+        extractor = spacy_utils.load_custom_extractor(cache_dir=None, segmenter="sentencizer")
+        self.assertIn("sentencizer", extractor.pipe_names)
+        self.assertNotIn("senter", extractor.pipe_names)
+        self.assertNotEqual(spacy_utils.get_cache_key("sentencizer"), spacy_utils.get_cache_key("senter"))
+
+        text = "Smith et al. 2020 studied this, e.g. the cookies. We agree. See the terms, cf. Section 2."
+        self.assertListEqual(
+            [sent.text for sent in extractor(text).sents],
+            ["Smith et al. 2020 studied this, e.g. the cookies.", "We agree.", "See the terms, cf. Section 2."],
+        )
+
+    def test_unknown_segmenter(self):
+        with self.assertRaises(ValueError):
+            spacy_utils.build_custom_extractor("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from ..keyword_matcher import KeywordMatcher
+from ..paragraphs_extractor import ParagraphsExtractor
+from ..statistics_cache import StatisticsCache
+
+
+class TestStatisticsCache(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a temporary folder for the SQLite tier before EACH test case
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.cache_dir, "statistics.sqlite3")
+        self.keywords = ["personal information", "email", "location"]
+        self.paragraphs = [
+            "We collect your email. Your personal information is never sold.",
+            "We use cookies.",
+            "We collect your email. Your personal information is never sold.",
+            "Your location is only used to show nearby classes.",
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_lru_eviction(self):
+        cache = StatisticsCache(max_size=2)
+        cache.put("a", {"value": 1})
+        cache.put("b", {"value": 2})
+        self.assertEqual(cache.get("a"), {"value": 1})
+        # "b" is now the least recently used
+        cache.put("c", {"value": 3})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"value": 1})
+        self.assertEqual(cache.get("c"), {"value": 3})
+        self.assertDictEqual(cache.get_counters(), {"memory_hits": 3, "disk_hits": 0, "misses": 1, "memory_size": 2})
+
+    def test_get_returns_copies(self):
+        cache = StatisticsCache(max_size=2)
+        cache.put("a", {"sentences": ["a"]})
+        cache.get("a")["sentences"].append("b")
+        self.assertEqual(cache.get("a"), {"sentences": ["a"]})
+
+    def test_sqlite_tier_survives_restarts(self):
+        cache = StatisticsCache(max_size=2, db_path=self.db_path)
+        cache.put("a", {"value": 1})
+        cache.commit()
+
+        restarted_cache = StatisticsCache(max_size=2, db_path=self.db_path)
+        self.assertEqual(restarted_cache.get("a"), {"value": 1})
+        self.assertEqual(restarted_cache.get("a"), {"value": 1})
+        self.assertDictEqual(
+            restarted_cache.get_counters(), {"memory_hits": 1, "disk_hits": 1, "misses": 0, "memory_size": 1}
+        )
+
+    def test_config_key_depends_on_keywords(self):
+        cache = StatisticsCache(max_size=2)
+        config_key = cache.get_config_key(KeywordMatcher(self.keywords))
+        self.assertEqual(config_key, cache.get_config_key(KeywordMatcher(self.keywords)))
+        self.assertNotEqual(config_key, cache.get_config_key(KeywordMatcher(self.keywords + ["cookie"])))
+        # the keywords matched by their text are counted differently from the keywords matched by their lemmas
+        self.assertNotEqual(config_key, cache.get_config_key(KeywordMatcher(self.keywords, need_lemma=False)))
+        self.assertNotEqual(cache.get_key("We use cookies.", config_key), cache.get_key("We use cookie.", config_key))
+
+    def test_cached_statistics_are_the_same(self):
+        """
+        The statistics must be the same with and without the cache, and the cached paragraphs must not be processed again
+        """
+        expected = ParagraphsExtractor(statistics_cache_size=0).get_paragraphs_statistics(
+            self.paragraphs, self.keywords, n_process=1
+        )
+
+        extractor = ParagraphsExtractor(statistics_cache_size=100)
+        self.assertListEqual(extractor.get_paragraphs_statistics(self.paragraphs, self.keywords, n_process=1), expected)
+        # the repeated paragraph is only processed once
+        self.assertEqual(extractor.statistics_cache.get_counters()["misses"], 4)
+        self.assertEqual(extractor.statistics_cache.get_counters()["memory_size"], 3)
+
+        extractor.statistics_cache.reset_counters()
+        self.assertListEqual(extractor.get_paragraphs_statistics(self.paragraphs, self.keywords, n_process=1), expected)
+        self.assertEqual(extractor.get_paragraph_statistics(self.paragraphs[1], self.keywords), expected[1])
+        self.assertDictEqual(
+            extractor.statistics_cache.get_counters(), {"memory_hits": 5, "disk_hits": 0, "misses": 0, "memory_size": 3}
+        )
+
+    def test_cached_statistics_with_other_keywords(self):
+        extractor = ParagraphsExtractor(statistics_cache_size=100)
+        extractor.get_paragraphs_statistics(self.paragraphs, self.keywords, n_process=1)
+        statistics = extractor.get_paragraph_statistics(self.paragraphs[3], ["nearby"])
+        self.assertDictEqual(statistics["topic_keyword_occurence"], {"nearby": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
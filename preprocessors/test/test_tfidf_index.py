@@ -0,0 +1,132 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from ..keyword_matcher import KeywordMatcher
+from ..paragraphs_extractor import ParagraphsExtractor
+from ..paragraphs_selector import ParagraphsSelector, TFIDF_KEYWORD_OCCURENCE_STATISTIC
+from ..tfidf_index import TfidfIndex, get_terms
+
+
+class TestTfidfIndex(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a small corpus and a temporary folder before EACH test case
+        """
+        self.index_dir = tempfile.mkdtemp()
+        self.keywords = ["right", "access", "date of birth"]
+        self.paragraphs = [
+            "You have the right to access your data.",
+            "We respect your right to privacy, your right to complain and the right to be forgotten.",
+            "We collect your date of birth.",
+            "We use cookies on our website.",
+            "The right partners help us run our website and our apps.",
+        ]
+        self.index = TfidfIndex.fit(self.paragraphs, self.keywords, min_df=1)
+        self.extractor = ParagraphsExtractor()
+
+    def get_keyword_counts(self, paragraphs, matcher):
+        """
+        Count the keywords of the paragraphs with the Spacy pipeline, the same as the statistics
+        """
+        counts = [self.extractor.count_keywords(paragraph, matcher) for paragraph in paragraphs]
+        return np.array([[count.get(key, 0) for key in matcher.keywords] for count in counts], dtype=np.int32)
+
+    def tearDown(self):
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+
+    def test_get_terms(self):
+        self.assertListEqual(get_terms(["a", "b", "c"], 2), ["a", "b", "c", "a b", "b c"])
+        self.assertListEqual(get_terms(["a"], 3), ["a"])
+
+    def test_fit(self):
+        # the multi-word keywords are terms of the index, the n-grams of the corpus are not
+        self.assertIn("date of birth", self.index.terms)
+        self.assertNotIn("your date", self.index.terms)
+        self.assertEqual(self.index.max_ngram, 3)
+        self.assertListEqual(self.index.get_missing_keywords(self.keywords + ["website", "opt-out"]), ["opt-out"])
+
+        # the words found in fewer paragraphs than the minimum are left out, but not the keywords
+        index = TfidfIndex.fit(self.paragraphs, self.keywords, min_df=2)
+        self.assertNotIn("data", index.terms)
+        self.assertIn("website", index.terms)
+        self.assertIn("access", index.terms)
+
+    def test_get_keyword_tfidf(self):
+        matcher = KeywordMatcher(self.keywords + ["opt-out"])
+        counts = self.get_keyword_counts(self.paragraphs, matcher)
+        actual = self.index.get_keyword_tfidf(counts, self.paragraphs, matcher).toarray()
+        self.assertEqual(actual.shape, (len(self.paragraphs), 4))
+        # the missing keyword is never found, and the keywords are only found where they are counted
+        self.assertListEqual(
+            (actual > 0).tolist(),
+            [
+                [True, True, False, False],
+                [True, False, False, False],
+                [False, False, True, False],
+                [False, False, False, False],
+                [True, False, False, False],
+            ],
+        )
+
+        # the weight is the count over the number of words of the paragraph, times the inverse document frequency
+        idf = self.index.get_keyword_idf(matcher)
+        self.assertEqual(idf[3], 0)
+        self.assertAlmostEqual(actual[1, 0], 3 / 16 * idf[0])
+        self.assertAlmostEqual(actual[4, 0], 1 / 11 * idf[0])
+
+    def test_get_keyword_tfidf_lemmatized_keywords(self):
+        # the keywords with the same words are one term, weighted wherever the paragraph counts have them
+        paragraphs = self.paragraphs + ["Our apps are not directed at children.", "You can opt out at any time."]
+        index = TfidfIndex.fit(paragraphs, ["children", "opt-out", "opt out"], min_df=1)
+        matcher = KeywordMatcher(["children", "opt-out", "opt out"])
+        counts = self.get_keyword_counts(paragraphs, matcher)
+        actual = index.get_keyword_tfidf(counts, paragraphs, matcher).toarray()
+
+        self.assertEqual(actual.shape, (len(paragraphs), 2))
+        self.assertListEqual(index.get_missing_keywords(matcher), [])
+        self.assertListEqual((actual > 0).tolist(), (counts > 0).tolist())
+        self.assertListEqual(
+            (actual[-2:] > 0).tolist(),
+            [[True, False], [False, True]],
+        )
+
+    def test_relevant_scores(self):
+        """
+        The paragraph about the keywords must rank above the paragraph mentioning a common keyword many times
+        """
+        matcher = KeywordMatcher(self.keywords)
+        keyword_occurence = {
+            "keywords": matcher.keywords,
+            "topic_keyword_occurence": np.zeros((len(self.paragraphs), len(matcher.keywords)), dtype=np.int32),
+            "non_topic_keyword_occurence": np.zeros((len(self.paragraphs), len(matcher.keywords)), dtype=np.int32),
+            TFIDF_KEYWORD_OCCURENCE_STATISTIC: self.index.get_keyword_tfidf(
+                self.get_keyword_counts(self.paragraphs, matcher), self.paragraphs, matcher
+            ),
+        }
+        selector = ParagraphsSelector()
+        scores = selector.get_relevant_scores(keyword_occurence, weights=[2, 1], keywords=["right", "access"])
+        self.assertEqual(scores.shape, (len(self.paragraphs),))
+        self.assertEqual(int(np.argmax(scores)), 0)
+        self.assertGreater(scores[1], 0)
+        self.assertEqual(scores[3], 0)
+
+        # the selected rows keep their scores
+        selected = selector.select_keyword_occurence(keyword_occurence, [1, 0])
+        self.assertTrue(
+            np.allclose(selector.get_relevant_scores(selected, weights=[2, 1], keywords=["right", "access"]), scores[[1, 0]])
+        )
+
+    def test_save_and_load(self):
+        path = os.path.join(self.index_dir, "tfidf_index.npz")
+        self.index.save(path)
+        loaded = TfidfIndex.load(path)
+        self.assertListEqual(loaded.terms, self.index.terms)
+        self.assertEqual(loaded.max_ngram, self.index.max_ngram)
+        self.assertEqual((loaded.transform(self.paragraphs) != self.index.transform(self.paragraphs)).nnz, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
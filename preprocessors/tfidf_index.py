@@ -0,0 +1,262 @@
+"""Fit the TF-IDF index of the paragraph relevance on a corpus of privacy policies, see `TFIDF_INDEX_PATH`.
+
+The corpus is a folder of input JSON files, the same as the test fixtures, each with its `privacyPolicyText`.
+Run it from the parent folder of this package, e.g.
+`python3 -m <package>.preprocessors.tfidf_index policies/ tfidf_index.npz` where `<package>` is the folder of this repository
+"""
+import os
+import re
+import sys
+import numpy as np
+from collections import Counter
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from .keyword_matcher import KeywordMatcher
+from .paragraphs_extractor import ParagraphsExtractor
+from .utils.json_helper import from_json_file
+from .utils.lemma_table import get_lemma_table
+from .. import parameters
+from ..parameters import TFIDF_MIN_DF
+
+# Bump whenever the terms of the index change, so that an index fitted with other terms is never loaded
+TFIDF_INDEX_VERSION = 2
+CRITERIA_KEYWORDS_PATTERN = re.compile(r"^C\d+_KEYWORDS$")
+
+
+def get_paragraph_words(paragraph, need_lemma=True):
+    """Get the lowercase lemmas of a paragraph, leaving out the punctuations, with the lemma table
+
+    Args:
+        paragraph (str): the sanitised paragraph content
+        need_lemma (bool): the flag to indicate whether the lemma or the original text of a word is returned (Default True).
+
+    Returns:
+        (list(str)): the words of the paragraph
+    """
+    return [word.lower() for word in get_lemma_table().get_words(paragraph, need_lemma=need_lemma)]
+
+
+def get_terms(words, max_ngram):
+    """Get every word and word n-gram of a text
+
+    Args:
+        words (list(str)): the words of the text
+        max_ngram (int): the number of words of the longest n-grams
+
+    Returns:
+        (list(str)): the terms, the words of an n-gram being joined by a space
+    """
+    return [
+        " ".join(words[start : start + n])
+        for n in range(1, max_ngram + 1)
+        for start in range(len(words) - n + 1)
+    ]
+
+
+class TfidfIndex:
+    """
+    Sparse TF-IDF representation of paragraphs, fitted once on a corpus of policies.
+
+    The terms of the index are the words of the corpus and the (possibly multi-word) keywords of the criteria, and
+    the index keeps their inverse document frequency. The keyword counts of the paragraphs are turned into TF-IDF
+    weights, so that the paragraphs can be scored against the keywords of a criteria with a single sparse
+    matrix-vector product. A keyword shared by most paragraphs of the corpus (e.g. "right") weights less than a
+    specific one, and a keyword mentioned in passing in a long paragraph weights less than in a short paragraph about it.
+    """
+
+    def __init__(self, terms, idf, max_ngram):
+        """
+        Args:
+            terms (list(str)): the terms of the index, i.e. the columns of the TF-IDF matrices
+            idf (numpy.ndarray): the inverse document frequency of every term
+            max_ngram (int): the number of words of the longest term
+        """
+        self.terms = list(terms)
+        self.columns = {term: column for column, term in enumerate(self.terms)}
+        self.max_ngram = max_ngram
+        # the paragraphs are split into terms before the vectorizer, so the analyzer only copies them
+        self.vectorizer = TfidfVectorizer(analyzer=list, vocabulary=self.terms)
+        self.vectorizer.idf_ = np.asarray(idf, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, paragraphs, keywords, min_df=TFIDF_MIN_DF):
+        """Fit the index on the paragraphs of a corpus
+
+        Args:
+            paragraphs (list(str)): the paragraphs of every policy of the corpus
+            keywords (iter(str) or KeywordMatcher): the keywords of all criteria
+            min_df (int): the minimum number of paragraphs a word is found in to be a term of the index.
+                The keywords are always terms of the index.
+
+        Returns:
+            (TfidfIndex): the fitted index
+        """
+        keyword_terms = cls.get_keyword_terms(keywords)
+        max_ngram = max([len(term.split(" ")) for term in keyword_terms if len(term) > 0], default=1)
+
+        paragraphs_words = [get_paragraph_words(paragraph) for paragraph in paragraphs]
+        document_frequency = Counter(word for words in paragraphs_words for word in set(words))
+        frequent_words = sorted(word for word, frequency in document_frequency.items() if frequency >= min_df)
+        terms = list(dict.fromkeys(frequent_words + [term for term in keyword_terms if len(term) > 0]))
+
+        vectorizer = TfidfVectorizer(analyzer=list, vocabulary=terms)
+        vectorizer.fit([get_terms(words, max_ngram) for words in paragraphs_words])
+        return cls(terms, vectorizer.idf_, max_ngram)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved by `save`
+
+        Args:
+            path (str): the path of the index
+
+        Returns:
+            (TfidfIndex): the index
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != TFIDF_INDEX_VERSION:
+                raise ValueError(
+                    "The TF-IDF index {} has version {}, expected {}. Fit it again.".format(
+                        path, int(data["version"]), TFIDF_INDEX_VERSION
+                    )
+                )
+            return cls(data["terms"].tolist(), data["idf"], int(data["max_ngram"]))
+
+    def save(self, path):
+        """Save the index, without pickling, so it can be shared across versions of scikit-learn
+
+        Args:
+            path (str): the path of the index, with the .npz extension
+        """
+        np.savez_compressed(
+            path,
+            version=TFIDF_INDEX_VERSION,
+            terms=np.array(self.terms, dtype=str),
+            idf=self.vectorizer.idf_,
+            max_ngram=self.max_ngram,
+        )
+
+    @staticmethod
+    def get_keyword_terms(keywords):
+        """Get the term of every keyword, i.e. its lowercase lemmas without punctuations, split by
+        `get_paragraph_words` the same way as the paragraphs, so that e.g. "children" is the term "child" in both
+
+        Args:
+            keywords (iter(str) or KeywordMatcher): the keywords
+
+        Returns:
+            (list(str)): the term of every keyword of the matcher, in the same order, the keywords with the same
+                words as a previous one (see `KeywordMatcher.aliases`) having no term of their own
+        """
+        matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        return [" ".join(get_paragraph_words(key)) for key in matcher.keywords]
+
+    def get_missing_keywords(self, keywords):
+        """Get the keywords which are not terms of the index, and are never found by it
+
+        Args:
+            keywords (iter(str) or KeywordMatcher): the keywords
+
+        Returns:
+            (list(str)): the missing keywords
+        """
+        matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        return [
+            key
+            for key, term in zip(matcher.keywords, self.get_keyword_terms(matcher))
+            if term not in self.columns
+        ]
+
+    def transform(self, paragraphs):
+        """Get the TF-IDF vectors of paragraphs
+
+        Args:
+            paragraphs (list(str)): the sanitised paragraph contents
+
+        Returns:
+            (scipy.sparse.csr_matrix): the paragraphs x terms TF-IDF matrix, each row having a unit norm
+        """
+        return self.vectorizer.transform(
+            [get_terms(get_paragraph_words(paragraph), self.max_ngram) for paragraph in paragraphs]
+        )
+
+    def get_keyword_idf(self, keywords):
+        """Get the inverse document frequency of every keyword
+
+        Args:
+            keywords (iter(str) or KeywordMatcher): the keywords
+
+        Returns:
+            (numpy.ndarray): the inverse document frequency of every keyword of the matcher, 0 for the missing keywords
+        """
+        return np.array(
+            [self.vectorizer.idf_[self.columns[term]] if term in self.columns else 0.0 for term in self.get_keyword_terms(keywords)],
+            dtype=np.float64,
+        )
+
+    def get_keyword_tfidf(self, keyword_counts, paragraphs, keywords):
+        """Get the TF-IDF weights of the keywords in paragraphs, from the keyword counts of the paragraphs
+
+        The weight of a keyword is its count in a paragraph divided by the number of words of the paragraph, times its
+        inverse document frequency. The counts are those of the statistics, i.e. of the Spacy pipeline and the keyword
+        matcher, so a paragraph has a weight above 0 for exactly the keywords it is counted with, whatever the lemmatizer,
+        and the ranking agrees with the pruning of the sections and the zero relevance fallback on which paragraphs
+        have a keyword.
+
+        Args:
+            keyword_counts (numpy.ndarray): the paragraphs x keywords number of occurences of every keyword, i.e. the
+                topic and non-topic keyword occurences added together
+            paragraphs (list(str)): the sanitised paragraph contents, whose words are counted
+            keywords (iter(str) or KeywordMatcher): the keywords of all criteria, i.e. the columns of the counts
+
+        Returns:
+            (scipy.sparse.csr_matrix): the paragraphs x keywords TF-IDF matrix, 0 for the keywords missing from the index
+        """
+        num_words = np.array(
+            [max(len(get_paragraph_words(paragraph, need_lemma=False)), 1) for paragraph in paragraphs],
+            dtype=np.float64,
+        ).reshape(len(paragraphs), 1)
+        keyword_counts = np.asarray(keyword_counts, dtype=np.float64).reshape(len(paragraphs), -1)
+        return sparse.csr_matrix(keyword_counts / num_words * self.get_keyword_idf(keywords))
+
+
+def get_criteria_keywords():
+    """Get the keywords of every criteria, from their `<criteria>_KEYWORDS` parameter
+
+    Returns:
+        (list(str)): the keywords of all criteria
+    """
+    return [
+        key
+        for name in dir(parameters)
+        if CRITERIA_KEYWORDS_PATTERN.match(name)
+        for key in getattr(parameters, name)
+    ]
+
+
+def build_index(corpus_dir, path, min_df=TFIDF_MIN_DF):
+    """Fit the index on the policies of a corpus and save it
+
+    Args:
+        corpus_dir (str): the folder of the input JSON files of the policies
+        path (str): the path of the index
+        min_df (int): the minimum number of paragraphs a word is found in to be a term of the index
+
+    Returns:
+        (TfidfIndex): the fitted index
+    """
+    extractor = ParagraphsExtractor()
+    paragraphs = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".json"):
+            html = from_json_file(os.path.join(corpus_dir, name)).get("privacyPolicyText", "")
+            paragraphs.extend(extractor.get_paragraphs(html))
+
+    index = TfidfIndex.fit(paragraphs, get_criteria_keywords(), min_df=min_df)
+    index.save(path)
+    print(f"TF-IDF index of {len(paragraphs)} paragraphs, {len(index.terms)} terms: {path}")
+    return index
+
+
+if __name__ == "__main__":
+    build_index(sys.argv[1], sys.argv[2])
@@ -0,0 +1,97 @@
+from .spacy_utils import get_custom_extractor
+
+# The components which only set the sentence boundaries, which the lemmas do not depend on
+SENTENCE_COMPONENTS = ["set_abbreviation_boundaries", "set_custom_boundaries", "senter", "sentencizer"]
+
+lemma_table = None
+
+
+def has_context_free_lemmas(extractor):
+    """Check whether the lemmas of a Spacy pipeline do not depend on the context of the words, so that the lemma
+    table gives exactly the same lemmas as the pipeline
+
+    Args:
+        extractor (spacy.language.Language): the custom Spacy pipeline
+
+    Returns:
+        (bool): True if the pipeline has no lemmatizer or a lookup one
+    """
+    if "lemmatizer" not in extractor.pipe_names:
+        return True
+    return getattr(extractor.get_pipe("lemmatizer"), "mode", None) == "lookup"
+
+
+class LemmaTable:
+    """
+    Split texts into words with the Spacy tokenizer only, and lemmatize them with a lookup table.
+
+    The lemma of each vocabulary entry is calculated once, by running the Spacy pipeline (without the sentence
+    components) on the word alone, and cached by the id of the entry. After the first texts, most texts are only
+    tokenized. The lemmas do not depend on the context of the words: they are exactly the same as the full pipeline
+    with a lookup lemmatizer (see `has_context_free_lemmas`), but a rule-based lemmatizer, e.g. the one of
+    en_core_web_sm, uses the part-of-speech tags of the sentence, so some words get another lemma and the keyword
+    counts can differ. The fast path is therefore never used by the default settings, only when it is opted in.
+    """
+
+    def __init__(self, extractor):
+        """
+        Args:
+            extractor (spacy.language.Language): the custom Spacy pipeline
+        """
+        self.extractor = extractor
+        self.lemmas = {}
+        self.disabled_components = [name for name in SENTENCE_COMPONENTS if name in extractor.pipe_names]
+
+    def get_words(self, text, need_lemma=True):
+        """Get the words of a text, leaving out the punctuations, the same way as `ParagraphsExtractor.tokenize_text`
+
+        Args:
+            text (str): the piece of text in string
+            need_lemma (bool): the flag to indicate whether the lemma or the original text of a word is returned (Default True).
+
+        Returns:
+            (list(str)): the list of words
+        """
+        return self.get_token_words(self.extractor.tokenizer(text), need_lemma=need_lemma)
+
+    def get_token_words(self, tokens, need_lemma=True):
+        """Get the words of already tokenized text, leaving out the punctuations
+
+        Args:
+            tokens (iter(spacy.tokens.Token)): a tokenized Doc, a sentence Span or any other sequence of tokens
+            need_lemma (bool): the flag to indicate whether the lemma or the original text of a word is returned (Default True).
+
+        Returns:
+            (list(str)): the list of words
+        """
+        tokens = [token for token in tokens if not token.is_punct]
+        if not need_lemma:
+            return [token.text for token in tokens]
+
+        missing_words = {token.orth: token.text for token in tokens if token.orth not in self.lemmas}
+        if len(missing_words) > 0:
+            self.add_lemmas(missing_words)
+        return [self.lemmas[token.orth] for token in tokens]
+
+    def add_lemmas(self, words):
+        """Calculate and cache the lemmas of new vocabulary entries
+
+        Args:
+            words (dict(int, str)): the texts of the new entries, by their ids
+        """
+        docs = self.extractor.pipe(words.values(), disable=self.disabled_components)
+        for (orth, word), doc in zip(words.items(), docs):
+            # a word which is split differently on its own keeps its original text
+            self.lemmas[orth] = doc[0].lemma_ if len(doc) == 1 else word
+
+
+def get_lemma_table():
+    """Get the lemma table of the custom Spacy pipeline, creating it on first use
+
+    Returns:
+        (LemmaTable): the lemma table
+    """
+    global lemma_table
+    if lemma_table is None:
+        lemma_table = LemmaTable(get_custom_extractor())
+    return lemma_table
@@ -1,6 +1,30 @@
-from spacy.language import Language
+import os
+import json
+import shutil
+import hashlib
+import tempfile
 import spacy
-from ...parameters import SENTENCE_NONE_BOUNDARY_KEYWORDS, SENTENCE_BOUNDARY_KEYWORDS
+from spacy.language import Language
+from ...parameters import (
+    SENTENCE_NONE_BOUNDARY_KEYWORDS,
+    SENTENCE_BOUNDARY_KEYWORDS,
+    NONE_BOUNDARY_ABBREVIATIONS,
+    SENTENCE_SEGMENTER,
+)
+
+SPACY_MODEL_NAME = "en_core_web_sm"
+CURRENT_DIR = os.path.dirname(__file__)
+# The custom pipeline is serialised here once, so that the next processes only need to load it from disk
+CACHE_DIR = os.path.join(CURRENT_DIR, ".spacy_cache")
+
+# "senter" - the statistical sentence segmenter of the Spacy model
+# "sentencizer" - the rule-based Spacy sentencizer, which is faster but less accurate
+SENTENCE_SEGMENTERS = ["senter", "sentencizer"]
+
+# The components of the "sentencizer" pipeline which only need the tokens to set the sentence boundaries
+RULE_SENTENCE_COMPONENTS = ["set_abbreviation_boundaries", "set_custom_boundaries", "sentencizer"]
+
+custom_extractors = {}
 
 
 @Language.component("set_custom_boundaries")
@@ -16,6 +40,118 @@ def set_custom_boundaries(doc):
     return doc
 
 
-custom_extractor = spacy.load("en_core_web_sm", exclude=["parser", "ner", "textcat"])
-custom_extractor.enable_pipe("senter")
-custom_extractor.add_pipe("set_custom_boundaries", before="senter")
+@Language.component("set_abbreviation_boundaries")
+def set_abbreviation_boundaries(doc):
+    for token in doc[:-1]:
+        # the tokenizer keeps some abbreviations with their period (e.g. "e.g."), and splits the others (e.g. "al", ".")
+        if token.text.endswith(".") and (
+            token.text.lower().rstrip(".") in NONE_BOUNDARY_ABBREVIATIONS
+            or (token.i > 0 and token.text == "." and doc[token.i - 1].text.lower() in NONE_BOUNDARY_ABBREVIATIONS)
+        ):
+            doc[token.i + 1].is_sent_start = False
+    return doc
+
+
+def get_custom_extractor(segmenter=SENTENCE_SEGMENTER):
+    """Get the custom Spacy pipeline, loading it on first use.
+
+    Nothing is loaded when this module is imported, so the processes which never extract paragraphs
+    (e.g. the criteria processes) do not pay for the Spacy model.
+
+    Args:
+        segmenter (str): the sentence segmenter of the pipeline, one of `SENTENCE_SEGMENTERS`
+
+    Returns:
+        (spacy.language.Language): the custom Spacy pipeline
+    """
+    if segmenter not in custom_extractors:
+        custom_extractors[segmenter] = load_custom_extractor(segmenter=segmenter)
+    return custom_extractors[segmenter]
+
+
+def build_custom_extractor(segmenter=SENTENCE_SEGMENTER):
+    """Build the custom Spacy pipeline from the original Spacy model
+
+    Args:
+        segmenter (str): the sentence segmenter of the pipeline, one of `SENTENCE_SEGMENTERS`
+
+    Returns:
+        (spacy.language.Language): the Spacy model with the sentence segmenter and the custom boundaries enabled
+    """
+    if segmenter not in SENTENCE_SEGMENTERS:
+        raise ValueError(
+            "Unknown sentence segmenter {}, expected one of {}".format(segmenter, ", ".join(SENTENCE_SEGMENTERS))
+        )
+
+    extractor = spacy.load(SPACY_MODEL_NAME, exclude=["parser", "ner", "textcat"])
+    if segmenter == "senter":
+        extractor.enable_pipe("senter")
+        extractor.add_pipe("set_custom_boundaries", before="senter")
+    else:
+        # the sentencizer keeps the boundaries which are already set, so the rules run before it
+        extractor.add_pipe("set_abbreviation_boundaries")
+        extractor.add_pipe("set_custom_boundaries")
+        extractor.add_pipe("sentencizer")
+    return extractor
+
+
+def get_cache_key(segmenter=SENTENCE_SEGMENTER):
+    """Get the key of the custom Spacy pipeline in the cache
+
+    The key changes whenever the Spacy version, the Spacy model version or the sentence boundary parameters change,
+    so an outdated pipeline is never loaded from the cache.
+
+    Args:
+        segmenter (str): the sentence segmenter of the pipeline, one of `SENTENCE_SEGMENTERS`
+
+    Returns:
+        (str): the cache key
+    """
+    cache_params = {
+        "spacy": spacy.__version__,
+        "model": SPACY_MODEL_NAME,
+        "model_version": spacy.util.get_package_version(SPACY_MODEL_NAME),
+        "boundary_keywords": sorted(SENTENCE_BOUNDARY_KEYWORDS),
+        "none_boundary_keywords": sorted(SENTENCE_NONE_BOUNDARY_KEYWORDS),
+        "segmenter": segmenter,
+    }
+    if segmenter == "sentencizer":
+        cache_params["none_boundary_abbreviations"] = sorted(NONE_BOUNDARY_ABBREVIATIONS)
+    params_hash = hashlib.sha1(json.dumps(cache_params, sort_keys=True).encode("utf-8")).hexdigest()
+    return "{}-{}-{}".format(SPACY_MODEL_NAME, spacy.__version__, params_hash[:12])
+
+
+def load_custom_extractor(cache_dir=CACHE_DIR, segmenter=SENTENCE_SEGMENTER):
+    """Load the custom Spacy pipeline from the cache, or build it and save it to the cache
+
+    Args:
+        cache_dir (str): the folder of the cached pipelines. If None, the pipeline is always built without caching.
+        segmenter (str): the sentence segmenter of the pipeline, one of `SENTENCE_SEGMENTERS`
+
+    Returns:
+        (spacy.language.Language): the custom Spacy pipeline
+    """
+    if cache_dir is None:
+        return build_custom_extractor(segmenter)
+
+    cache_path = os.path.join(cache_dir, get_cache_key(segmenter))
+    if os.path.isdir(cache_path):
+        try:
+            return spacy.load(cache_path)
+        except Exception as e:
+            print("Exception when loading the cached Spacy pipeline {}: {}".format(cache_path, e))
+
+    extractor = build_custom_extractor(segmenter)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write into a temporary folder first, so that concurrent processes never load a half written pipeline
+        temp_path = tempfile.mkdtemp(dir=cache_dir)
+        extractor.to_disk(temp_path)
+        try:
+            os.rename(temp_path, cache_path)
+        except OSError:
+            # another process has cached the same pipeline in the meantime
+            shutil.rmtree(temp_path, ignore_errors=True)
+    except Exception as e:
+        print("Exception when caching the Spacy pipeline to {}: {}".format(cache_path, e))
+    return extractor